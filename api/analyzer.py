@@ -1,10 +1,79 @@
 # analyzer.py
+from typing import List
+import torch
 from tweetnlp import Classifier
 
+try:
+    from .chunker import token_windows
+except ImportError:
+    from chunker import token_windows
+
+MODEL_NAME = "cardiffnlp/twitter-xlm-roberta-base-sentiment-multilingual"
+MAX_LENGTH = 512 # XLM-RoBERTa has a token limit of 512
+# fp32 runs the model as published; int8 applies dynamic int8 quantization to its linear layers
+BACKENDS = ("fp32", "int8")
+# Backends whose labels have not been compared with fp32 on the sample corpus yet
+UNMEASURED_BACKENDS = ("int8",)
+
+def model_identifier(window_overlap: int = 0, backend: str = "fp32") -> str:
+    """Identifies everything that affects the labels; stored alongside persisted results."""
+    return f"{MODEL_NAME}@max_length={MAX_LENGTH},windows=tokens,overlap={window_overlap},backend={backend}"
+
+MODEL_ID = model_identifier()
+
+def check_backend(backend: str):
+    """Raise ValueError for an unknown backend; warn about one whose accuracy is not measured yet."""
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown sentiment backend {backend!r}, expected one of {BACKENDS}")
+    if backend in UNMEASURED_BACKENDS:
+        print(
+            f"Warning: the {backend} sentiment backend has not been compared with fp32 on the sample "
+            "feedback corpus; run `python -m benchmarks.sentiment_quantization` before relying on its labels"
+        )
+
+def preprocess(text: str) -> str:
+    """Normalize user mentions and links the way tweetnlp.Classifier.predict does."""
+    words = []
+    for word in text.split(" "):
+        word = "@user" if word.startswith("@") and len(word) > 1 else word
+        word = "http" if word.startswith("http") else word
+        words.append(word)
+    return " ".join(words)
+
+def quantize(model: torch.nn.Module) -> torch.nn.Module:
+    """Dynamically quantize the linear layers of a model to int8 for CPU inference.
+
+    Weights are stored as int8 and activations are quantized on the fly, which cuts
+    the memory of the linear layers by about 4x and speeds up their matmuls on CPU.
+    """
+    model = torch.ao.quantization.quantize_dynamic(model.to("cpu"), {torch.nn.Linear}, dtype=torch.qint8)
+    model.eval()
+    return model
+
 class Analyzer:
-    def __init__(self):
+    def __init__(self, batch_size: int = 32, window_overlap: int = 0, backend: str = "fp32", num_threads: int = None):
+        """
+        Args:
+            batch_size (int, optional): Texts or windows per forward pass. Defaults to 32.
+            window_overlap (int, optional): Tokens shared by consecutive windows. Defaults to 0.
+            backend (str, optional): "fp32" or "int8" (CPU only). Defaults to "fp32".
+            num_threads (int, optional): Pin torch's intra-op thread count. Defaults to torch's choice.
+        """
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown sentiment backend {backend!r}, expected one of {BACKENDS}")
+        if num_threads:
+            torch.set_num_threads(num_threads)
+
         # Initialize the sentiment analysis model
-        self.sentiment_model = Classifier("cardiffnlp/twitter-xlm-roberta-base-sentiment-multilingual", max_length=512) # XLM-RoBERTa has a token limit of 512
+        self.sentiment_model = Classifier(MODEL_NAME, max_length=MAX_LENGTH)
+        if backend == "int8":
+            self.sentiment_model.model = quantize(self.sentiment_model.model)
+            # Quantized kernels are CPU only; keep tweetnlp's predict() on the same device
+            self.sentiment_model.device = "cpu"
+        self.batch_size = batch_size
+        self.window_overlap = window_overlap
+        self.backend = backend
+        self.model_id = model_identifier(window_overlap, backend)
 
     def get_sentiment_score(self, text: str) -> str:
         """Calculate the sentiment score for the given text.
@@ -18,3 +87,59 @@ class Analyzer:
         # Perform sentiment analysis using tweetnlp
         result = self.sentiment_model.predict(text)
         return result['label']
+
+    def iter_windows(self, text: str):
+        """Lazily yield the token windows of a text, as input ids for the model."""
+        return token_windows(self.sentiment_model.tokenizer, preprocess(text), MAX_LENGTH, self.window_overlap)
+
+    def get_window_sentiments(self, windows: List[List[int]], batch_size: int = None) -> List[str]:
+        """Calculate sentiment labels for already tokenized windows.
+
+        Windows are sorted by length before being cut into micro-batches, so each padded
+        batch holds windows of similar length and little compute is spent on padding.
+        They are padded directly from their input ids.
+
+        Args:
+            windows (List[List[int]]): Input ids of each window, special tokens included.
+            batch_size (int, optional): Windows per forward pass. Defaults to self.batch_size.
+
+        Returns:
+            List[str]: The predicted sentiment labels, in the same order as `windows`.
+        """
+        batch_size = batch_size or self.batch_size
+        tokenizer = self.sentiment_model.tokenizer
+        model = self.sentiment_model.model
+        device = next(model.parameters()).device
+        id2label = model.config.id2label
+        order = sorted(range(len(windows)), key=lambda i: len(windows[i]))
+        labels = [None] * len(windows)
+        with torch.no_grad():
+            for start in range(0, len(order), batch_size):
+                batch_indices = order[start:start + batch_size]
+                encoded = tokenizer.pad({"input_ids": [windows[i] for i in batch_indices]}, return_tensors="pt")
+                logits = model(**{key: value.to(device) for key, value in encoded.items()}).logits
+                for i, label_id in zip(batch_indices, logits.argmax(dim=-1).tolist()):
+                    labels[i] = id2label[label_id]
+        return labels
+
+    def get_response_window_sentiments(self, texts: List[str], batch_size: int = None) -> List[List[str]]:
+        """Calculate the sentiment label of every token window of every text.
+
+        Each text is tokenized once; the windows of all texts are scored together in
+        batched forward passes.
+
+        Args:
+            texts (List[str]): The input texts for sentiment analysis.
+            batch_size (int, optional): Windows per forward pass. Defaults to self.batch_size.
+
+        Returns:
+            List[List[str]]: The labels of each text's windows, in the same order as `texts`.
+        """
+        windows = []
+        bounds = []  # (start, end) slice of windows for each text
+        for text in texts:
+            start = len(windows)
+            windows.extend(self.iter_windows(text))
+            bounds.append((start, len(windows)))
+        labels = self.get_window_sentiments(windows, batch_size)
+        return [labels[start:end] for start, end in bounds]
@@ -1,9 +1,8 @@
-import pickle
 from course_recommender import CourseRecommender
+from serialization import FastJSONResponse, RecommendationsResponse, columns_to_records
 import uvicorn
 from fastapi import FastAPI
 from pydantic import BaseModel
-from typing import List
 
 model = CourseRecommender()
 app = FastAPI()
@@ -15,22 +14,10 @@ class RecommendationRequest(BaseModel):
 def read_root():
     return {"message": "Hello World!"}
 
-@app.post("/recommendations/{keywords}")
+@app.post("/recommendations/{keywords}", response_model=RecommendationsResponse)
 def get_recommendations(keywords: str):
-    recommendations = model.recommend(keywords)
-    formatted_recommendations = []
-    for course_id in recommendations['course_title'].index:
-        course_details = {
-            "course_id": course_id,
-            "course_title": recommendations['course_title'][course_id],
-            "course_Certificate_type": recommendations['course_Certificate_type'][course_id],
-            "course_rating": recommendations['course_rating'][course_id],
-            "course_difficulty": recommendations['course_difficulty'][course_id],
-            "course_students_enrolled": recommendations['course_students_enrolled'][course_id],
-            "overall_rating": recommendations['overall_rating'][course_id]
-        }
-        formatted_recommendations.append(course_details)
-    return {"recommendations": formatted_recommendations}
+    columns = model.recommend_columns(keywords)
+    return FastJSONResponse({"recommendations": columns_to_records(columns)})
 
 # To run the FastAPI app, use the following command in your terminal:
 # uvicorn filename:app --reload
@@ -0,0 +1,36 @@
+# chunker.py
+from typing import Iterator, List
+
+
+def token_windows(tokenizer, text: str, max_length: int, overlap: int = 0) -> Iterator[List[int]]:
+    """Lazily split a text into windows that fit the model's token limit.
+
+    The text is tokenized once and windows are sliced out of the token ids, so the
+    cost is linear in the length of the text. Each window already carries the
+    model's special tokens and can be passed to the model as is, without being
+    tokenized again.
+
+    Args:
+        tokenizer: A Hugging Face tokenizer.
+        text (str): The input text.
+        max_length (int): Maximum window length in tokens, special tokens included.
+        overlap (int, optional): Tokens shared by consecutive windows. Defaults to 0.
+
+    Yields:
+        List[int]: Input ids of one window.
+    """
+    size = max_length - tokenizer.num_special_tokens_to_add(pair=False)
+    if size <= 0:
+        raise ValueError(f"max_length {max_length} leaves no room for content tokens")
+    if not 0 <= overlap < size:
+        raise ValueError(f"overlap must be in [0, {size}), got {overlap}")
+
+    # verbose=False: the full text may exceed max_length, which is expected here
+    ids = tokenizer(text, add_special_tokens=False, truncation=False, verbose=False)["input_ids"]
+    step = size - overlap
+    start = 0
+    while True:
+        yield tokenizer.build_inputs_with_special_tokens(ids[start:start + size])
+        if start + size >= len(ids):
+            return
+        start += step
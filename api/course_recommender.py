@@ -2,53 +2,288 @@
 import kagglehub
 import os
 import sys
-from tempfile import NamedTemporaryFile
-from urllib.request import urlopen
-from urllib.parse import unquote, urlparse
-from urllib.error import HTTPError
-from zipfile import ZipFile
-import tarfile
+import json
+import hashlib
 import shutil
-import pickle
+import tempfile
+import argparse
 import numpy as np # linear algebra
 import pandas as pd # data processing, CSV file I/O (e.g. pd.read_csv)
-from statistics import harmonic_mean
-from langdetect import detect
-from sklearn.feature_extraction.text import TfidfVectorizer, TfidfTransformer, CountVectorizer
-from sklearn.preprocessing import MinMaxScaler
-from sklearn.metrics import f1_score
+from scipy.sparse import csr_matrix
+from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.metrics.pairwise import cosine_similarity
 
+try:
+    from .inverted_index import InvertedIndex, select_top_k
+    from .preprocessing import LanguageCache, StageTimer, preprocess_catalog
+except ImportError:
+    from inverted_index import InvertedIndex, select_top_k
+    from preprocessing import LanguageCache, StageTimer, preprocess_catalog
+
+# Bump whenever the on-disk layout written by save_model changes
+ARTIFACT_FORMAT_VERSION = 2
+
+# Catalog columns kept in the artifact (and returned by recommend)
+CATALOG_COLUMNS = [
+    'course_title',
+    'course_Certificate_type',
+    'course_rating',
+    'course_difficulty',
+    'course_students_enrolled',
+    'overall_rating',
+]
+
 class CourseRecommender:
-    def __init__(self):
-        path_course = kagglehub.dataset_download("siddharthm1698/coursera-course-dataset")
-        self.df = pd.read_csv(path_course + '/coursea_data.csv')
-        self.df.drop(['Unnamed: 0', 'course_organization'], axis=1, inplace=True)
-        self.df = self.df[self.df.course_students_enrolled.str.endswith('k')]
-        self.df['course_students_enrolled'] = self.df['course_students_enrolled'].apply(lambda enrolled : eval(enrolled[:-1]) * 1000)
-        minmax_scaler = MinMaxScaler()
-        scaled_ratings = minmax_scaler.fit_transform(self.df[['course_rating','course_students_enrolled']])
-        self.df['course_rating'] = scaled_ratings[:,0]
-        self.df['course_students_enrolled'] = scaled_ratings[:,1]
-        self.df['overall_rating'] = self.df[['course_rating','course_students_enrolled']].apply(lambda row : harmonic_mean(row), axis=1)
-        self.df = self.df[self.df.course_title.apply(lambda title : detect(title) == 'en')]
-        self.vectorizer = TfidfVectorizer(stop_words='english')
-        self.vectors = self.vectorizer.fit_transform(self.df['course_title'])
+    def __init__(self, artifact_path=None):
+        """Load a compiled artifact if one is available, otherwise build from the Kaggle dataset.
+
+        Args:
+            artifact_path (str, optional): Directory written by save_model. Defaults to the
+                COURSE_ARTIFACT_PATH environment variable.
+        """
+        artifact_path = artifact_path or os.getenv('COURSE_ARTIFACT_PATH')
+        if artifact_path and os.path.exists(os.path.join(artifact_path, 'manifest.json')):
+            self._load_artifact(artifact_path)
+            return
+        if artifact_path:
+            print(f"No compiled artifact at {artifact_path}, building from the dataset instead.")
+        self._build()
+
+    @classmethod
+    def from_dataset(cls, language_cache_path=None):
+        """Build the recommender from the Kaggle dataset, ignoring any compiled artifact."""
+        recommender = cls.__new__(cls)
+        recommender._build(language_cache_path)
+        return recommender
+
+    @classmethod
+    def from_catalog(cls, df):
+        """Fit the recommender on an already preprocessed catalog containing CATALOG_COLUMNS."""
+        recommender = cls.__new__(cls)
+        recommender._fit(df)
+        return recommender
+
+    def _build(self, language_cache_path=None):
+        timer = StageTimer()
+        with timer.stage('download'):
+            path_course = kagglehub.dataset_download("siddharthm1698/coursera-course-dataset")
+        with timer.stage('read_csv'):
+            raw = pd.read_csv(path_course + '/coursea_data.csv', usecols=[
+                'course_title', 'course_Certificate_type', 'course_rating', 'course_difficulty', 'course_students_enrolled',
+            ])
+        language_cache = LanguageCache(language_cache_path or os.getenv('LANGUAGE_CACHE_PATH'))
+        df = preprocess_catalog(raw, language_cache, timer)
+        language_cache.save()
+        self._fit(df, timer)
+        self.build_timings = timer.timings
+        print(f"Built course recommender ({len(df)} courses):\n{timer.report()}")
+
+    def _fit(self, df, timer=None):
+        timer = timer or StageTimer()
+        with timer.stage('fit_vectorizer'):
+            self.vectorizer = TfidfVectorizer(stop_words='english')
+            self.vectors = self.vectorizer.fit_transform(df['course_title'])
+            self.analyzer = self.vectorizer.build_analyzer()
+        with timer.stage('build_index'):
+            self.index = InvertedIndex.from_vectors(self.vectors)
+            self._set_catalog(df)
+            self.version = self._compute_version()
+
+    def _set_catalog(self, df):
+        # Columnar catalog: one flat array per column, aligned with the rows of self.vectors
+        self.course_ids = df.index.to_numpy(dtype=np.int64)
+        self.catalog = {}
+        for col in CATALOG_COLUMNS:
+            values = df[col].to_numpy()
+            if values.dtype == object:
+                values = values.astype(str)
+            self.catalog[col] = values
+        self._df = None
+
+    @property
+    def df(self):
+        """Full catalog as a DataFrame, materialized lazily from the column arrays."""
+        if self._df is None:
+            self._df = pd.DataFrame(self.catalog, index=self.course_ids)
+        return self._df
+
+    def _compute_version(self):
+        digest = hashlib.sha256()
+        digest.update(str(ARTIFACT_FORMAT_VERSION).encode())
+        digest.update('\n'.join(self.vectorizer.get_feature_names_out()).encode())
+        for array in (self.vectorizer.idf_, self.vectors.indptr, self.vectors.indices, self.vectors.data, self.course_ids):
+            digest.update(np.ascontiguousarray(array).tobytes())
+        for col in CATALOG_COLUMNS:
+            digest.update(np.ascontiguousarray(self.catalog[col]).tobytes())
+        return digest.hexdigest()[:16]
+
+    # Canonical form of a query: the analyzer tokens that can affect its score
+    def normalize_query(self, title):
+        vocabulary = self.vectorizer.vocabulary_
+        return tuple(sorted(token for token in self.analyzer(title) if token in vocabulary))
 
     # Recommend courses based on a title
     def recommend(self, title, recomm_count=10):
+        idx, _ = self.index.top_k(self.vectorizer.transform([title]), recomm_count)
+        return self.df.iloc[idx].sort_values(by='overall_rating', ascending=False)
+
+    # Recommend courses for many titles at once
+    def recommend_batch(self, titles, recomm_count=10):
+        """Score all titles with one vectorizer call and one sparse matrix product.
+
+        Args:
+            titles (List[str]): Query strings, e.g. one per user.
+            recomm_count (int): Number of courses to return per query.
+
+        Returns:
+            List[pd.DataFrame]: One result per title, in input order, as returned by recommend.
+        """
+        return [
+            self.df.iloc[idx].sort_values(by='overall_rating', ascending=False)
+            for idx in self._batch_top_k(titles, recomm_count)
+        ]
+
+    # Same results as recommend/recommend_batch, as plain Python column lists
+    def recommend_columns(self, title, recomm_count=10):
+        idx, _ = self.index.top_k(self.vectorizer.transform([title]), recomm_count)
+        return self._columns(idx)
+
+    def recommend_batch_columns(self, titles, recomm_count=10):
+        return [self._columns(idx) for idx in self._batch_top_k(titles, recomm_count)]
+
+    def _batch_top_k(self, titles, recomm_count):
+        if not titles:
+            return []
+        title_vectors = self.vectorizer.transform(titles)
+        # (queries x terms) @ (terms x courses): row i holds the scores of every course sharing a term with query i
+        scores = (title_vectors @ self.vectors.T).tocsr()
+        scores.sort_indices()
+        results = []
+        for i in range(len(titles)):
+            start, end = scores.indptr[i], scores.indptr[i + 1]
+            idx, _ = select_top_k(scores.indices[start:end], scores.data[start:end], recomm_count, self.vectors.shape[0])
+            results.append(idx)
+        return results
+
+    def _columns(self, idx):
+        # Gather straight from the column arrays; tolist() yields JSON-ready Python scalars
+        idx = idx[np.argsort(-self.catalog['overall_rating'][idx], kind='stable')]
+        columns = {'course_id': self.course_ids[idx].tolist()}
+        for col in CATALOG_COLUMNS:
+            columns[col] = self.catalog[col][idx].tolist()
+        return columns
+
+    # Reference implementation scoring every course; kept to check the index against
+    def recommend_exhaustive(self, title, recomm_count=10):
         title_vector = self.vectorizer.transform([title])
         cosine_sim = cosine_similarity(self.vectors, title_vector)
         idx = cosine_sim.flatten().argsort()[-recomm_count:]
         return self.df.iloc[idx].sort_values(by='overall_rating', ascending=False)
 
-    # Save the model to a pickle file
-    def save_model(self, filename='model.pkl'):
-        with open(filename, 'wb') as file:
-            pickle.dump(self, file)
+    # Save the model as a versioned, memory-mappable artifact directory
+    def save_model(self, path='model'):
+        """Write the vocabulary, IDF weights, CSR matrix and columnar catalog to `path`.
+
+        The inverted index posting lists are stored alongside the CSR matrix. Every array
+        is stored as a plain .npy file so that load_model can memory-map it
+        instead of deserializing it into the process heap. The directory is written to a
+        temporary location first and swapped in atomically.
+        """
+        parent = os.path.dirname(os.path.abspath(path))
+        os.makedirs(parent, exist_ok=True)
+        staging = tempfile.mkdtemp(prefix='.course-artifact-', dir=parent)
+        try:
+            np.save(os.path.join(staging, 'idf.npy'), np.asarray(self.vectorizer.idf_, dtype=np.float64))
+            np.save(os.path.join(staging, 'indptr.npy'), self.vectors.indptr)
+            np.save(os.path.join(staging, 'indices.npy'), self.vectors.indices)
+            np.save(os.path.join(staging, 'data.npy'), self.vectors.data)
+            np.save(os.path.join(staging, 'postings_indptr.npy'), self.index.indptr)
+            np.save(os.path.join(staging, 'postings_doc_ids.npy'), self.index.doc_ids)
+            np.save(os.path.join(staging, 'postings_weights.npy'), self.index.weights)
+            np.save(os.path.join(staging, 'course_ids.npy'), self.course_ids)
+            os.mkdir(os.path.join(staging, 'catalog'))
+            for col in CATALOG_COLUMNS:
+                np.save(os.path.join(staging, 'catalog', col + '.npy'), self.catalog[col])
+            with open(os.path.join(staging, 'vocabulary.json'), 'w') as file:
+                json.dump(self.vectorizer.get_feature_names_out().tolist(), file)
+            manifest = {
+                'format_version': ARTIFACT_FORMAT_VERSION,
+                'version': self.version,
+                'n_courses': int(self.vectors.shape[0]),
+                'n_terms': int(self.vectors.shape[1]),
+                'stop_words': self.vectorizer.stop_words,
+                'columns': CATALOG_COLUMNS,
+            }
+            # The manifest goes last: its presence marks the artifact as complete
+            with open(os.path.join(staging, 'manifest.json'), 'w') as file:
+                json.dump(manifest, file, indent=2)
 
-    # Load the model from a pickle file
+            if os.path.exists(path):
+                retired = path + '.old'
+                shutil.rmtree(retired, ignore_errors=True)
+                os.rename(path, retired)
+                os.rename(staging, path)
+                shutil.rmtree(retired, ignore_errors=True)
+            else:
+                os.rename(staging, path)
+        except BaseException:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+
+    def _load_artifact(self, path):
+        with open(os.path.join(path, 'manifest.json')) as file:
+            manifest = json.load(file)
+        if manifest.get('format_version') != ARTIFACT_FORMAT_VERSION:
+            raise ValueError(
+                f"Artifact at {path} has format version {manifest.get('format_version')}, "
+                f"expected {ARTIFACT_FORMAT_VERSION}. Recompile it with `python course_recommender.py compile`."
+            )
+        with open(os.path.join(path, 'vocabulary.json')) as file:
+            terms = json.load(file)
+
+        def load(*parts):
+            return np.load(os.path.join(path, *parts), mmap_mode='r', allow_pickle=False)
+
+        # A fixed vocabulary plus the stored IDF weights reproduce the fitted vectorizer exactly
+        self.vectorizer = TfidfVectorizer(
+            stop_words=manifest['stop_words'],
+            vocabulary={term: i for i, term in enumerate(terms)},
+        )
+        self.vectorizer.idf_ = np.asarray(load('idf.npy'))
+        self.analyzer = self.vectorizer.build_analyzer()
+        self.vectors = csr_matrix(
+            (load('data.npy'), load('indices.npy'), load('indptr.npy')),
+            shape=(manifest['n_courses'], manifest['n_terms']),
+            copy=False,
+        )
+        self.index = InvertedIndex(
+            load('postings_indptr.npy'),
+            load('postings_doc_ids.npy'),
+            load('postings_weights.npy'),
+            manifest['n_courses'],
+        )
+        self.course_ids = load('course_ids.npy')
+        self.catalog = {col: load('catalog', col + '.npy') for col in manifest['columns']}
+        self._df = None
+        self.version = manifest['version']
+
+    # Load the model from an artifact directory written by save_model
     @staticmethod
-    def load_model(filename='model.pkl'):
-        with open(filename, 'rb') as file:
-            return pickle.load(file)
\ No newline at end of file
+    def load_model(path='model'):
+        return CourseRecommender(artifact_path=path)
+
+
+if __name__ == '__main__':
+    # Offline compile step: python course_recommender.py compile --output model
+    parser = argparse.ArgumentParser(description='Course recommender tooling')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    compile_parser = subparsers.add_parser('compile', help='Build the recommender and write a memory-mappable artifact')
+    compile_parser.add_argument('--output', default='model', help='Artifact directory to write')
+    compile_parser.add_argument('--language-cache', default='language_cache.json', help='JSON file caching detected title languages')
+    args = parser.parse_args()
+
+    if args.command == 'compile':
+        recommender = CourseRecommender.from_dataset(args.language_cache)
+        recommender.save_model(args.output)
+        print(f"Wrote artifact {recommender.version} ({recommender.vectors.shape[0]} courses) to {args.output}")
+        sys.exit(0)
@@ -0,0 +1,106 @@
+# course_store.py
+"""Persistence for runtime course changes made through the incremental index.
+
+The compiled artifact holds the Coursera catalog; courses added, updated or deleted
+at runtime are kept in MongoDB and replayed onto the index when it loads, so a
+restart or /api/reloadRecommender keeps them.
+
+* Added and updated courses are documents of the Prisma `Course` collection. Courses
+  created by the web app through Prisma are picked up the same way on the next load.
+* Deletes are markers in `CourseTombstone`, since catalog rows that only exist in
+  the artifact have no `Course` document to remove.
+
+Prisma `Course` fields map onto the catalog columns the recommender uses:
+
+    Course (Prisma)     catalog column
+    id (_id)            course_id (digit strings are the CSV row labels)
+    title               course_title
+    certificateType     course_Certificate_type
+    rating              course_rating
+    difficulty          course_difficulty
+    studentsEnrolled    course_students_enrolled
+    overallRating       overall_rating
+"""
+from datetime import datetime, timezone
+from typing import Tuple
+
+COURSE_COLLECTION = "Course"
+COURSE_TOMBSTONE_COLLECTION = "CourseTombstone"
+
+# Prisma Course field -> catalog column
+COURSE_FIELD_MAP = {
+    "title": "course_title",
+    "certificateType": "course_Certificate_type",
+    "rating": "course_rating",
+    "difficulty": "course_difficulty",
+    "studentsEnrolled": "course_students_enrolled",
+    "overallRating": "overall_rating",
+}
+
+
+def parse_course_id(course_id: str):
+    # Courses from the Coursera CSV are keyed by their integer row label
+    return int(course_id) if course_id.isdigit() else course_id
+
+
+def course_from_document(document: dict) -> Tuple[object, dict]:
+    """Return (course id, catalog row) for a Prisma `Course` document."""
+    course = {column: document[field] for field, column in COURSE_FIELD_MAP.items()}
+    return parse_course_id(str(document["_id"])), course
+
+
+def course_document(course: dict) -> dict:
+    """Return the Prisma `Course` fields for a catalog row."""
+    return {field: course[column] for field, column in COURSE_FIELD_MAP.items()}
+
+
+class CourseStore:
+    """Reads and writes the persisted course changes. Collections are motor (asyncio) collections."""
+
+    def __init__(self, courses, tombstones, batch_size: int = 500):
+        self.courses = courses
+        self.tombstones = tombstones
+        self.batch_size = batch_size
+
+    async def save(self, course_id: str, course: dict):
+        """Upsert a course (a catalog row) and clear any earlier delete of it."""
+        now = datetime.now(timezone.utc)
+        await self.courses.update_one(
+            {"_id": course_id},
+            {"$set": {**course_document(course), "updatedAt": now}, "$setOnInsert": {"createdAt": now}},
+            upsert=True,
+        )
+        await self.tombstones.delete_one({"_id": course_id})
+
+    async def delete(self, course_id: str):
+        """Remove a course's document and record the delete for artifact rows."""
+        await self.tombstones.replace_one(
+            {"_id": course_id}, {"_id": course_id, "deletedAt": datetime.now(timezone.utc)}, upsert=True,
+        )
+        await self.courses.delete_one({"_id": course_id})
+
+    async def replay(self, recommender) -> dict:
+        """Apply every persisted change to an IncrementalCourseRecommender.
+
+        A `Course` document written after its tombstone (e.g. re-created through
+        Prisma) wins over the delete.
+
+        Returns:
+            dict: Number of courses "added" and "deleted".
+        """
+        deleted_at = {}
+        async for tombstone in self.tombstones.find({}, batch_size=self.batch_size):
+            deleted_at[str(tombstone["_id"])] = tombstone["deletedAt"]
+        added = 0
+        projection = {**{field: 1 for field in COURSE_FIELD_MAP}, "updatedAt": 1}
+        async for document in self.courses.find({}, projection, batch_size=self.batch_size):
+            document_id = str(document["_id"])
+            if document_id in deleted_at:
+                updated_at = document.get("updatedAt")
+                if updated_at is None or updated_at <= deleted_at[document_id]:
+                    continue
+                del deleted_at[document_id]
+            recommender.add_course(*course_from_document(document))
+            added += 1
+        deleted = sum(recommender.delete_course(parse_course_id(course_id)) for course_id in deleted_at)
+        return {"added": added, "deleted": deleted}
@@ -0,0 +1,156 @@
+# feedback_repository.py
+from typing import AsyncIterator, List
+from pymongo import ASCENDING, DESCENDING
+
+FEEDBACK_COLLECTION = "Feedback"
+
+# Free-text feedback fields that are summarized and scored for sentiment
+FEEDBACK_TEXT_FIELDS = [
+    "overallWorkLifeBalance",
+    "teamWorkingRelationship",
+    "enjoymentOfWork",
+    "collaborationChallenges",
+    "workRelatedStressors",
+]
+
+# Rating questions of the feedback form, options from best to worst. An answer scores
+# len(options) - its position, so 5 is the best answer on a five-point scale.
+RATING_SCALES = {
+    "workSatisfaction": ["Very satisfied", "Satisfied", "Neutral", "Dissatisfied", "Very dissatisfied"],
+    "workLifeBalance": ["Very well balanced", "Mostly balanced", "Neutral", "Not very balanced", "Poorly balanced"],
+    "workSupport": ["Very well supported", "Supported", "Neutral", "Not very supported", "Not supported at all"],
+    "interDepartmentCommunication": ["Very effective", "Effective", "Neutral", "Ineffective", "Very ineffective"],
+    "workRecognition": ["Extremely valued", "Valued", "Neutral", "Not very valued", "Not valued at all"],
+    "toolsSatisfaction": ["Very satisfied", "Satisfied", "Neutral", "Dissatisfied", "Very dissatisfied"],
+    "cultureAlignment": ["Very well aligned", "Somewhat aligned", "Neutral", "Not aligned", "Completely misaligned"],
+    "careerGrowthSatisfaction": ["Very satisfied", "Satisfied", "Neutral", "Dissatisfied", "Very dissatisfied"],
+    "developmentOpportunities": ["Very often", "Occasionally", "Rarely", "Never"],
+    "recognitionSatisfaction": ["Very satisfied", "Satisfied", "Neutral", "Dissatisfied", "Very dissatisfied"],
+    "recommendCompany": ["Extremely likely", "Likely", "Neutral", "Unlikely", "Extremely unlikely"],
+}
+
+# Multiple-choice questions without an order; only their answer counts are reported
+CHOICE_FIELDS = ["trainingPreference", "learningPreference", "weakestSkill", "feedbackFrequency"]
+
+# Compound indexes the feedback reads rely on, as (keys, options)
+FEEDBACK_INDEXES = [
+    ([("teamNumber", ASCENDING), ("createdAt", DESCENDING)], {"name": "teamNumber_createdAt"}),
+]
+
+
+def rating_score(field: str, answer: str):
+    """Score of a rating answer (len(options) for the best answer, 1 for the worst), or None."""
+    options = RATING_SCALES.get(field)
+    if not options or answer not in options:
+        return None
+    return len(options) - options.index(answer)
+
+
+class FeedbackRepository:
+    """Reads of the Feedback collection used by the manager dashboard.
+
+    Reads are projected to the fields they use, streamed from the cursor in batches of
+    `batch_size` documents, and counts and survey statistics are computed by MongoDB
+    aggregation pipelines, so memory does not grow with the size of a team.
+    `collection` is a motor (asyncio) collection.
+    """
+
+    def __init__(self, collection, batch_size: int = 500):
+        self.collection = collection
+        self.batch_size = batch_size
+
+    async def ensure_indexes(self):
+        """Create the indexes the reads rely on. Existing indexes are left as they are."""
+        for keys, options in FEEDBACK_INDEXES:
+            await self.collection.create_index(keys, **options)
+
+    async def count_team_feedback(self, team_number: int) -> int:
+        return await self.collection.count_documents({"teamNumber": team_number})
+
+    async def latest_team_feedback_at(self, team_number: int):
+        """createdAt of the team's newest feedback, or None if it has none."""
+        latest = await self.collection.find_one(
+            {"teamNumber": team_number}, {"createdAt": 1}, sort=[("createdAt", DESCENDING)]
+        )
+        return latest.get("createdAt") if latest is not None else None
+
+    async def get_feedback(self, feedback_id: str, fields: List[str]) -> dict:
+        return await self.collection.find_one({"_id": feedback_id}, {field: 1 for field in fields})
+
+    async def iter_team_feedback(self, team_number: int, fields: List[str]) -> AsyncIterator[List[dict]]:
+        """Yield a team's feedback, oldest first, in lists of at most batch_size documents.
+
+        Args:
+            team_number (int): The team whose feedback is read.
+            fields (List[str]): Fields to read; `_id` is always included.
+
+        Yields:
+            List[dict]: The next documents, holding only `fields` and `_id`.
+        """
+        cursor = self.collection.find(
+            {"teamNumber": team_number},
+            {field: 1 for field in fields},
+            batch_size=self.batch_size,
+        ).sort("createdAt", ASCENDING)
+        batch = []
+        async for document in cursor:
+            batch.append(document)
+            if len(batch) == self.batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    async def team_feedback_stats(self, team_number: int) -> dict:
+        """Count a team's feedback and summarize its survey answers in one aggregation.
+
+        Returns:
+            dict: `total_count`; `response_counts`, the number of non-empty answers per
+            free-text field; and `survey`, per survey question the answer counts and,
+            for rating questions, the number of scored answers and their average score.
+        """
+        survey_fields = list(RATING_SCALES) + CHOICE_FIELDS
+        pipeline = [
+            {"$match": {"teamNumber": team_number}},
+            {"$facet": {
+                "totals": [{"$group": {
+                    "_id": None,
+                    "total": {"$sum": 1},
+                    **{
+                        field: {"$sum": {"$cond": [{"$gt": [{"$strLenCP": {"$ifNull": [f"${field}", ""]}}, 0]}, 1, 0]}}
+                        for field in FEEDBACK_TEXT_FIELDS
+                    },
+                }}],
+                "answers": [
+                    {"$project": {"_id": 0, "answer": {"$objectToArray": {field: f"${field}" for field in survey_fields}}}},
+                    {"$unwind": "$answer"},
+                    {"$match": {"answer.v": {"$nin": [None, ""]}}},
+                    {"$group": {"_id": {"field": "$answer.k", "value": "$answer.v"}, "count": {"$sum": 1}}},
+                ],
+            }},
+        ]
+        results = await self.collection.aggregate(pipeline).to_list(length=1)
+        result = results[0] if results else {"totals": [], "answers": []}
+
+        totals = result["totals"][0] if result["totals"] else {}
+        survey = {field: {"counts": {}} for field in survey_fields}
+        for answer in result["answers"]:
+            survey[answer["_id"]["field"]]["counts"][answer["_id"]["value"]] = answer["count"]
+        for field, options in RATING_SCALES.items():
+            scored = {
+                rating_score(field, value): count
+                for value, count in survey[field]["counts"].items()
+                if rating_score(field, value) is not None
+            }
+            answered = sum(scored.values())
+            survey[field]["answered"] = answered
+            survey[field]["scale"] = len(options)
+            survey[field]["average"] = (
+                sum(score * count for score, count in scored.items()) / answered if answered else None
+            )
+
+        return {
+            "total_count": totals.get("total", 0),
+            "response_counts": {field: totals.get(field, 0) for field in FEEDBACK_TEXT_FIELDS},
+            "survey": survey,
+        }
@@ -1,31 +1,145 @@
 # summarizer.py
 
 import os
-from openai import OpenAI
+import time
+import asyncio
+from dataclasses import replace
+from functools import lru_cache
 from dotenv import load_dotenv
 
 # Load environment variables from .env file
 load_dotenv()
 
-from typing import List, Dict
+from typing import AsyncIterator, List, Dict, Tuple, Union
 import openai
+from llm_client import LLMClient, LLMSettings, get_llm_client
+
+try:
+    from .report_cache import ReportCache, report_cache_key
+except ImportError:
+    from report_cache import ReportCache, report_cache_key
+
+try:
+    import tiktoken
+except ImportError:  # tiktoken is optional; fall back to estimating four characters per token
+    tiktoken = None
+
+MODEL = "gpt-4o-mini"
+# Bump when the report prompts change, so cached reports written from the old prompts are not served
+PROMPT_TEMPLATE_VERSION = 1
+REPORT_MODES = ("auto", "single", "hierarchical")
+# Auto mode summarizes hierarchically once the single report prompt would exceed this many tokens
+SINGLE_PROMPT_TOKENS = 12000
+# Tokens of responses (or partial summaries) given to each map and merge call
+BATCH_TOKENS = 4000
+PARTIAL_SUMMARY_MAX_TOKENS = 600
+# Map and merge calls of one report in flight at once
+MAX_CONCURRENCY = 4
+
+SYSTEM_MESSAGE = {"role": "system", "content": "You are a helpful assistant that summarizes employee feedback and provides recommendations."}
+
+PARTIAL_SUMMARY_FORMAT = """
+          The JSON format returned should be strictly as follows, with each point followed by the number of employees who raised it:
+
+          {
+              "positive_points_employee_wellbeing": ["Supportive managers (3)"],
+              "negative_points_employee_wellbeing": ["High workload (5)"],
+              "positive_points_work_environment": ["Good work resources (2)"],
+              "negative_points_work_environment": ["Long meetings (1)"],
+              "actionable_suggestions_for_improvement": ["Flexible hours (4)"]
+          }
+          """
+
+
+@lru_cache(maxsize=None)
+def _encoding():
+    try:
+        return tiktoken.encoding_for_model(MODEL)
+    except KeyError:
+        return tiktoken.get_encoding("o200k_base")
+
+
+def count_tokens(text: str) -> int:
+    """Number of tokens the model sees for `text` (estimated when tiktoken is not installed)."""
+    if tiktoken is not None:
+        return len(_encoding().encode(text))
+    return len(text) // 4 + 1
+
+
+def truncate_tokens(text: str, max_tokens: int) -> str:
+    """Cut `text` to at most `max_tokens` tokens."""
+    if tiktoken is not None:
+        tokens = _encoding().encode(text)
+        return text if len(tokens) <= max_tokens else _encoding().decode(tokens[:max_tokens])
+    return text[:max_tokens * 4]
+
+
+def pack_batches(items: List[Tuple[int, object]], max_tokens: int, min_items: int = 1) -> List[list]:
+    """
+    Group items, in order, into batches of at most `max_tokens` tokens.
+
+    Args:
+        items (List[Tuple[int, object]]): (token count, item) pairs.
+        max_tokens (int): Token budget of a batch; a batch goes over it only to hold `min_items` items.
+        min_items (int, optional): Least number of items per batch, except the last. Defaults to 1.
+
+    Returns:
+        List[list]: The batches of items.
+    """
+    batches, batch, used = [], [], 0
+    for tokens, item in items:
+        if batch and used + tokens > max_tokens and len(batch) >= min_items:
+            batches.append(batch)
+            batch, used = [], 0
+        batch.append(item)
+        used += tokens
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+def format_feedback(feedback_summary: Dict[str, Union[str, List[str]]]) -> str:
+    # One section of responses per feedback field
+    text = ""
+    for section, responses in feedback_summary.items():
+        if not isinstance(responses, str):
+            responses = "\n".join(responses)
+        text += f"{section.capitalize()} Feedback:\n{responses}\n\n"
+    return text
+
 
 class GPT:
-    def __init__(self, openai_api_key: str):
-        self.client = OpenAI(
-            # This is the default and can be omitted
-            api_key=openai_api_key,
-        )
+    def __init__(self, openai_api_key: str = None, llm: LLMClient = None, report_mode: str = "auto",
+                 single_prompt_tokens: int = SINGLE_PROMPT_TOKENS, batch_tokens: int = BATCH_TOKENS,
+                 max_concurrency: int = MAX_CONCURRENCY, cache: ReportCache = None):
+        if report_mode not in REPORT_MODES:
+            raise ValueError(f"report_mode must be one of {REPORT_MODES}, got {report_mode!r}")
+        # Prefer the app's shared client (see resources.py), so requests reuse its connection pool
+        # and share its concurrency limit
+        if llm is None:
+            llm = LLMClient(replace(LLMSettings.from_env(), api_key=openai_api_key)) if openai_api_key else get_llm_client()
+        self.llm = llm
+        self.report_mode = report_mode
+        self.single_prompt_tokens = single_prompt_tokens
+        self.batch_tokens = batch_tokens
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+        self.cache = cache
+        # Stages, timings and token counts of the last report generated
+        self.summarization_stats = None
+        # Whether the last report was served from the cache, and its age in seconds
+        self.cache_status = {"cached": False, "cache_age_seconds": 0.0}
 
-    def generate_manager_report(self, feedback_summary: Dict[str, str]) -> str:
+    def build_manager_report_messages(self, feedback_summary: Dict[str, Union[str, List[str]]],
+                                      partial_summaries: List[str] = None) -> List[Dict[str, str]]:
         """
-        Generate a report for managers summarizing employee feedback on well-being and work satisfaction.
-        
+        Build the chat messages asking for a manager report on the given feedback.
+
         Args:
-            feedback_summary (Dict[str, str]): A dictionary where keys are feedback categories and values are concatenated responses.
-        
+            feedback_summary (Dict[str, Union[str, List[str]]]): A dictionary where keys are feedback categories and values are the responses, as a list or concatenated.
+            partial_summaries (List[str], optional): Summaries of batches of the feedback, given in place of the responses when summarizing hierarchically.
+
         Returns:
-            str: A comprehensive report for managers, summarizing the feedback and providing recommendations.
+            List[Dict[str, str]]: The system and user messages for the chat completion.
         """
         # Prepare a detailed prompt for ChatGPT to generate the report
         prompt = (
@@ -36,8 +150,12 @@ class GPT:
             "managers can address the concerns raised by employees, supporting both their personal and professional development.\n\n"
         )
 
-        for section, responses in feedback_summary.items():
-            prompt += f"{section.capitalize()} Feedback:\n{responses}\n\n"
+        if partial_summaries is None:
+            prompt += format_feedback(feedback_summary)
+        else:
+            prompt += "The feedback was summarized in batches of responses; the number after each point is how many employees raised it.\n\n"
+            for number, partial in enumerate(partial_summaries, 1):
+                prompt += f"Feedback Summary {number}:\n{partial}\n\n"
 
         prompt += "Generate a summary in JSON format highlighting positive and negative points, and recommend steps the company can take to improve employee well-being and work satisfaction. /n"
         prompt += """
@@ -65,28 +183,233 @@ class GPT:
           }
           """
 
-        print(prompt)
 
+        return [SYSTEM_MESSAGE, {"role": "user", "content": prompt}]
+
+    def build_partial_summary_messages(self, feedback_summary: Dict[str, List[str]] = None,
+                                       partial_summaries: List[str] = None) -> List[Dict[str, str]]:
+        """
+        Build the chat messages summarizing one batch of responses (map stage), or merging
+        summaries of several batches into one (reduce stage).
+        """
+        prompt = "You are an assistant that only speaks JSON. Do not write normal text. "
+        if partial_summaries is None:
+            prompt += "Summarize the following employee feedback, grouping responses that make the same point.\n\n"
+            prompt += format_feedback(feedback_summary)
+        else:
+            prompt += ("Merge the following summaries of employee feedback into one. Combine points that are the same "
+                       "and add up the number of employees who raised them.\n\n")
+            for number, partial in enumerate(partial_summaries, 1):
+                prompt += f"Feedback Summary {number}:\n{partial}\n\n"
+        prompt += PARTIAL_SUMMARY_FORMAT
+        return [SYSTEM_MESSAGE, {"role": "user", "content": prompt}]
+
+    def use_hierarchical(self, feedback_summary: Dict[str, Union[str, List[str]]]) -> bool:
+        if self.report_mode != "auto":
+            return self.report_mode == "hierarchical"
+        return count_tokens(format_feedback(feedback_summary)) > self.single_prompt_tokens
+
+    def report_cache_key(self, feedback_summary: Dict[str, Union[str, List[str]]]) -> str:
+        # Hierarchical reports also depend on how the responses are batched
+        summarizer = f"hierarchical,batch_tokens={self.batch_tokens}" if self.use_hierarchical(feedback_summary) else "single"
+        return report_cache_key(format_feedback(feedback_summary), MODEL, PROMPT_TEMPLATE_VERSION, summarizer)
+
+    async def _cached_report(self, key: str) -> dict:
+        # A failing cache only costs the OpenAI call it would have saved
+        self.cache_status = {"cached": False, "cache_age_seconds": 0.0}
+        if self.cache is None:
+            return None
         try:
-            # OpenAI API call to generate the report
-            response = self.client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=[
-                    {"role": "system", "content": "You are a helpful assistant that summarizes employee feedback and provides recommendations."},
-                    {"role": "user", "content": prompt}
-                ],
-                max_tokens=1200,  # Increase max tokens for a detailed report
+            entry = await self.cache.get(key)
+        except Exception as e:
+            print("Error reading the report cache:", e)
+            return None
+        if entry is not None:
+            self.summarization_stats = entry["summarization"]
+            self.cache_status = {"cached": True, "cache_age_seconds": self.cache.age_seconds(entry)}
+        return entry
+
+    async def _cache_report(self, key: str, report: str):
+        if self.cache is None:
+            return
+        try:
+            await self.cache.set(key, report, self.summarization_stats)
+        except Exception as e:
+            print("Error writing the report cache:", e)
+
+    async def _complete(self, messages: List[Dict[str, str]], max_tokens: int, stage: dict) -> str:
+        # One chat completion of a stage, counted in its stats
+        async with self.semaphore:
+            response = await self.llm.chat(
+                model=MODEL,
+                messages=messages,
+                max_tokens=max_tokens,
                 temperature=0
             )
-            
-            # Extract the report from the response
-            report = response.choices[0].message.content
-            return {'manager_report': report}
+        stage["calls"] += 1
+        if response.usage is not None:
+            stage["prompt_tokens"] += response.usage.prompt_tokens
+            stage["completion_tokens"] += response.usage.completion_tokens
+        return response.choices[0].message.content
+
+    def _start_stage(self, name: str) -> dict:
+        stage = {"stage": name, "calls": 0, "seconds": 0.0, "prompt_tokens": 0, "completion_tokens": 0}
+        self.summarization_stats["stages"].append(stage)
+        return stage
+
+    async def summarize_partials(self, feedback_summary: Dict[str, Union[str, List[str]]]) -> List[str]:
+        """
+        Map and reduce stages of hierarchical summarization.
+
+        Responses are packed into batches of about `batch_tokens` tokens and each batch is
+        summarized, `max_concurrency` calls at a time. The batch summaries are then merged
+        in groups, in rounds, until they fit in one batch.
+
+        Args:
+            feedback_summary (Dict[str, Union[str, List[str]]]): Responses per feedback category.
+
+        Returns:
+            List[str]: Partial summaries (JSON) covering all of the responses.
+        """
+        responses = []
+        for section, texts in feedback_summary.items():
+            if isinstance(texts, str):
+                texts = texts.split("\n")
+            for text in texts:
+                if text:
+                    text = truncate_tokens(text, self.batch_tokens)
+                    responses.append((count_tokens(text), (section, text)))
+
+        stage = self._start_stage("map")
+        start = time.perf_counter()
+        batches = pack_batches(responses, self.batch_tokens)
+        stage["batches"] = len(batches)
+
+        def batch_summary(batch):
+            grouped = {}
+            for section, text in batch:
+                grouped.setdefault(section, []).append(text)
+            return grouped
+
+        partials = await asyncio.gather(*(
+            self._complete(self.build_partial_summary_messages(batch_summary(batch)), PARTIAL_SUMMARY_MAX_TOKENS, stage)
+            for batch in batches
+        ))
+        stage["seconds"] = time.perf_counter() - start
+
+        stage = self._start_stage("reduce")
+        stage["rounds"] = 0
+        start = time.perf_counter()
+        # Groups hold at least two summaries, so every round shrinks the list
+        while len(partials) > 1 and count_tokens("\n\n".join(partials)) > self.batch_tokens:
+            groups = pack_batches([(count_tokens(partial), partial) for partial in partials], self.batch_tokens, min_items=2)
+            partials = await asyncio.gather(*(
+                self._complete(self.build_partial_summary_messages(partial_summaries=group), PARTIAL_SUMMARY_MAX_TOKENS, stage)
+                if len(group) > 1 else asyncio.sleep(0, group[0])
+                for group in groups
+            ))
+            stage["rounds"] += 1
+        stage["seconds"] = time.perf_counter() - start
+        return list(partials)
+
+    async def _report_messages(self, feedback_summary: Dict[str, Union[str, List[str]]]) -> List[Dict[str, str]]:
+        # Messages of the final report call, after the map and reduce stages when summarizing hierarchically
+        hierarchical = self.use_hierarchical(feedback_summary)
+        self.summarization_stats = {"mode": "hierarchical" if hierarchical else "single", "stages": []}
+        if not hierarchical:
+            return self.build_manager_report_messages(feedback_summary)
+        partials = await self.summarize_partials(feedback_summary)
+        return self.build_manager_report_messages(feedback_summary, partial_summaries=partials)
+
+    def _finish_stats(self, start: float):
+        stats = self.summarization_stats
+        stats["seconds"] = time.perf_counter() - start
+        stats["prompt_tokens"] = sum(stage["prompt_tokens"] for stage in stats["stages"])
+        stats["completion_tokens"] = sum(stage["completion_tokens"] for stage in stats["stages"])
+
+    async def generate_manager_report(self, feedback_summary: Dict[str, Union[str, List[str]]]) -> str:
+        """
+        Generate a report for managers summarizing employee feedback on well-being and work satisfaction.
+
+        Large feedback is summarized hierarchically (see summarize_partials) so the report
+        prompt stays within budget; `report_mode` forces one way or the other. With a
+        `cache`, a report already written from the same feedback is returned without
+        calling OpenAI.
+
+        Args:
+            feedback_summary (Dict[str, Union[str, List[str]]]): A dictionary where keys are feedback categories and values are the responses, as a list or concatenated.
+
+        Returns:
+            str: A comprehensive report for managers, summarizing the feedback and providing recommendations,
+            with the stages, timings and token counts of its generation under 'summarization', and
+            whether it came from the cache and its age in seconds under 'cached' and 'cache_age_seconds'.
+        """
+        try:
+            key = self.report_cache_key(feedback_summary)
+            entry = await self._cached_report(key)
+            if entry is not None:
+                return {'manager_report': entry["report"], 'summarization': self.summarization_stats, **self.cache_status}
+
+            start = time.perf_counter()
+            messages = await self._report_messages(feedback_summary)
+
+            # OpenAI API call to generate the report
+            stage = self._start_stage("report")
+            stage_start = time.perf_counter()
+            report = await self._complete(messages, 1200, stage)  # Increase max tokens for a detailed report
+            stage["seconds"] = time.perf_counter() - stage_start
+            self._finish_stats(start)
+            await self._cache_report(key, report)
+
+            return {'manager_report': report, 'summarization': self.summarization_stats, **self.cache_status}
 
         except Exception as e:
             print("Error calling OpenAI API:", e)
             return "An error occurred while generating the report."
 
+    async def stream_manager_report(self, feedback_summary: Dict[str, Union[str, List[str]]]) -> AsyncIterator[str]:
+        """
+        Generate the same report as generate_manager_report, yielding its text as the model streams it.
+        Hierarchical map and reduce stages run to completion before the report starts streaming;
+        a cached report is yielded whole.
+
+        Args:
+            feedback_summary (Dict[str, Union[str, List[str]]]): A dictionary where keys are feedback categories and values are the responses, as a list or concatenated.
+
+        Yields:
+            str: The next piece of the report.
+        """
+        key = self.report_cache_key(feedback_summary)
+        entry = await self._cached_report(key)
+        if entry is not None:
+            yield entry["report"]
+            return
+
+        start = time.perf_counter()
+        messages = await self._report_messages(feedback_summary)
+        stage = self._start_stage("report")
+        stage_start = time.perf_counter()
+        # Holds an LLMClient slot and its deadline until the last chunk
+        stream = self.llm.stream_chat(
+            model=MODEL,
+            messages=messages,
+            max_tokens=1200,
+            temperature=0,
+            stream_options={"include_usage": True}
+        )
+        stage["calls"] += 1
+        report = []
+        async for chunk in stream:
+            if chunk.usage is not None:
+                stage["prompt_tokens"] += chunk.usage.prompt_tokens
+                stage["completion_tokens"] += chunk.usage.completion_tokens
+            if chunk.choices and chunk.choices[0].delta.content:
+                report.append(chunk.choices[0].delta.content)
+                yield chunk.choices[0].delta.content
+        stage["seconds"] = time.perf_counter() - stage_start
+        self._finish_stats(start)
+        await self._cache_report(key, "".join(report))
+
 # Example usage:
 # feedback_summary = {
 #     "overallWorkLifeBalance": "Great work-life balance but sometimes long hours...",
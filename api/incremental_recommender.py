@@ -0,0 +1,293 @@
+# incremental_recommender.py
+import threading
+import numpy as np
+import pandas as pd
+from scipy.sparse import csr_matrix, vstack
+from sklearn.feature_extraction.text import CountVectorizer
+from sklearn.preprocessing import normalize
+
+try:
+    from .course_recommender import CATALOG_COLUMNS
+    from .inverted_index import InvertedIndex, select_top_k
+except ImportError:
+    from course_recommender import CATALOG_COLUMNS
+    from inverted_index import InvertedIndex, select_top_k
+
+
+class IncrementalCourseRecommender:
+    """Course recommender whose catalog can change at runtime without refitting.
+
+    The catalog is split into a compacted segment, scored through an inverted index,
+    and a small delta of rows added since the last compaction, scored directly.
+    Deleted courses are only marked with a tombstone. Term document frequencies are
+    maintained on every change, and new terms extend the vocabulary. Compaction
+    drops tombstoned rows, folds the delta into the compacted segment and re-weights
+    every row with fresh IDF values. It runs in a background thread once enough
+    changes have piled up, so a single add, update or delete only costs work
+    proportional to that course.
+    """
+
+    def __init__(self, base, compact_threshold=0.1, min_compact_changes=100):
+        """
+        Args:
+            base (CourseRecommender): Fitted recommender providing the initial catalog and vocabulary.
+            compact_threshold (float): Fraction of changed rows (delta + tombstones) that triggers compaction.
+            min_compact_changes (int): Never compact for fewer changes than this.
+        """
+        self._lock = threading.RLock()
+        self._compacting = None
+        self._pending_ops = None
+        self.compact_threshold = compact_threshold
+        self.min_compact_changes = min_compact_changes
+        self.base_version = base.version
+        self._generation = 0
+
+        self._analyzer = base.vectorizer.build_analyzer()
+        self._vocabulary = dict(base.vectorizer.vocabulary_)
+        # Raw term counts of the compacted rows, recovered once from the stored titles
+        counter = CountVectorizer(analyzer=self._analyzer, vocabulary=self._vocabulary)
+        counts = counter.transform(np.asarray(base.catalog['course_title']))
+
+        self._catalog = {col: list(base.catalog[col]) for col in CATALOG_COLUMNS}
+        self._ids = list(base.course_ids.tolist())
+        self._row_of = {course_id: row for row, course_id in enumerate(self._ids)}
+        self._alive = np.ones(len(self._ids), dtype=bool)
+        self._n_alive = len(self._ids)
+        self._doc_freq = np.bincount(counts.indices, minlength=len(self._vocabulary)).astype(np.int64)
+        self._install_segment(counts)
+
+    @property
+    def version(self):
+        return f"{self.base_version}+{self._generation}"
+
+    def __len__(self):
+        return self._n_alive
+
+    def __contains__(self, course_id):
+        return course_id in self._row_of
+
+    # Segment management
+
+    def _compute_idf(self, doc_freq, n_docs):
+        # Same smoothing as TfidfVectorizer(smooth_idf=True)
+        return np.log((1 + n_docs) / (1 + doc_freq)) + 1
+
+    def _install_segment(self, counts):
+        self._counts = counts.tocsr()
+        self._idf = self._compute_idf(self._doc_freq, self._n_alive)
+        vectors = normalize(self._counts.multiply(self._idf[:self._counts.shape[1]]).tocsr())
+        self._index = InvertedIndex.from_vectors(vectors)
+        self._segment_rows = self._counts.shape[0]
+        self._delta = []  # (term ids, counts) of rows appended after the segment
+        self._delta_vectors = None
+
+    def _term_counts(self, title, grow):
+        counts = {}
+        for token in self._analyzer(title):
+            term = self._vocabulary.get(token)
+            if term is None:
+                if not grow:
+                    continue
+                term = len(self._vocabulary)
+                self._vocabulary[token] = term
+            counts[term] = counts.get(term, 0) + 1
+        terms = np.fromiter(counts.keys(), dtype=np.int64, count=len(counts))
+        return terms, np.fromiter(counts.values(), dtype=np.float64, count=len(counts))
+
+    def _weights(self, terms):
+        if len(self._idf) < len(self._vocabulary):
+            # Terms first seen since the last compaction get an IDF from the current document frequencies
+            grown = self._compute_idf(self._doc_freq[len(self._idf):], self._n_alive)
+            self._idf = np.concatenate([self._idf, grown])
+        return self._idf[terms]
+
+    def _vectorize(self, terms, counts):
+        values = counts * self._weights(terms)
+        norm = np.sqrt(np.dot(values, values))
+        return values / norm if norm > 0 else values
+
+    def _delta_matrix(self):
+        if self._delta_vectors is None:
+            indptr = np.zeros(len(self._delta) + 1, dtype=np.int64)
+            indptr[1:] = np.cumsum([len(terms) for terms, _ in self._delta])
+            indices = np.concatenate([terms for terms, _ in self._delta]) if self._delta else np.empty(0, dtype=np.int64)
+            data = np.concatenate([self._vectorize(terms, counts) for terms, counts in self._delta]) if self._delta else np.empty(0)
+            self._delta_vectors = csr_matrix((data, indices, indptr), shape=(len(self._delta), len(self._vocabulary)))
+        return self._delta_vectors
+
+    # Mutations
+
+    def add_course(self, course_id, course):
+        """Add a course, or replace it if `course_id` already exists.
+
+        Args:
+            course_id: Identifier returned as course_id in recommendations.
+            course (dict): Values for every column in CATALOG_COLUMNS.
+        """
+        with self._lock:
+            if course_id in self._row_of:
+                self._delete(course_id)
+            terms, counts = self._term_counts(course['course_title'], grow=True)
+            if len(self._doc_freq) < len(self._vocabulary):
+                self._doc_freq = np.concatenate([self._doc_freq, np.zeros(len(self._vocabulary) - len(self._doc_freq), dtype=np.int64)])
+            self._doc_freq[terms] += 1
+
+            row = len(self._ids)
+            self._ids.append(course_id)
+            self._row_of[course_id] = row
+            for col in CATALOG_COLUMNS:
+                self._catalog[col].append(course[col])
+            if row >= len(self._alive):
+                # Grow geometrically so appends stay amortized O(1)
+                self._alive = np.concatenate([self._alive, np.zeros(max(len(self._alive), 16), dtype=bool)])
+            self._alive[row] = True
+            self._n_alive += 1
+            self._delta.append((terms, counts))
+            self._delta_vectors = None
+            self._changed(('add', course_id, course))
+
+    update_course = add_course
+
+    def delete_course(self, course_id):
+        """Tombstone a course. Returns False if it does not exist."""
+        with self._lock:
+            if course_id not in self._row_of:
+                return False
+            self._delete(course_id)
+            self._changed(('delete', course_id))
+            return True
+
+    def _delete(self, course_id):
+        row = self._row_of.pop(course_id)
+        self._alive[row] = False
+        self._n_alive -= 1
+        if row < self._segment_rows:
+            start, end = self._counts.indptr[row], self._counts.indptr[row + 1]
+            terms = self._counts.indices[start:end]
+        else:
+            terms = self._delta[row - self._segment_rows][0]
+        self._doc_freq[terms] -= 1
+
+    def _changed(self, op):
+        self._generation += 1
+        if self._pending_ops is not None:
+            self._pending_ops.append(op)
+        changes = len(self._delta) + (self._segment_rows - int(self._alive[:self._segment_rows].sum()))
+        if changes >= max(self.min_compact_changes, self.compact_threshold * max(self._n_alive, 1)):
+            self.compact(background=True)
+
+    # Compaction
+
+    def compact(self, background=False):
+        """Fold the delta into the compacted segment, drop tombstones and re-weight IDF.
+
+        With `background=True` the work runs in a daemon thread; changes made while it
+        runs are replayed onto the compacted state before it is swapped in. Only one
+        compaction runs at a time: a call made while one is running waits for it
+        (or, in the background, returns its thread).
+        """
+        with self._lock:
+            if self._compacting is None or not self._compacting.is_alive():
+                self._pending_ops = []
+                # Cheap shallow copies under the lock; the per-row work happens outside it
+                snapshot = (
+                    self._alive[:len(self._ids)].copy(),
+                    list(self._ids),
+                    {col: list(values) for col, values in self._catalog.items()},
+                    self._counts,
+                    list(self._delta),
+                    len(self._vocabulary),
+                )
+                # Started under the lock, so a concurrent change never sees no compaction running and starts another
+                self._compacting = threading.Thread(target=self._finish_compaction, args=snapshot, daemon=True)
+                self._compacting.start()
+            compacting = self._compacting
+        if not background:
+            compacting.join()
+        return compacting
+
+    def _finish_compaction(self, alive, ids, catalog, counts, delta, n_terms):
+        rows = np.flatnonzero(alive)
+        ids = [ids[row] for row in rows]
+        catalog = {col: [values[row] for row in rows] for col, values in catalog.items()}
+        counts = counts.copy()
+        counts.resize((counts.shape[0], n_terms))
+        if delta:
+            indptr = np.concatenate([[0], np.cumsum([len(terms) for terms, _ in delta])])
+            delta_counts = csr_matrix(
+                (np.concatenate([c for _, c in delta]), np.concatenate([t for t, _ in delta]), indptr),
+                shape=(len(delta), n_terms),
+            )
+            counts = vstack([counts, delta_counts]).tocsr()
+        counts = counts[rows]
+        doc_freq = np.bincount(counts.indices, minlength=n_terms).astype(np.int64)
+
+        with self._lock:
+            pending, self._pending_ops = self._pending_ops, None
+            self._ids = ids
+            self._row_of = {course_id: row for row, course_id in enumerate(ids)}
+            self._catalog = catalog
+            self._alive = np.ones(len(ids), dtype=bool)
+            self._n_alive = len(ids)
+            self._doc_freq = np.concatenate([doc_freq, np.zeros(len(self._vocabulary) - n_terms, dtype=np.int64)])
+            self._install_segment(counts)
+            # Re-weighted IDF changes rankings, so results cached under the old version must not be served
+            self._generation += 1
+            # Replay changes that arrived while the new segment was being built
+            for op in pending:
+                if op[0] == 'add':
+                    self.add_course(op[1], op[2])
+                else:
+                    self.delete_course(op[1])
+
+    # Queries
+
+    def normalize_query(self, title):
+        with self._lock:
+            return tuple(sorted(token for token in self._analyzer(title) if token in self._vocabulary))
+
+    def recommend_columns(self, title, recomm_count=10):
+        """Top courses for `title` as plain Python column lists, best overall rating first."""
+        with self._lock:
+            terms, counts = self._term_counts(title, grow=False)
+            query = self._vectorize(terms, counts)
+
+            segment_query = terms < self._counts.shape[1]
+            query_vector = csr_matrix(
+                (query[segment_query], terms[segment_query], [0, int(segment_query.sum())]),
+                shape=(1, self._counts.shape[1]),
+            )
+            candidates, scores = self._index.score(query_vector)
+            if self._delta:
+                full_query = csr_matrix((query, terms, [0, len(terms)]), shape=(1, len(self._vocabulary)))
+                delta_scores = (self._delta_matrix() @ full_query.T).tocoo()
+                candidates = np.concatenate([candidates, delta_scores.row + self._segment_rows])
+                scores = np.concatenate([scores, delta_scores.data])
+
+            alive = self._alive[candidates]
+            candidates, scores = candidates[alive], scores[alive]
+            k = min(recomm_count, self._n_alive)
+            rows, _ = select_top_k(candidates, scores, k, len(candidates))
+            if len(rows) < k:
+                # Pad with zero-score courses in catalog order, skipping tombstones
+                padding = np.setdiff1d(np.flatnonzero(self._alive)[:k + len(rows)], rows)[:k - len(rows)]
+                rows = np.concatenate([rows, padding])
+
+            overall = self._catalog['overall_rating']
+            rows = sorted(rows.tolist(), key=lambda row: -overall[row])
+            columns = {'course_id': [self._ids[row] for row in rows]}
+            for col in CATALOG_COLUMNS:
+                values = self._catalog[col]
+                columns[col] = [values[row] for row in rows]
+        # Values seeded from the base catalog are NumPy scalars
+        return {col: [value.item() if isinstance(value, np.generic) else value for value in values] for col, values in columns.items()}
+
+    def recommend_batch_columns(self, titles, recomm_count=10):
+        return [self.recommend_columns(title, recomm_count) for title in titles]
+
+    def recommend(self, title, recomm_count=10):
+        columns = self.recommend_columns(title, recomm_count)
+        return pd.DataFrame({col: columns[col] for col in CATALOG_COLUMNS}, index=columns['course_id'])
+
+    def recommend_batch(self, titles, recomm_count=10):
+        return [self.recommend(title, recomm_count) for title in titles]
@@ -1,153 +1,543 @@
-from fastapi import FastAPI, HTTPException
+from contextlib import asynccontextmanager
+from fastapi import Depends, FastAPI, HTTPException
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
 # main.py
-from pydantic import BaseModel
-from pymongo import MongoClient
-from .analyzer import Analyzer
+from pydantic import BaseModel, Field
+from .inference_pool import InferencePool, InferenceQueueFull
 import os
+import json
 from dotenv import load_dotenv
 from .gpt import GPT
 from .course_recommender import CourseRecommender
+from .incremental_recommender import IncrementalCourseRecommender
+from .cache import TTLCache
+from .memory import memory_usage
+from .resources import Resources, Settings, get_db, get_llm, get_resources
+from .course_store import COURSE_COLLECTION, COURSE_FIELD_MAP, COURSE_TOMBSTONE_COLLECTION, CourseStore, parse_course_id
+from .sentiment_store import SENTIMENT_COLLECTION, SentimentStore, iter_response_sentiments
+from .feedback_repository import FEEDBACK_COLLECTION, FEEDBACK_TEXT_FIELDS, FeedbackRepository
+from .report_cache import REPORT_CACHE_COLLECTION, MemoryReportCacheBackend, MongoReportCacheBackend, ReportCache
+from .team_rollups import (
+    SURVEY_FIELDS,
+    TEAM_ROLLUP_APPLIED_COLLECTION,
+    TEAM_ROLLUP_COLLECTION,
+    TeamRollupStore,
+    empty_sentiment_counts,
+    rebuild_team_rollup,
+    rollup_summary,
+)
+from .precompute import (
+    RECOMMENDATIONS_COLLECTION,
+    USER_PROFILE_FIELDS,
+    build_user_keywords,
+    is_fresh,
+    recommendation_document,
+)
+from .serialization import (
+    BatchRecommendationsResponse,
+    FastJSONResponse,
+    RecommendationsResponse,
+    columns_to_records,
+)
 import uvicorn
-from typing import List
+from typing import List, Literal
 
 # Load environment variables from .env file
 load_dotenv()
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Database and OpenAI clients shared by every request; opened per process, so
+    # workers forked by serve.py each open their own connection pools
+    resources = Resources(Settings.from_env())
+    app.state.resources = resources
+    try:
+        await get_feedback_repository(resources.db).ensure_indexes()
+    except Exception as e:
+        # Reads still work without the indexes, only slower; don't keep the API from starting
+        print("Error creating Feedback indexes:", e)
+    if REPORT_CACHE_BACKEND == "mongo":
+        try:
+            await MongoReportCacheBackend(resources.db[REPORT_CACHE_COLLECTION]).ensure_indexes()
+        except Exception as e:
+            print("Error creating report cache indexes:", e)
+    if isinstance(model, IncrementalCourseRecommender):
+        # Courses added, updated or deleted at runtime live in the database, not the artifact
+        replayed = await get_course_store(resources.db).replay(model)
+        print("Replayed persisted course changes:", replayed)
+    # Load the model in every inference worker before the first request needs it
+    await inference_pool.start()
+    try:
+        yield
+    finally:
+        inference_pool.shutdown()
+        await resources.close()
+
 ### Create FastAPI instance with custom docs and openapi url
-app = FastAPI(docs_url="/api/docs", openapi_url="/api/openapi.json")
+app = FastAPI(docs_url="/api/docs", openapi_url="/api/openapi.json", lifespan=lifespan)
 
 @app.get("/api/healthchecker")
 def healthchecker():
     return {"status": "success", "message": "Integrate FastAPI Framework with Next.js"}
 
-# MongoDB setup
-client = MongoClient(os.getenv("MONGO_URI"), tls=True,
-    tlsAllowInvalidCertificates=True)
-db = client["database"]
-feedback_collection = db["Feedback"]
+@app.get("/api/memoryUsage")
+def get_memory_usage():
+    return memory_usage()
+
+@app.get("/api/inferenceStats")
+def get_inference_stats():
+    return inference_pool.stats()
+
+@app.get("/api/llmStats")
+def get_llm_stats(resources: Resources = Depends(get_resources)):
+    return resources.llm.stats()
+
+# Documents per cursor batch when streaming a team's feedback
+FEEDBACK_CURSOR_BATCH_SIZE = int(os.getenv("FEEDBACK_CURSOR_BATCH_SIZE", "500"))
+
+# Request dependencies over the shared clients opened in lifespan()
+def get_feedback_repository(db=Depends(get_db)) -> FeedbackRepository:
+    return FeedbackRepository(db[FEEDBACK_COLLECTION], batch_size=FEEDBACK_CURSOR_BATCH_SIZE)
+
+def get_sentiment_store(db=Depends(get_db)) -> SentimentStore:
+    return SentimentStore(db[SENTIMENT_COLLECTION])
+
+def get_course_store(db=Depends(get_db)) -> CourseStore:
+    return CourseStore(db[COURSE_COLLECTION], db[COURSE_TOMBSTONE_COLLECTION])
+
+def get_team_rollups(db=Depends(get_db)) -> TeamRollupStore:
+    return TeamRollupStore(db[TEAM_ROLLUP_COLLECTION], db[TEAM_ROLLUP_APPLIED_COLLECTION])
+
+# Manager report cache: "mongo", "memory" (per process, for running without a database) or "off"
+REPORT_CACHE_BACKEND = os.getenv("MANAGER_REPORT_CACHE", "mongo")
+memory_report_cache = MemoryReportCacheBackend()
+
+def get_report_cache(db=Depends(get_db)) -> ReportCache:
+    if REPORT_CACHE_BACKEND == "off":
+        return None
+    backend = memory_report_cache if REPORT_CACHE_BACKEND == "memory" else MongoReportCacheBackend(db[REPORT_CACHE_COLLECTION])
+    return ReportCache(
+        backend,
+        ttl=float(os.getenv("MANAGER_REPORT_CACHE_TTL", "86400")),
+        max_entries=int(os.getenv("MANAGER_REPORT_CACHE_SIZE", "1000")),
+    )
+
+def get_gpt(llm=Depends(get_llm), report_cache=Depends(get_report_cache)) -> GPT:
+    return GPT(
+        llm=llm,
+        cache=report_cache,
+        report_mode=os.getenv("MANAGER_REPORT_MODE", "auto"),
+        single_prompt_tokens=int(os.getenv("MANAGER_REPORT_SINGLE_PROMPT_TOKENS", "12000")),
+        batch_tokens=int(os.getenv("MANAGER_REPORT_BATCH_TOKENS", "4000")),
+        max_concurrency=int(os.getenv("MANAGER_REPORT_CONCURRENCY", "4")),
+    )
 
-# Initialize the Analyzer model
-analyzer = Analyzer()
+# Sentiment inference runs in a process pool (SENTIMENT_WORKERS=0 runs it in a background thread)
+inference_pool = InferencePool(
+    workers=int(os.getenv("SENTIMENT_WORKERS", "1")),
+    max_queued_jobs=int(os.getenv("SENTIMENT_MAX_QUEUED_JOBS", "64")),
+    batch_size=int(os.getenv("SENTIMENT_BATCH_SIZE", "32")),
+    window_overlap=int(os.getenv("SENTIMENT_WINDOW_OVERLAP", "0")),
+    backend=os.getenv("SENTIMENT_BACKEND", "fp32"),
+    num_threads=int(os.getenv("SENTIMENT_THREADS", "0")) or None,
+    start_method=os.getenv("SENTIMENT_POOL_START_METHOD", "spawn"),
+)
+# Seconds a client is asked to wait when the inference queue is full
+INFERENCE_RETRY_AFTER = os.getenv("SENTIMENT_RETRY_AFTER", "5")
 
 class FeedbackRequest(BaseModel):
     teamNumber: int
 
+class FeedbackSentimentRequest(BaseModel):
+    feedbackId: str
+
 @app.post("/api/getFeedbackSummary")
-async def get_feedback_summary(request: FeedbackRequest): 
+async def get_feedback_summary(
+    request: FeedbackRequest,
+    feedback: FeedbackRepository = Depends(get_feedback_repository),
+    store: SentimentStore = Depends(get_sentiment_store),
+    rollups: TeamRollupStore = Depends(get_team_rollups),
+    gpt: GPT = Depends(get_gpt),
+):
     team_number = request.teamNumber
 
-    # Retrieve feedback items for the given teamNumber
-    feedback_items = feedback_collection.find({"teamNumber": team_number})
-    feedback_list = list(feedback_items)
-
-    # Initialize variables to store concatenated responses and sentiment counts
-    summary = {
-        "overallWorkLifeBalance": [],
-        "teamWorkingRelationship": [],
-        "enjoymentOfWork": [],
-        "collaborationChallenges": [],
-        "workRelatedStressors": []
-    }
-    sentiment_counts = {
-        field: {"positive": 0, "negative": 0, "neutral": 0}
-        for field in summary.keys()
+    # Counts come from the team's rollup; the team is only rescanned and scored if it is stale
+    rollup = rollup_summary(await get_team_rollup(team_number, feedback, store, rollups))
+
+    # Stream the team's responses in cursor batches for the GPT summary
+    summary = {field: [] for field in FEEDBACK_TEXT_FIELDS}
+    async for feedback_batch in feedback.iter_team_feedback(team_number, FEEDBACK_TEXT_FIELDS):
+        collect_feedback_responses(feedback_batch, summary)
+
+    # Generate the manager report with GPT
+    manager_report = await gpt.generate_manager_report(summary)
+
+    return {
+        "manager_report": manager_report,
+        "sentiment_counts": rollup["sentiment_counts"],
+        "total_count": rollup["total_count"]
     }
 
-    # Process each feedback item
-    for item in feedback_list:
+
+@app.post("/api/streamFeedbackSummary")
+async def stream_feedback_summary(
+    request: FeedbackRequest,
+    feedback: FeedbackRepository = Depends(get_feedback_repository),
+    store: SentimentStore = Depends(get_sentiment_store),
+    rollups: TeamRollupStore = Depends(get_team_rollups),
+    gpt: GPT = Depends(get_gpt),
+):
+    """
+    Streaming variant of /api/getFeedbackSummary, as server-sent events:
+
+    * `total`: {"total_count"} as soon as the feedback is counted;
+    * `sentiment_counts`: running {"sentiment_counts", "scored", "processed_count"}
+      as stored labels are read and each inference batch finishes, or once from the
+      team's rollup when it is fresh;
+    * `report_token`: {"token"} for each piece of the manager report as GPT streams it;
+    * `done`: the same body /api/getFeedbackSummary returns;
+    * `error`: {"detail"} (and "retry_after" when sentiment analysis is busy), after
+      which the stream ends.
+    """
+    team_number = request.teamNumber
+
+    async def events():
+        total_count = await feedback.count_team_feedback(team_number)
+        yield sse_event("total", {"total_count": total_count})
+
+        summary = {field: [] for field in FEEDBACK_TEXT_FIELDS}
+        sentiment_counts = empty_sentiment_counts()
+        processed_count = 0
+        scored = 0
+        latest_created_at = await feedback.latest_team_feedback_at(team_number)
+        rollup = await rollups.get_fresh(team_number, inference_pool.model_id, total_count, latest_created_at)
+        if rollup is not None:
+            sentiment_counts = rollup_summary(rollup)["sentiment_counts"]
+            yield sse_event("sentiment_counts", {
+                "sentiment_counts": sentiment_counts,
+                "scored": sum(sum(counts.values()) for counts in sentiment_counts.values()),
+                "processed_count": total_count,
+            })
+        try:
+            async for feedback_batch in feedback.iter_team_feedback(team_number, FEEDBACK_TEXT_FIELDS):
+                processed_count += len(feedback_batch)
+                responses = collect_feedback_responses(feedback_batch, summary)
+                if rollup is not None:
+                    continue
+                fields = {(feedback_id, field): field for feedback_id, field, _ in responses}
+                async for batch in iter_response_sentiments(responses, store, inference_pool):
+                    for key, label in batch.items():
+                        sentiment_counts[fields[key]][label] += 1
+                    scored += len(batch)
+                    yield sse_event("sentiment_counts", {
+                        "sentiment_counts": sentiment_counts,
+                        "scored": scored,
+                        "processed_count": processed_count,
+                    })
+        except InferenceQueueFull:
+            yield sse_event("error", {
+                "detail": "Sentiment analysis is busy, please retry shortly",
+                "retry_after": int(INFERENCE_RETRY_AFTER),
+            })
+            return
+
+        report = []
+        try:
+            async for token in gpt.stream_manager_report(summary):
+                report.append(token)
+                yield sse_event("report_token", {"token": token})
+        except Exception as e:
+            print("Error calling OpenAI API:", e)
+            yield sse_event("error", {"detail": "An error occurred while generating the report."})
+            return
+
+        yield sse_event("done", {
+            "manager_report": {"manager_report": "".join(report), "summarization": gpt.summarization_stats,
+                               **gpt.cache_status},
+            "sentiment_counts": sentiment_counts,
+            "total_count": processed_count,
+        })
+
+    # X-Accel-Buffering stops reverse proxies from holding events back
+    return StreamingResponse(events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
+@app.get("/api/teamRollup/{team_number}")
+async def get_team_rollup_summary(
+    team_number: int,
+    feedback: FeedbackRepository = Depends(get_feedback_repository),
+    store: SentimentStore = Depends(get_sentiment_store),
+    rollups: TeamRollupStore = Depends(get_team_rollups),
+):
+    """The team's feedback count, sentiment counts and survey statistics, from its rollup."""
+    return rollup_summary(await get_team_rollup(team_number, feedback, store, rollups))
+
+
+async def get_team_rollup(team_number: int, feedback: FeedbackRepository, store: SentimentStore,
+                          rollups: TeamRollupStore) -> dict:
+    """The team's rollup, rebuilt from its feedback first if it is missing or stale."""
+    feedback_count = await feedback.count_team_feedback(team_number)
+    latest_created_at = await feedback.latest_team_feedback_at(team_number)
+    rollup = await rollups.get_fresh(team_number, inference_pool.model_id, feedback_count, latest_created_at)
+    if rollup is None:
+        rollup = await rebuild_team_rollup(
+            team_number, feedback, rollups,
+            lambda responses: get_response_sentiments(responses, store),
+            inference_pool.model_id,
+        )
+    return rollup
+
+
+@app.get("/api/teamFeedbackStats/{team_number}")
+async def get_team_feedback_stats(team_number: int, feedback: FeedbackRepository = Depends(get_feedback_repository)):
+    """Feedback count, answers per free-text field and survey answer statistics of a team."""
+    return await feedback.team_feedback_stats(team_number)
+
+
+def sse_event(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def collect_feedback_responses(feedback_batch: list, summary: dict) -> list:
+    """
+    Append the text responses of feedback documents to `summary` (responses per field)
+    and return the (feedback id, field, text) triples to score for sentiment.
+    """
+    responses = []
+    for item in feedback_batch:
         for field in summary.keys():
             # Collect responses for the summary
             if field in item:
                 summary[field].append(item[field])
 
-            # Sentiment analysis for the field
             text = item.get(field, "")
-            if not text:
-                continue
-
-            chunks = chunk_text(text, 512)
-            positive_count = 0
-            negative_count = 0
-            neutral_count = 0
-
-            for chunk in chunks:
-                sentiment_label = analyzer.get_sentiment_score(chunk)
-                if sentiment_label == "positive":
-                    positive_count += 1
-                elif sentiment_label == "negative":
-                    negative_count += 1
-                else:
-                    neutral_count += 1
-
-            # Update overall sentiment counts for the field
-            sentiment = find_highest_sentiment(positive_count, negative_count, neutral_count)
-            sentiment_counts[field][sentiment] += 1
-
-    # Join responses for each field for the GPT summary generation
-    concatenated_summary = {
-        key: "\n".join(value) for key, value in summary.items()
-    }
+            if text:
+                responses.append((item["_id"], field, text))
+    return responses
 
-    # Generate the manager report with GPT
-    gpt = GPT(openai_api_key=os.getenv("OPENAI_API_KEY"))
-    manager_report = gpt.generate_manager_report(concatenated_summary)
 
-    return {
-        "manager_report": manager_report,
-        "sentiment_counts": sentiment_counts,
-        "total_count": len(feedback_list)
-    }
+@app.post("/api/scoreFeedbackSentiment")
+async def score_feedback_sentiment(
+    request: FeedbackSentimentRequest,
+    feedback: FeedbackRepository = Depends(get_feedback_repository),
+    store: SentimentStore = Depends(get_sentiment_store),
+    rollups: TeamRollupStore = Depends(get_team_rollups),
+):
+    """
+    Score a newly inserted feedback document so later summaries read stored labels,
+    and add it to its team's rollup.
+    """
+    item = await feedback.get_feedback(request.feedbackId, FEEDBACK_TEXT_FIELDS + SURVEY_FIELDS + ["teamNumber", "createdAt"])
+    if item is None:
+        raise HTTPException(status_code=404, detail="Feedback not found")
+    responses = [(item["_id"], field, item[field]) for field in FEEDBACK_TEXT_FIELDS if item.get(field)]
+    labels = await get_response_sentiments(responses, store)
+    sentiments = {field: label for (_, field), label in labels.items()}
+    rollup_updated = await rollups.apply_feedback(item, sentiments, inference_pool.model_id)
+    return {"sentiments": sentiments, "rollupUpdated": rollup_updated}
 
 
-def chunk_text(text: str, max_tokens: int) -> list:
+async def get_response_sentiments(responses: list, store: SentimentStore) -> dict:
     """
-    Split the input text into chunks with each chunk having a max length 
-    to ensure compatibility with the model's token limit.
+    Sentiment label per (feedback id, field). Labels persisted for the same text and
+    model are reused; only missing or stale responses go through the model, in one
+    batched pass, and are persisted for the next request.
+
+    Raises a 503 with Retry-After when the inference pool is saturated.
     """
-    words = text.split()
-    chunks = []
-
-    while words:
-        chunk = words[:max_tokens]
-        chunks.append(" ".join(chunk))
-        words = words[max_tokens:]
-
-    return chunks
-
-def find_highest_sentiment(positive: int, negative: int, neutral: int) -> str:
-    # Create a dictionary with the sentiment counts
-    sentiment_counts = {
-        "positive": positive,
-        "negative": negative,
-        "neutral": neutral
-    }
-    
-    # Find the sentiment with the maximum count
-    highest_sentiment = max(sentiment_counts, key=sentiment_counts.get)
-    
-    return highest_sentiment
+    labels = {}
+    try:
+        async for batch in iter_response_sentiments(responses, store, inference_pool):
+            labels.update(batch)
+    except InferenceQueueFull:
+        raise HTTPException(
+            status_code=503,
+            detail="Sentiment analysis is busy, please retry shortly",
+            headers={"Retry-After": INFERENCE_RETRY_AFTER},
+        )
+    return labels
+
+
+def load_recommender():
+    recommender = CourseRecommender()
+    # Opt in to runtime course updates (add/update/delete without a rebuild)
+    if os.getenv("INCREMENTAL_COURSE_INDEX") == "1":
+        # Updates stay in the process that handles them; serve.py refuses --workers > 1 the same way
+        if int(os.getenv("WEB_CONCURRENCY", "1")) > 1:
+            raise RuntimeError("INCREMENTAL_COURSE_INDEX=1 requires a single worker (WEB_CONCURRENCY=1)")
+        recommender = IncrementalCourseRecommender(recommender)
+    return recommender
+
+model = load_recommender()
+
+# Column lists of results keyed by (model version, normalized query tokens, count)
+recommendation_cache = TTLCache(
+    maxsize=int(os.getenv("RECOMMENDATION_CACHE_SIZE", "4096")),
+    ttl=float(os.getenv("RECOMMENDATION_CACHE_TTL", "600")),
+)
 
-model = CourseRecommender()
 class RecommendationRequest(BaseModel):
     keywords: str
 
+class CourseRequest(BaseModel):
+    # Fields of the Prisma Course model; see course_store.py for the catalog columns they map to
+    title: str
+    certificateType: str
+    rating: float
+    difficulty: str
+    studentsEnrolled: float
+    overallRating: float
+
+    def catalog_row(self) -> dict:
+        return {column: getattr(self, field) for field, column in COURSE_FIELD_MAP.items()}
+
 @app.get("/")
 def read_root():
     return {"message": "Hello World!"}
 
-@app.post("/recommendations/{keywords}")
+@app.post("/recommendations/{keywords}", response_model=RecommendationsResponse)
 def get_recommendations(keywords: str):
-    recommendations = model.recommend(keywords)
-    formatted_recommendations = []
-    for course_id in recommendations['course_title'].index:
-        course_details = {
-            "course_id": course_id,
-            "course_title": recommendations['course_title'][course_id],
-            "course_Certificate_type": recommendations['course_Certificate_type'][course_id],
-            "course_rating": recommendations['course_rating'][course_id],
-            "course_difficulty": recommendations['course_difficulty'][course_id],
-            "course_students_enrolled": recommendations['course_students_enrolled'][course_id],
-            "overall_rating": recommendations['overall_rating'][course_id]
-        }
-        formatted_recommendations.append(course_details)
-    return {"recommendations": formatted_recommendations}
+    cache_key = recommendation_cache_key(keywords, 10)
+    columns = recommendation_cache.get(cache_key)
+    if columns is None:
+        columns = model.recommend_columns(keywords)
+        recommendation_cache.set(cache_key, columns)
+    return FastJSONResponse({"recommendations": columns_to_records(columns)})
+
+@app.get("/api/userRecommendations/{user_id}", response_model=RecommendationsResponse)
+async def get_user_recommendations(user_id: str, db=Depends(get_db)):
+    """
+    Serve the user's precomputed recommendations (see precompute.py). Users whose profile
+    changed since the last run, or who were never precomputed, are scored live and the
+    stored result is refreshed.
+    """
+    user = await db["User"].find_one({"_id": user_id}, USER_PROFILE_FIELDS)
+    if user is None:
+        raise HTTPException(status_code=404, detail="User not found")
+    keywords = build_user_keywords(user)
+
+    stored = await db[RECOMMENDATIONS_COLLECTION].find_one({"_id": user_id})
+    if is_fresh(stored, keywords, model.version, 10):
+        columns = stored["recommendations"]
+    else:
+        cache_key = recommendation_cache_key(keywords, 10)
+        columns = recommendation_cache.get(cache_key)
+        if columns is None:
+            columns = await run_in_threadpool(model.recommend_columns, keywords)
+            recommendation_cache.set(cache_key, columns)
+        await db[RECOMMENDATIONS_COLLECTION].replace_one(
+            {"_id": user_id},
+            recommendation_document(user_id, keywords, columns, model.version, 10),
+            upsert=True,
+        )
+    return FastJSONResponse({"recommendations": columns_to_records(columns)})
+
+@app.get("/api/recommendationCacheStats")
+def get_recommendation_cache_stats():
+    return {**recommendation_cache.stats(), "model_version": model.version}
+
+@app.post("/api/reloadRecommender")
+async def reload_recommender(courses: CourseStore = Depends(get_course_store)):
+    """Reload the recommender (e.g. after compiling a new artifact) and drop cached results."""
+    global model
+    reloaded = await run_in_threadpool(load_recommender)
+    if isinstance(reloaded, IncrementalCourseRecommender):
+        # Replay runtime course changes before the new index serves anything
+        await courses.replay(reloaded)
+    model = reloaded
+    recommendation_cache.clear()
+    return {"status": "success", "model_version": model.version}
+
+
+def recommendation_cache_key(keywords: str, count: int) -> tuple:
+    # Same skills in a different order, case or punctuation share one entry; the model
+    # version makes entries from a previous model (or catalog state) unreachable
+    return (model.version, model.normalize_query(keywords), count)
+
+
+@app.put("/courses/{course_id}")
+async def upsert_course(course_id: str, course: CourseRequest, courses: CourseStore = Depends(get_course_store)):
+    """Add or update a course, stored in the Prisma Course collection so a reload keeps it."""
+    incremental_model = require_incremental_model()
+    row = course.catalog_row()
+    # Persist first: a change the index has applied is never missing after a restart
+    await courses.save(course_id, row)
+    incremental_model.add_course(parse_course_id(course_id), row)
+    return {"status": "success", "version": incremental_model.version}
+
+@app.delete("/courses/{course_id}")
+async def delete_course(course_id: str, courses: CourseStore = Depends(get_course_store)):
+    incremental_model = require_incremental_model()
+    if parse_course_id(course_id) not in incremental_model:
+        raise HTTPException(status_code=404, detail="Course not found")
+    await courses.delete(course_id)
+    incremental_model.delete_course(parse_course_id(course_id))
+    return {"status": "success", "version": incremental_model.version}
+
+@app.post("/courses/compact")
+def compact_courses():
+    incremental_model = require_incremental_model()
+    incremental_model.compact(background=True)
+    return {"status": "started", "version": incremental_model.version}
+
+
+def require_incremental_model() -> IncrementalCourseRecommender:
+    if not isinstance(model, IncrementalCourseRecommender):
+        raise HTTPException(status_code=409, detail="Course updates require INCREMENTAL_COURSE_INDEX=1")
+    return model
+
+
+MAX_BATCH_QUERIES = 5000
+MAX_RECOMMENDATIONS_PER_QUERY = 100
+
+class BatchRecommendationRequest(BaseModel):
+    keywords: List[str] = []
+    userIds: List[str] = []
+    count: int = Field(10, ge=1, le=MAX_RECOMMENDATIONS_PER_QUERY)
+    # "columnar" returns {column: [values]} per query instead of a list of course objects
+    format: Literal["records", "columnar"] = "records"
+
+@app.post("/batchRecommendations", response_model=BatchRecommendationsResponse)
+async def get_batch_recommendations(request: BatchRecommendationRequest, db=Depends(get_db)):
+    """
+    Recommend courses for many keyword strings and/or users in one call. All queries are
+    vectorized together and scored with a single sparse matrix product.
+
+    `keywords` in the response holds one result per requested keyword string, in request
+    order (repeated strings get repeated results); `users` is keyed by user id.
+    """
+    if len(request.keywords) + len(request.userIds) > MAX_BATCH_QUERIES:
+        raise HTTPException(status_code=413, detail=f"At most {MAX_BATCH_QUERIES} queries per batch")
+
+    # Build each user's keywords the same way the upskill page does
+    user_keywords = {}
+    if request.userIds:
+        async for user in db["User"].find({"_id": {"$in": request.userIds}}, USER_PROFILE_FIELDS):
+            user_keywords[user["_id"]] = build_user_keywords(user)
+    found_user_ids = [user_id for user_id in request.userIds if user_id in user_keywords]
+
+    queries = list(request.keywords) + [user_keywords[user_id] for user_id in found_user_ids]
+    cache_keys = [recommendation_cache_key(query, request.count) for query in queries]
+    results = [recommendation_cache.get(cache_key) for cache_key in cache_keys]
+
+    # Only the cache misses go through the sparse matrix product
+    misses = [i for i, result in enumerate(results) if result is None]
+    # CPU-bound, so off the event loop
+    computed = await run_in_threadpool(
+        model.recommend_batch_columns, [queries[i] for i in misses], recomm_count=request.count
+    )
+    for i, columns in zip(misses, computed):
+        results[i] = columns
+        recommendation_cache.set(cache_keys[i], columns)
+
+    if request.format == "records":
+        results = [columns_to_records(columns) for columns in results]
+    keyword_results = results[:len(request.keywords)]
+    user_results = results[len(request.keywords):]
+    return FastJSONResponse({
+        "keywords": keyword_results,
+        "users": dict(zip(found_user_ids, user_results)),
+        "missingUserIds": [user_id for user_id in request.userIds if user_id not in user_keywords],
+    })
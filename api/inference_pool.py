@@ -0,0 +1,180 @@
+# inference_pool.py
+import math
+import asyncio
+import multiprocessing
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import AsyncIterator, List, Tuple
+
+try:
+    from .analyzer import Analyzer, check_backend, model_identifier
+except ImportError:
+    from analyzer import Analyzer, check_backend, model_identifier
+
+# Analyzer of the current process: loaded by preload() or by the pool worker initializer
+_analyzer = None
+
+
+def preload(batch_size: int = 32, window_overlap: int = 0, backend: str = "fp32", num_threads: int = None) -> Analyzer:
+    """Load the Analyzer in this process, if it is not loaded yet."""
+    global _analyzer
+    if _analyzer is None:
+        _analyzer = Analyzer(batch_size=batch_size, window_overlap=window_overlap,
+                             backend=backend, num_threads=num_threads)
+    return _analyzer
+
+def _score(texts: List[str]) -> List[List[str]]:
+    return _analyzer.get_response_window_sentiments(texts)
+
+def _ping() -> bool:
+    return _analyzer is not None
+
+
+class InferenceQueueFull(Exception):
+    """Raised when the inference pool already has as many jobs as it may queue."""
+
+
+class InferencePool:
+    """Runs sentiment inference off the event loop, behind an async interface.
+
+    With `workers > 0`, inference runs in a dedicated process pool whose workers load
+    the model once at start-up. With `workers == 0` it runs in a single background
+    thread of the current process. Requests are split into jobs of at most
+    `job_size` texts so a large team is spread over every worker. A request
+    reserves all of its jobs before submitting any; when they would take the
+    queue past `max_queued_jobs` waiting or running jobs, it gets
+    InferenceQueueFull immediately instead of piling up behind the backlog. (A
+    request too large to fit at all is split into `max_queued_jobs` larger jobs.)
+    If a worker process dies (e.g. out of memory), the pool is replaced and the
+    affected jobs are retried once.
+    """
+
+    def __init__(self, workers: int = 1, max_queued_jobs: int = 64, job_size: int = 256,
+                 batch_size: int = 32, window_overlap: int = 0, backend: str = "fp32",
+                 num_threads: int = None, start_method: str = "spawn"):
+        # Fail (or warn) once at start-up rather than in every worker's initializer
+        check_backend(backend)
+        self.workers = workers
+        self.max_queued_jobs = max_queued_jobs
+        self.job_size = job_size
+        self.batch_size = batch_size
+        self.window_overlap = window_overlap
+        self.backend = backend
+        self.num_threads = num_threads
+        self.start_method = start_method
+        self.model_id = model_identifier(window_overlap, backend)
+        self.pending_jobs = 0
+        self.restarts = 0
+        self._executor: Executor = None
+
+    def analyzer_args(self) -> tuple:
+        """Arguments of preload() for the Analyzer this pool runs."""
+        return (self.batch_size, self.window_overlap, self.backend, self.num_threads)
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.workers > 0:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context(self.start_method),
+                    initializer=preload,
+                    initargs=self.analyzer_args(),
+                )
+            else:
+                preload(*self.analyzer_args())
+                self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="inference")
+        return self._executor
+
+    async def start(self):
+        """Start every worker and wait until each has loaded the model."""
+        loop = asyncio.get_running_loop()
+        executor = self._get_executor()
+        await asyncio.gather(*(loop.run_in_executor(executor, _ping) for _ in range(max(self.workers, 1))))
+
+    def _replace_executor(self, broken: Executor):
+        # Every job of a broken pool fails at once; only the first one to notice replaces it
+        if self._executor is broken:
+            self._executor = None
+            self.restarts += 1
+            broken.shutdown(wait=False, cancel_futures=True)
+
+    async def _run_job(self, texts: List[str]) -> List[List[str]]:
+        loop = asyncio.get_running_loop()
+        executor = self._get_executor()
+        try:
+            return await loop.run_in_executor(executor, _score, texts)
+        except BrokenProcessPool:
+            self._replace_executor(executor)
+            return await loop.run_in_executor(self._get_executor(), _score, texts)
+
+    def _submit(self, texts: List[str]) -> List[Tuple[int, asyncio.Future]]:
+        """Split `texts` into jobs and submit them, as (offset of the job, future) pairs."""
+        job_size = max(self.job_size, math.ceil(len(texts) / self.max_queued_jobs))
+        jobs = math.ceil(len(texts) / job_size)
+        if self.pending_jobs + jobs > self.max_queued_jobs:
+            raise InferenceQueueFull(f"{self.pending_jobs} inference jobs already queued, {jobs} more requested")
+
+        submitted = []
+        for start in range(0, len(texts), job_size):
+            future = asyncio.ensure_future(self._run_job(texts[start:start + job_size]))
+            self.pending_jobs += 1
+            future.add_done_callback(self._job_done)
+            submitted.append((start, future))
+        return submitted
+
+    def _job_done(self, future: asyncio.Future):
+        self.pending_jobs -= 1
+
+    async def get_window_sentiments(self, texts: List[str]) -> List[List[str]]:
+        """Sentiment labels of the token windows of each text, in input order.
+
+        Texts are tokenized and split into windows inside the workers, so only the
+        texts and the labels cross the process boundary.
+
+        Raises:
+            InferenceQueueFull: If max_queued_jobs jobs are already waiting or running.
+        """
+        if not texts:
+            return []
+        submitted = self._submit(texts)
+        results = await asyncio.gather(*(future for _, future in submitted))
+        return [labels for result in results for labels in result]
+
+    async def iter_window_sentiments(self, texts: List[str]) -> AsyncIterator[Tuple[int, List[List[str]]]]:
+        """Like get_window_sentiments, but yields each job's labels as soon as it finishes.
+
+        Yields:
+            Tuple[int, List[List[str]]]: Index in `texts` of the job's first text, and the
+            window labels of the job's texts.
+
+        Raises:
+            InferenceQueueFull: If max_queued_jobs jobs are already waiting or running.
+        """
+        if not texts:
+            return
+        submitted = self._submit(texts)
+        offsets = {future: start for start, future in submitted}
+        pending = set(offsets)
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for future in done:
+                    yield offsets[future], future.result()
+        finally:
+            # The consumer went away: drop the jobs that have not started yet
+            for future in pending:
+                future.cancel()
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "backend": self.backend,
+            "pending_jobs": self.pending_jobs,
+            "max_queued_jobs": self.max_queued_jobs,
+            "restarts": self.restarts,
+        }
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
@@ -0,0 +1,98 @@
+# inverted_index.py
+import numpy as np
+
+
+class InvertedIndex:
+    """Term -> posting list index over the rows of an L2-normalized TF-IDF matrix.
+
+    Posting lists are stored as a CSC layout of the course vectors: for term `t`,
+    `doc_ids[indptr[t]:indptr[t + 1]]` are the courses containing it and `weights`
+    holds their TF-IDF values. Scoring a query only touches the posting lists of the
+    query's own terms, so latency depends on how common those terms are rather than
+    on the size of the catalog.
+    """
+
+    def __init__(self, indptr, doc_ids, weights, n_docs):
+        self.indptr = indptr
+        self.doc_ids = doc_ids
+        self.weights = weights
+        self.n_docs = n_docs
+
+    @classmethod
+    def from_vectors(cls, vectors):
+        postings = vectors.tocsc()
+        postings.sort_indices()
+        return cls(postings.indptr, postings.indices, postings.data, vectors.shape[0])
+
+    def score(self, query_vector):
+        """Accumulate dot-product scores for every course sharing a term with the query.
+
+        Args:
+            query_vector: A 1 x n_terms sparse row, as returned by the vectorizer.
+
+        Returns:
+            tuple: (candidate row ids in ascending order, their scores).
+        """
+        terms = query_vector.indices
+        starts = self.indptr[terms]
+        lengths = self.indptr[terms + 1] - starts
+        total = int(lengths.sum())
+        if total == 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64)
+
+        # Flat positions of every posting entry for the query terms, without a Python loop per entry
+        offsets = np.repeat(starts - np.cumsum(lengths) + lengths, lengths)
+        positions = offsets + np.arange(total)
+        docs = self.doc_ids[positions]
+        contributions = self.weights[positions] * np.repeat(query_vector.data, lengths)
+
+        candidates, inverse = np.unique(docs, return_inverse=True)
+        scores = np.bincount(inverse, weights=contributions, minlength=len(candidates))
+        return candidates.astype(np.int64), scores
+
+    def top_k(self, query_vector, k):
+        """Return the `k` highest scoring rows for the query.
+
+        Ties are broken by row id. When fewer than `k` courses share a term with the
+        query, the remainder is filled with zero-score courses in catalog order so the
+        result always has min(k, n_docs) rows, like a full similarity ranking would.
+
+        Returns:
+            tuple: (row ids ordered by descending score, their scores).
+        """
+        candidates, scores = self.score(query_vector)
+        return select_top_k(candidates, scores, k, self.n_docs)
+
+
+def select_top_k(candidates, scores, k, n_docs):
+    """Pick the `k` best (row id, score) pairs from sparse candidate scores.
+
+    Args:
+        candidates (np.ndarray): Candidate row ids in ascending order.
+        scores (np.ndarray): Score of each candidate.
+        k (int): Number of rows to return; nothing is returned when it is 0 or less.
+        n_docs (int): Number of rows in the catalog, used for zero-score padding.
+
+    Returns:
+        tuple: (row ids ordered by descending score, their scores).
+    """
+    k = min(k, n_docs)
+    if k <= 0:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64)
+    if len(candidates) > k:
+        # Partial selection: find the k-th best score, then resolve ties at the boundary by row id
+        threshold = np.partition(scores, len(scores) - k)[len(scores) - k]
+        above = np.flatnonzero(scores > threshold)
+        tied = np.flatnonzero(scores == threshold)[:k - len(above)]
+        selected = np.concatenate([above, tied])
+        candidates, scores = candidates[selected], scores[selected]
+
+    order = np.lexsort((candidates, -scores))
+    rows, row_scores = candidates[order], scores[order]
+
+    missing = k - len(rows)
+    if missing > 0:
+        padding = np.setdiff1d(np.arange(min(n_docs, k + len(rows))), rows, assume_unique=True)[:missing]
+        rows = np.concatenate([rows, padding])
+        row_scores = np.concatenate([row_scores, np.zeros(len(padding))])
+    return rows, row_scores
@@ -0,0 +1,28 @@
+# memory.py
+import os
+
+SMAPS_FIELDS = ("Rss", "Pss", "Shared_Clean", "Shared_Dirty", "Private_Clean", "Private_Dirty")
+
+
+def memory_usage() -> dict:
+    """Report how much of this process's memory is shared with other processes vs private.
+
+    Reads /proc/self/smaps_rollup (Linux only). Shared pages include the memory-mapped
+    recommender artifact and copy-on-write pages inherited from a pre-fork parent.
+
+    Returns:
+        dict: Sizes in kB, plus totals for shared and private memory.
+    """
+    usage = {"pid": os.getpid()}
+    try:
+        with open("/proc/self/smaps_rollup") as file:
+            for line in file:
+                name, _, value = line.partition(":")
+                if name in SMAPS_FIELDS:
+                    usage[name.lower() + "_kb"] = int(value.split()[0])
+    except FileNotFoundError:
+        usage["error"] = "smaps_rollup is not available on this platform"
+        return usage
+    usage["shared_kb"] = usage.get("shared_clean_kb", 0) + usage.get("shared_dirty_kb", 0)
+    usage["private_kb"] = usage.get("private_clean_kb", 0) + usage.get("private_dirty_kb", 0)
+    return usage
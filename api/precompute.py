@@ -0,0 +1,140 @@
+# precompute.py
+"""Bulk precomputation of personalised course recommendations.
+
+Meant to run nightly (e.g. from cron) after the recommender artifact is compiled:
+
+    python -m api.precompute --chunk-size 1000 --workers 4
+"""
+import os
+import time
+import hashlib
+import argparse
+from datetime import datetime, timezone
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from pymongo import MongoClient, ReplaceOne
+
+RECOMMENDATIONS_COLLECTION = "Recommendation"
+# The fields build_user_keywords reads
+USER_PROFILE_FIELDS = {"department": 1, "existingSkills": 1}
+
+
+def build_user_keywords(user: dict) -> str:
+    # Same keywords the upskill page sends for a user
+    skills = ", ".join(user.get("existingSkills") or [])
+    return f"{user.get('department') or ''}, {skills}"
+
+def profile_hash(keywords: str) -> str:
+    return hashlib.sha1(keywords.encode("utf-8")).hexdigest()
+
+def recommendation_document(user_id, keywords: str, columns: dict, model_version: str, count: int) -> dict:
+    return {
+        "_id": user_id,
+        "profileHash": profile_hash(keywords),
+        "modelVersion": model_version,
+        "count": count,
+        "recommendations": columns,
+        "computedAt": datetime.now(timezone.utc),
+    }
+
+def is_fresh(document: dict, keywords: str, model_version: str, count: int) -> bool:
+    """Whether a stored result still matches the user's profile and the serving model."""
+    return (
+        document is not None
+        and document.get("profileHash") == profile_hash(keywords)
+        and document.get("modelVersion") == model_version
+        and document.get("count") == count
+    )
+
+
+def _chunks(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def precompute_recommendations(db, model, count: int = 10, chunk_size: int = 1000, workers: int = 4) -> dict:
+    """Compute top-k courses for every user and store them chunk by chunk.
+
+    Users are streamed from MongoDB with only their profile fields projected. Each chunk
+    is vectorized and scored with one sparse matrix product (recommend_batch_columns),
+    and chunks are scored concurrently; the sparse and NumPy kernels release the GIL.
+    Each scored chunk is written with its own bulk write, and at most two chunks per
+    worker are read ahead, so memory stays bounded however many users there are.
+
+    Args:
+        db: pymongo Database holding the User collection.
+        model: CourseRecommender (or IncrementalCourseRecommender) to score with.
+        count (int): Number of courses per user.
+        chunk_size (int): Users per chunk, also used as the cursor batch size and bulk write size.
+        workers (int): Number of chunks scored concurrently.
+
+    Returns:
+        dict: Number of users processed and time spent scoring and writing.
+    """
+    start = time.perf_counter()
+    users = db["User"].find({}, USER_PROFILE_FIELDS).batch_size(chunk_size)
+    collection = db[RECOMMENDATIONS_COLLECTION]
+
+    def score_chunk(chunk):
+        keywords = [build_user_keywords(user) for user in chunk]
+        results = model.recommend_batch_columns(keywords, recomm_count=count)
+        return [
+            ReplaceOne(
+                {"_id": user["_id"]},
+                recommendation_document(user["_id"], user_keywords, columns, model.version, count),
+                upsert=True,
+            )
+            for user, user_keywords, columns in zip(chunk, keywords, results)
+        ]
+
+    processed = 0
+    write_seconds = 0.0
+
+    def write(operations):
+        nonlocal processed, write_seconds
+        write_start = time.perf_counter()
+        collection.bulk_write(operations, ordered=False)
+        write_seconds += time.perf_counter() - write_start
+        processed += len(operations)
+
+    in_flight = deque()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for chunk in _chunks(users, chunk_size):
+            in_flight.append(executor.submit(score_chunk, chunk))
+            if len(in_flight) >= 2 * workers:
+                write(in_flight.popleft().result())
+        while in_flight:
+            write(in_flight.popleft().result())
+
+    return {
+        "users": processed,
+        "model_version": model.version,
+        "score_seconds": time.perf_counter() - start - write_seconds,
+        "write_seconds": write_seconds,
+    }
+
+
+if __name__ == "__main__":
+    from dotenv import load_dotenv
+    try:
+        from .course_recommender import CourseRecommender
+    except ImportError:
+        from course_recommender import CourseRecommender
+
+    parser = argparse.ArgumentParser(description="Precompute course recommendations for every user")
+    parser.add_argument("--count", type=int, default=10, help="Courses per user")
+    parser.add_argument("--chunk-size", type=int, default=1000, help="Users scored per sparse matrix product")
+    parser.add_argument("--workers", type=int, default=4, help="Chunks scored concurrently")
+    args = parser.parse_args()
+
+    load_dotenv()
+    client = MongoClient(os.getenv("MONGO_URI"), tls=True, tlsAllowInvalidCertificates=True)
+    summary = precompute_recommendations(
+        client["database"], CourseRecommender(), count=args.count, chunk_size=args.chunk_size, workers=args.workers,
+    )
+    print(summary)
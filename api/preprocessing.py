@@ -0,0 +1,151 @@
+# preprocessing.py
+import os
+import json
+import time
+import hashlib
+from contextlib import contextmanager
+import numpy as np
+import pandas as pd
+from langdetect import DetectorFactory, detect
+from langdetect.lang_detect_exception import LangDetectException
+
+# langdetect is randomized; seed it so cached and fresh detections agree
+DetectorFactory.seed = 0
+
+
+class StageTimer:
+    """Collect wall-clock durations of named preprocessing stages."""
+
+    def __init__(self):
+        self.timings = {}
+
+    @contextmanager
+    def stage(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name] = self.timings.get(name, 0.0) + time.perf_counter() - start
+
+    def report(self) -> str:
+        total = sum(self.timings.values())
+        lines = [f"  {name:<20} {seconds * 1000:>10.1f} ms" for name, seconds in self.timings.items()]
+        lines.append(f"  {'total':<20} {total * 1000:>10.1f} ms")
+        return "\n".join(lines)
+
+
+class LanguageCache:
+    """Language labels of course titles, keyed by a hash of the title.
+
+    Detection only runs for titles that are not in the cache yet, and every distinct
+    title is detected once no matter how often it appears in the catalog. When `path`
+    is given the cache is loaded from and saved to that JSON file, so rebuilds only pay
+    for new titles.
+    """
+
+    def __init__(self, path: str = None):
+        self.path = path
+        self.labels = {}
+        if path and os.path.exists(path):
+            with open(path) as file:
+                self.labels = json.load(file)
+
+    @staticmethod
+    def key(title: str) -> str:
+        return hashlib.sha1(title.encode('utf-8')).hexdigest()
+
+    def detect_many(self, titles: np.ndarray) -> np.ndarray:
+        """Return the language label of every title, detecting only unseen ones.
+
+        Returns:
+            np.ndarray: Labels aligned with `titles`.
+        """
+        unique_titles, inverse = np.unique(titles, return_inverse=True)
+        labels = np.empty(len(unique_titles), dtype=object)
+        for i, title in enumerate(unique_titles):
+            key = self.key(title)
+            label = self.labels.get(key)
+            if label is None:
+                try:
+                    label = detect(title)
+                except LangDetectException:
+                    # No detectable features (e.g. only digits or punctuation)
+                    label = 'unknown'
+                self.labels[key] = label
+            labels[i] = label
+        return labels[inverse]
+
+    def save(self):
+        if not self.path:
+            return
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w') as file:
+            json.dump(self.labels, file)
+        os.replace(tmp_path, self.path)
+
+
+def min_max_scale(values: np.ndarray) -> np.ndarray:
+    """Scale to [0, 1] like sklearn's MinMaxScaler (a constant column maps to 0)."""
+    low, high = values.min(), values.max()
+    spread = high - low
+    if spread == 0:
+        return np.zeros_like(values, dtype=np.float64)
+    return (values - low) / spread
+
+
+def harmonic_mean_pairs(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Element-wise harmonic mean of two non-negative arrays, 0 where either is 0 (as statistics.harmonic_mean)."""
+    total = a + b
+    positive = (a > 0) & (b > 0)
+    return np.where(positive, 2 * a * b / np.where(positive, total, 1.0), 0.0)
+
+
+def preprocess_catalog(raw: pd.DataFrame, language_cache: LanguageCache = None, timer: StageTimer = None) -> pd.DataFrame:
+    """Turn the raw Coursera CSV into the catalog the recommender is fitted on.
+
+    Keeps courses whose enrolment is given in thousands ("5.3k"), min-max scales rating
+    and enrolment over those courses, derives overall_rating as their harmonic mean and
+    keeps English titles only. Every step is a vectorized NumPy/pandas operation over
+    whole columns, and the result is materialized with a single row selection.
+
+    Args:
+        raw (pd.DataFrame): The CSV as read from disk.
+        language_cache (LanguageCache, optional): Cache of detected title languages.
+        timer (StageTimer, optional): Receives the duration of each stage.
+
+    Returns:
+        pd.DataFrame: The catalog, indexed like the raw CSV.
+    """
+    language_cache = language_cache or LanguageCache()
+    timer = timer or StageTimer()
+
+    with timer.stage('parse_enrolment'):
+        enrolled_text = raw['course_students_enrolled'].astype(str)
+        in_thousands = enrolled_text.str.endswith('k').to_numpy()
+        enrolled = pd.to_numeric(enrolled_text[in_thousands].str[:-1], errors='coerce').to_numpy() * 1000
+        valid = ~np.isnan(enrolled)
+        rows = np.flatnonzero(in_thousands)[valid]
+        enrolled = enrolled[valid]
+
+    with timer.stage('scale_ratings'):
+        rating = min_max_scale(raw['course_rating'].to_numpy(dtype=np.float64)[rows])
+        enrolled = min_max_scale(enrolled)
+        overall = harmonic_mean_pairs(rating, enrolled)
+
+    with timer.stage('detect_language'):
+        titles = raw['course_title'].to_numpy()[rows].astype(str)
+        english = language_cache.detect_many(titles) == 'en'
+
+    with timer.stage('assemble'):
+        keep = rows[english]
+        catalog = pd.DataFrame({
+            'course_title': titles[english],
+            'course_Certificate_type': raw['course_Certificate_type'].to_numpy()[keep],
+            'course_rating': rating[english],
+            'course_difficulty': raw['course_difficulty'].to_numpy()[keep],
+            'course_students_enrolled': enrolled[english],
+            'overall_rating': overall[english],
+        }, index=raw.index[keep])
+    return catalog
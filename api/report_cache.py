@@ -0,0 +1,137 @@
+# report_cache.py
+import json
+import hashlib
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from pymongo import ASCENDING
+
+REPORT_CACHE_COLLECTION = "ManagerReportCache"
+
+
+def report_cache_key(feedback_text: str, model: str, template_version: int, summarizer: str) -> str:
+    """Content address of a manager report.
+
+    Args:
+        feedback_text (str): The assembled feedback the report is written from.
+        model (str): The chat model writing the report.
+        template_version (int): Version of the report prompts.
+        summarizer (str): How the report is summarized ("single", or "hierarchical" and its batch budget).
+
+    Returns:
+        str: Hex SHA-256 of the inputs.
+    """
+    payload = json.dumps([model, template_version, summarizer, feedback_text], ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class MongoReportCacheBackend:
+    """Cached reports in a MongoDB collection (motor). Expired entries are also removed by a TTL index."""
+
+    def __init__(self, collection):
+        self.collection = collection
+
+    async def ensure_indexes(self):
+        await self.collection.create_index([("expiresAt", ASCENDING)], name="expiresAt_ttl", expireAfterSeconds=0)
+        await self.collection.create_index([("lastUsedAt", ASCENDING)], name="lastUsedAt")
+
+    async def get(self, key: str) -> dict:
+        return await self.collection.find_one({"_id": key})
+
+    async def put(self, key: str, entry: dict):
+        await self.collection.replace_one({"_id": key}, {"_id": key, **entry}, upsert=True)
+
+    async def touch(self, key: str, now: datetime):
+        await self.collection.update_one({"_id": key}, {"$set": {"lastUsedAt": now}})
+
+    async def delete(self, key: str):
+        await self.collection.delete_one({"_id": key})
+
+    async def count(self) -> int:
+        return await self.collection.estimated_document_count()
+
+    async def delete_least_recently_used(self, count: int):
+        keys = [entry["_id"] async for entry in
+                self.collection.find({}, {"_id": 1}).sort("lastUsedAt", ASCENDING).limit(count)]
+        if keys:
+            await self.collection.delete_many({"_id": {"$in": keys}})
+
+
+class MemoryReportCacheBackend:
+    """In-process stand-in for MongoReportCacheBackend, for running and testing without a database."""
+
+    def __init__(self):
+        self._entries = OrderedDict()  # key -> entry, least recently used first
+
+    async def ensure_indexes(self):
+        pass
+
+    async def get(self, key: str) -> dict:
+        entry = self._entries.get(key)
+        return None if entry is None else {"_id": key, **entry}
+
+    async def put(self, key: str, entry: dict):
+        self._entries[key] = dict(entry)
+        self._entries.move_to_end(key)
+
+    async def touch(self, key: str, now: datetime):
+        if key in self._entries:
+            self._entries[key]["lastUsedAt"] = now
+            self._entries.move_to_end(key)
+
+    async def delete(self, key: str):
+        self._entries.pop(key, None)
+
+    async def count(self) -> int:
+        return len(self._entries)
+
+    async def delete_least_recently_used(self, count: int):
+        for _ in range(min(count, len(self._entries))):
+            self._entries.popitem(last=False)
+
+
+class ReportCache:
+    """Manager reports by content address, expiring after `ttl` seconds.
+
+    At most `max_entries` reports are kept; the least recently used ones are evicted
+    first. Reports are written at temperature 0, so a report is reused for as long as
+    the feedback, model and prompts it was written from are unchanged.
+    """
+
+    def __init__(self, backend, ttl: float = 86400.0, max_entries: int = 1000):
+        self.backend = backend
+        self.ttl = ttl
+        self.max_entries = max_entries
+
+    async def get(self, key: str) -> dict:
+        """Return the cached {"report", "summarization", "createdAt"} of `key`, or None if missing or expired."""
+        entry = await self.backend.get(key)
+        if entry is None:
+            return None
+        now = datetime.now(timezone.utc)
+        if _aware(entry["expiresAt"]) <= now:
+            await self.backend.delete(key)
+            return None
+        await self.backend.touch(key, now)
+        return entry
+
+    async def set(self, key: str, report: str, summarization: dict):
+        now = datetime.now(timezone.utc)
+        await self.backend.put(key, {
+            "report": report,
+            "summarization": summarization,
+            "createdAt": now,
+            "lastUsedAt": now,
+            "expiresAt": now + timedelta(seconds=self.ttl),
+        })
+        excess = await self.backend.count() - self.max_entries
+        if excess > 0:
+            await self.backend.delete_least_recently_used(excess)
+
+    @staticmethod
+    def age_seconds(entry: dict) -> float:
+        return (datetime.now(timezone.utc) - _aware(entry["createdAt"])).total_seconds()
+
+
+def _aware(value: datetime) -> datetime:
+    # MongoDB returns naive UTC datetimes
+    return value if value.tzinfo is not None else value.replace(tzinfo=timezone.utc)
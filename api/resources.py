@@ -0,0 +1,73 @@
+# resources.py
+import os
+from dataclasses import dataclass, field
+from fastapi import Request
+from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase
+
+from llm_client import LLMClient, LLMSettings
+
+
+@dataclass
+class Settings:
+    """Connection pool sizes and timeouts of the clients shared by every request."""
+    mongo_uri: str = None
+    mongo_database: str = "database"
+    mongo_max_pool_size: int = 100
+    mongo_min_pool_size: int = 0
+    mongo_connect_timeout_ms: int = 10_000
+    mongo_server_selection_timeout_ms: int = 10_000
+    mongo_socket_timeout_ms: int = 30_000
+    mongo_tls_allow_invalid_certificates: bool = True
+    llm: LLMSettings = field(default_factory=LLMSettings)
+
+    @classmethod
+    def from_env(cls) -> "Settings":
+        return cls(
+            mongo_uri=os.getenv("MONGO_URI"),
+            mongo_database=os.getenv("MONGO_DATABASE", "database"),
+            mongo_max_pool_size=int(os.getenv("MONGO_MAX_POOL_SIZE", "100")),
+            mongo_min_pool_size=int(os.getenv("MONGO_MIN_POOL_SIZE", "0")),
+            mongo_connect_timeout_ms=int(os.getenv("MONGO_CONNECT_TIMEOUT_MS", "10000")),
+            mongo_server_selection_timeout_ms=int(os.getenv("MONGO_SERVER_SELECTION_TIMEOUT_MS", "10000")),
+            mongo_socket_timeout_ms=int(os.getenv("MONGO_SOCKET_TIMEOUT_MS", "30000")),
+            mongo_tls_allow_invalid_certificates=os.getenv("MONGO_TLS_ALLOW_INVALID_CERTIFICATES", "1") == "1",
+            llm=LLMSettings.from_env(),
+        )
+
+
+class Resources:
+    """The database and HTTP clients of the app.
+
+    Opened once in the app's lifespan and shared by every request through the
+    dependencies below, so requests reuse pooled connections instead of opening
+    their own, and closed when the app shuts down.
+    """
+
+    def __init__(self, settings: Settings):
+        self.settings = settings
+        self.mongo_client = AsyncIOMotorClient(
+            settings.mongo_uri,
+            tls=True,
+            tlsAllowInvalidCertificates=settings.mongo_tls_allow_invalid_certificates,
+            maxPoolSize=settings.mongo_max_pool_size,
+            minPoolSize=settings.mongo_min_pool_size,
+            connectTimeoutMS=settings.mongo_connect_timeout_ms,
+            serverSelectionTimeoutMS=settings.mongo_server_selection_timeout_ms,
+            socketTimeoutMS=settings.mongo_socket_timeout_ms,
+        )
+        self.db: AsyncIOMotorDatabase = self.mongo_client[settings.mongo_database]
+        self.llm = LLMClient(settings.llm)
+
+    async def close(self):
+        await self.llm.close()
+        self.mongo_client.close()
+
+
+def get_resources(request: Request) -> Resources:
+    return request.app.state.resources
+
+def get_db(request: Request) -> AsyncIOMotorDatabase:
+    return get_resources(request).db
+
+def get_llm(request: Request) -> LLMClient:
+    return get_resources(request).llm
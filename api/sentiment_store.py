@@ -0,0 +1,120 @@
+# sentiment_store.py
+import hashlib
+from datetime import datetime, timezone
+from typing import Dict, Iterable, Tuple
+from pymongo import ReplaceOne
+
+SENTIMENT_COLLECTION = "FeedbackSentiment"
+
+
+class SentimentStore:
+    """Persisted sentiment label per (feedback id, field).
+
+    Each entry is stamped with a hash of the text it was computed from and the
+    identifier of the model that produced it. A lookup only returns labels whose
+    hash and model still match, so edited responses or a model change are
+    recomputed while everything else is served from the store. `collection` is a
+    motor (asyncio) collection.
+    """
+
+    def __init__(self, collection):
+        self.collection = collection
+
+    @staticmethod
+    def content_hash(text: str) -> str:
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def entry_id(feedback_id, field: str) -> str:
+        return f"{feedback_id}:{field}"
+
+    async def lookup(self, responses: Iterable[Tuple[str, str, str]], model_id: str) -> Dict[Tuple[str, str], str]:
+        """Return stored labels that are still valid.
+
+        Args:
+            responses: (feedback id, field, text) triples.
+            model_id (str): Identifier of the model that would score them now.
+
+        Returns:
+            Dict[Tuple[str, str], str]: Label per (feedback id, field) for the fresh entries.
+        """
+        expected = {
+            self.entry_id(feedback_id, field): ((feedback_id, field), self.content_hash(text))
+            for feedback_id, field, text in responses
+        }
+        if not expected:
+            return {}
+        labels = {}
+        async for entry in self.collection.find({"_id": {"$in": list(expected)}}):
+            key, content_hash = expected[entry["_id"]]
+            if entry.get("contentHash") == content_hash and entry.get("model") == model_id:
+                labels[key] = entry["label"]
+        return labels
+
+    async def save(self, entries: Iterable[Tuple[str, str, str, str]], model_id: str):
+        """Upsert (feedback id, field, text, label) entries computed with `model_id`."""
+        now = datetime.now(timezone.utc)
+        operations = [
+            ReplaceOne(
+                {"_id": self.entry_id(feedback_id, field)},
+                {
+                    "_id": self.entry_id(feedback_id, field),
+                    "feedbackId": feedback_id,
+                    "field": field,
+                    "contentHash": self.content_hash(text),
+                    "model": model_id,
+                    "label": label,
+                    "computedAt": now,
+                },
+                upsert=True,
+            )
+            for feedback_id, field, text, label in entries
+        ]
+        if operations:
+            await self.collection.bulk_write(operations, ordered=False)
+
+
+async def iter_response_sentiments(responses: list, store: SentimentStore, pool):
+    """
+    Yield sentiment labels per (feedback id, field) batch by batch: first every label
+    still valid in the store, then the labels of each inference job as it finishes.
+    Computed labels are persisted batch by batch. `pool` is the InferencePool that
+    scores the missing responses.
+
+    Raises InferenceQueueFull when the inference pool is saturated.
+    """
+    labels = await store.lookup(responses, pool.model_id)
+    if labels:
+        yield labels
+    missing = [response for response in responses if (response[0], response[1]) not in labels]
+    if not missing:
+        return
+
+    # Every missing response is split into token windows and scored in the inference workers
+    async for offset, window_labels in pool.iter_window_sentiments([text for _, _, text in missing]):
+        batch = {}
+        computed = []
+        for (feedback_id, field, text), response_labels in zip(missing[offset:], window_labels):
+            positive_count = response_labels.count("positive")
+            negative_count = response_labels.count("negative")
+            neutral_count = len(response_labels) - positive_count - negative_count
+            sentiment = find_highest_sentiment(positive_count, negative_count, neutral_count)
+            batch[(feedback_id, field)] = sentiment
+            computed.append((feedback_id, field, text, sentiment))
+
+        await store.save(computed, pool.model_id)
+        yield batch
+
+
+def find_highest_sentiment(positive: int, negative: int, neutral: int) -> str:
+    # Create a dictionary with the sentiment counts
+    sentiment_counts = {
+        "positive": positive,
+        "negative": negative,
+        "neutral": neutral
+    }
+    
+    # Find the sentiment with the maximum count
+    highest_sentiment = max(sentiment_counts, key=sentiment_counts.get)
+    
+    return highest_sentiment
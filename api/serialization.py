@@ -0,0 +1,49 @@
+# serialization.py
+import json
+from typing import Dict, List, Union
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; fall back to the standard library encoder
+    orjson = None
+
+
+class CourseRecommendation(BaseModel):
+    course_id: Union[int, str]
+    course_title: str
+    course_Certificate_type: str
+    course_rating: float
+    course_difficulty: str
+    course_students_enrolled: float
+    overall_rating: float
+
+class RecommendationsResponse(BaseModel):
+    recommendations: List[CourseRecommendation]
+
+class BatchRecommendationsResponse(BaseModel):
+    # One result per requested keyword string, in request order
+    keywords: List[Union[List[CourseRecommendation], Dict[str, list]]]
+    users: Dict[str, Union[List[CourseRecommendation], Dict[str, list]]]
+    missingUserIds: List[str]
+
+
+class FastJSONResponse(JSONResponse):
+    """JSON response that encodes with orjson when it is installed.
+
+    Routes return this directly with already JSON-ready content, so FastAPI skips
+    response-model validation and jsonable_encoder; the `response_model` on the
+    route still documents the shape in OpenAPI.
+    """
+
+    def render(self, content) -> bytes:
+        if orjson is not None:
+            return orjson.dumps(content, option=orjson.OPT_SERIALIZE_NUMPY)
+        return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+
+def columns_to_records(columns: Dict[str, list]) -> List[dict]:
+    """Turn {column: [values]} into one dict per row."""
+    names = list(columns)
+    return [dict(zip(names, values)) for values in zip(*columns.values())]
@@ -0,0 +1,171 @@
+# serve.py
+"""Pre-fork server that shares the read-only model state between uvicorn workers.
+
+`uvicorn --workers N` spawns fresh interpreters, so every worker rebuilds the course
+recommender and loads its own copy of the sentiment model. This server instead loads
+everything once in the parent and forks the workers afterwards:
+
+* the recommender's vocabulary, CSR matrix, posting lists and catalog arrays are
+  memory-mapped from a compiled artifact (placed on /dev/shm when it has to be
+  compiled), so every worker maps the same physical pages;
+* the Analyzer's weights and the rest of the imported app are inherited
+  copy-on-write, with the garbage collector frozen so it does not dirty them.
+  For that, sentiment inference defaults to SENTIMENT_WORKERS=0 here: each worker
+  runs it on a background thread against the inherited model instead of starting
+  a process pool with private copies.
+
+Forking a process whose torch thread pool is running can deadlock the children, so
+the parent loads the sentiment model with torch limited to one thread and never
+runs inference itself. Workers therefore score on one torch thread each, unless
+SENTIMENT_THREADS is set, which each worker applies after the fork.
+
+Run from the repository root:
+
+    python -m api.serve --workers 4 --port 8000
+
+GET /api/memoryUsage on any worker reports its shared vs private memory.
+"""
+import gc
+import os
+import signal
+import socket
+import shutil
+import argparse
+import tempfile
+import uvicorn
+from dotenv import load_dotenv
+
+
+def prepare_artifact(artifact_dir: str = None) -> tuple:
+    """Return the path of a compiled recommender artifact, compiling one if needed.
+
+    Returns:
+        tuple: (artifact path, temporary directory the caller must remove, or None).
+    """
+    from .course_recommender import CourseRecommender
+
+    artifact_path = artifact_dir or os.getenv("COURSE_ARTIFACT_PATH")
+    if artifact_path and os.path.exists(os.path.join(artifact_path, "manifest.json")):
+        return artifact_path, None
+    temporary_dir = None
+    if not artifact_path:
+        # tmpfs keeps the mapped pages in RAM rather than on disk
+        shm = "/dev/shm" if os.path.isdir("/dev/shm") else None
+        temporary_dir = tempfile.mkdtemp(prefix="psa-course-artifact-", dir=shm)
+        artifact_path = os.path.join(temporary_dir, "model")
+    print(f"Compiling course recommender artifact into {artifact_path}")
+    try:
+        CourseRecommender.from_dataset().save_model(artifact_path)
+    except BaseException:
+        if temporary_dir:
+            shutil.rmtree(temporary_dir, ignore_errors=True)
+        raise
+    return artifact_path, temporary_dir
+
+
+def spawn_worker(app, sock: socket.socket, log_level: str, torch_threads: int = None) -> int:
+    pid = os.fork()
+    if pid:
+        return pid
+    # Child: restore default signal handling and serve on the inherited socket
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    if torch_threads:
+        import torch
+
+        torch.set_num_threads(torch_threads)
+    server = uvicorn.Server(uvicorn.Config(app, log_level=log_level))
+    try:
+        server.run(sockets=[sock])
+    finally:
+        os._exit(0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the API from pre-forked workers sharing model memory")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--artifact-dir", help="Compiled recommender artifact (defaults to COURSE_ARTIFACT_PATH)")
+    parser.add_argument("--log-level", default="info")
+    args = parser.parse_args()
+
+    load_dotenv()
+    if os.getenv("INCREMENTAL_COURSE_INDEX") == "1" and args.workers > 1:
+        # Course updates change only the worker that handles them, so workers would disagree
+        parser.error("INCREMENTAL_COURSE_INDEX=1 keeps the catalog in process memory and does not "
+                     "propagate course updates between workers; run it with --workers 1")
+    artifact_path, temporary_dir = prepare_artifact(args.artifact_dir)
+    os.environ["COURSE_ARTIFACT_PATH"] = artifact_path
+    os.environ.setdefault("SENTIMENT_WORKERS", "0")
+    parent = os.getpid()
+    try:
+        serve(args)
+    finally:
+        # A compiled artifact on tmpfs holds a catalog's worth of RAM; workers never get here
+        if temporary_dir and os.getpid() == parent:
+            shutil.rmtree(temporary_dir, ignore_errors=True)
+
+
+def serve(args):
+    """Load the app once, fork the workers and replace crashed ones until the server is stopped."""
+    # Load the app, the memory-mapped recommender and the Analyzer once, before forking
+    from .index import app, inference_pool
+    if inference_pool.workers == 0:
+        import torch
+        from .inference_pool import preload
+
+        # Forking after torch has started its intra-op (OpenMP) thread pool can deadlock the
+        # children, so the parent loads the model on a single thread and runs no inference.
+        # SENTIMENT_THREADS is applied in each worker after the fork instead.
+        torch.set_num_threads(1)
+        batch_size, window_overlap, backend, num_threads = inference_pool.analyzer_args()
+        preload(batch_size, window_overlap, backend, None)
+        worker_threads = num_threads
+    else:
+        worker_threads = None
+
+    # Move everything allocated so far out of the collector's reach so that collections
+    # in the workers do not write to (and so un-share) the inherited pages
+    gc.collect()
+    gc.freeze()
+
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((args.host, args.port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+
+    workers = {spawn_worker(app, sock, args.log_level, worker_threads) for _ in range(args.workers)}
+    print(f"Serving on http://{args.host}:{args.port} with {len(workers)} workers: {sorted(workers)}")
+
+    stopping = False
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in list(workers):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGTERM, stop)
+
+    while workers:
+        try:
+            pid, _ = os.wait()
+        except ChildProcessError:
+            break
+        except InterruptedError:
+            continue
+        workers.discard(pid)
+        if not stopping:
+            # Replace crashed workers; they re-inherit the already loaded state
+            workers.add(spawn_worker(app, sock, args.log_level, worker_threads))
+    sock.close()
+
+
+if __name__ == "__main__":
+    main()
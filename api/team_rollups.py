@@ -0,0 +1,389 @@
+# team_rollups.py
+"""Per-team feedback rollups: a materialized view of each team's dashboard numbers.
+
+One small document per team holds the feedback count, the sentiment label counts
+of every free-text field and the answer counts (plus score sums for rating
+questions) of every survey question. It is updated incrementally when a feedback
+document is inserted (POST /api/scoreFeedbackSentiment) and rebuilt from the
+Feedback collection when it is missing or stale. To backfill, run from the
+repository root:
+
+    python -m api.team_rollups rebuild            # every team
+    python -m api.team_rollups rebuild --team 1 2
+"""
+import os
+import uuid
+import asyncio
+import argparse
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable, Dict, List
+from dotenv import load_dotenv
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+
+try:
+    from .feedback_repository import (
+        CHOICE_FIELDS,
+        FEEDBACK_COLLECTION,
+        FEEDBACK_TEXT_FIELDS,
+        RATING_SCALES,
+        FeedbackRepository,
+        rating_score,
+    )
+except ImportError:
+    from feedback_repository import (
+        CHOICE_FIELDS,
+        FEEDBACK_COLLECTION,
+        FEEDBACK_TEXT_FIELDS,
+        RATING_SCALES,
+        FeedbackRepository,
+        rating_score,
+    )
+
+TEAM_ROLLUP_COLLECTION = "TeamFeedbackRollup"
+# One marker per feedback document counted in its team's rollup, so an insert is counted once
+TEAM_ROLLUP_APPLIED_COLLECTION = "TeamFeedbackRollupApplied"
+
+SURVEY_FIELDS = list(RATING_SCALES) + CHOICE_FIELDS
+SENTIMENT_LABELS = ("positive", "negative", "neutral")
+
+# Seconds a rebuild may hold a team before another reader may take it over
+REBUILD_LEASE_SECONDS = float(os.getenv("TEAM_ROLLUP_REBUILD_LEASE", "300"))
+REBUILD_POLL_INTERVAL = 0.2
+MARKER_BATCH_SIZE = 1000
+DUPLICATE_KEY = 11000
+
+
+def empty_sentiment_counts() -> dict:
+    return {
+        field: {"positive": 0, "negative": 0, "neutral": 0}
+        for field in FEEDBACK_TEXT_FIELDS
+    }
+
+
+def answer_key(answer: str) -> str:
+    # Answers become field names in the rollup; keep them valid MongoDB field names
+    return answer.replace(".", "．").replace("$", "＄")
+
+
+class TeamRollupStore:
+    """Reads and maintains the rollup document of each team.
+
+    A rollup is only used while it is fresh: computed with the current sentiment
+    model, covering as many feedback documents as the team has, and ending at the
+    team's newest feedback (so a delete plus an insert is not mistaken for no
+    change). Rollups that missed an insert or predate a model change are rebuilt by
+    rebuild_team_rollup, one rebuild per team at a time: the rebuild holds a lease
+    (leaseOwner, leaseExpiresAt) on the team's rollup document.
+    """
+
+    def __init__(self, collection, applied_collection, lease_seconds: float = REBUILD_LEASE_SECONDS):
+        self.collection = collection
+        self.applied_collection = applied_collection
+        self.lease_seconds = lease_seconds
+
+    async def get_fresh(self, team_number: int, model_id: str, feedback_count: int, latest_created_at) -> dict:
+        """Return the team's rollup if it is fresh, else None.
+
+        Args:
+            team_number (int): The team.
+            model_id (str): Identifier of the current sentiment model.
+            feedback_count (int): Number of feedback documents the team has.
+            latest_created_at: createdAt of the team's newest feedback, or None if it has none.
+        """
+        rollup = await self.collection.find_one({"_id": team_number})
+        if (
+            rollup is None
+            or rollup.get("model") != model_id
+            or rollup.get("totalCount") != feedback_count
+            or rollup.get("lastCreatedAt") != latest_created_at
+        ):
+            return None
+        return rollup
+
+    async def acquire_rebuild_lease(self, team_number: int) -> str:
+        """Take the team's rebuild lease. Returns the lease owner id, or None while another rebuild holds it."""
+        owner = uuid.uuid4().hex
+        now = datetime.now(timezone.utc)
+        try:
+            await self.collection.update_one(
+                {"_id": team_number, "$or": [{"leaseOwner": None}, {"leaseExpiresAt": {"$lt": now}}]},
+                {"$set": {"leaseOwner": owner, "leaseExpiresAt": now + timedelta(seconds=self.lease_seconds)}},
+                upsert=True,
+            )
+        except DuplicateKeyError:
+            # The document exists and its lease is live
+            return None
+        return owner
+
+    async def release_rebuild_lease(self, team_number: int, owner: str):
+        await self.collection.update_one(
+            {"_id": team_number, "leaseOwner": owner},
+            {"$unset": {"leaseOwner": "", "leaseExpiresAt": ""}},
+        )
+
+    async def wait_for_rebuild(self, team_number: int) -> dict:
+        """Wait for the rebuild holding the team's lease to end.
+
+        Returns:
+            dict: The rollup that rebuild stored, or None if it failed or its lease ran out.
+        """
+        waited_for = None
+        while True:
+            rollup = await self.collection.find_one({"_id": team_number})
+            owner = rollup.get("leaseOwner") if rollup is not None else None
+            if owner is None:
+                if waited_for is not None and rollup is not None and rollup.get("rebuiltBy") == waited_for:
+                    return rollup
+                return None
+            waited_for = owner
+            expires_at = rollup["leaseExpiresAt"]
+            if expires_at.tzinfo is None:
+                expires_at = expires_at.replace(tzinfo=timezone.utc)
+            if expires_at < datetime.now(timezone.utc):
+                return None
+            await asyncio.sleep(REBUILD_POLL_INTERVAL)
+
+    async def apply_feedback(self, feedback: dict, labels: Dict[str, str], model_id: str) -> bool:
+        """Add one newly inserted feedback document to its team's rollup.
+
+        Args:
+            feedback (dict): The feedback document, with teamNumber, createdAt and its survey fields.
+            labels (Dict[str, str]): Sentiment label per free-text field of the document.
+            model_id (str): Identifier of the model that produced the labels.
+
+        Returns:
+            bool: False if the document was already counted, has no team, or the
+            team's rollup was built with another model (it is rebuilt on its next read).
+        """
+        team_number = feedback.get("teamNumber")
+        if team_number is None:
+            return False
+        try:
+            await self.applied_collection.insert_one({"_id": feedback["_id"], "teamNumber": team_number})
+        except DuplicateKeyError:
+            return False
+
+        increments = {"totalCount": 1}
+        update = {
+            "$inc": increments,
+            "$set": {"updatedAt": datetime.now(timezone.utc)},
+            "$setOnInsert": {"teamNumber": team_number},
+        }
+        if feedback.get("createdAt") is not None:
+            update["$max"] = {"lastCreatedAt": feedback["createdAt"]}
+        for field, label in labels.items():
+            increments[f"sentimentCounts.{field}.{label}"] = 1
+        for field in SURVEY_FIELDS:
+            answer = feedback.get(field)
+            if not answer:
+                continue
+            increments[f"survey.{field}.{answer_key(answer)}"] = 1
+            score = rating_score(field, answer)
+            if score is not None:
+                increments[f"ratings.{field}.answered"] = 1
+                increments[f"ratings.{field}.scoreSum"] = score
+
+        try:
+            await self.collection.update_one({"_id": team_number, "model": model_id}, update, upsert=True)
+        except DuplicateKeyError:
+            # A rollup built with another model (or being built) exists; leave it for the rebuild
+            return False
+        return True
+
+    async def mark_applied(self, team_number: int, feedback_ids: List):
+        """Record that the feedback documents are counted in the team's rollup.
+
+        Upserts, so markers a concurrent rebuild or apply_feedback already wrote are
+        left as they are instead of failing the write.
+        """
+        for start in range(0, len(feedback_ids), MARKER_BATCH_SIZE):
+            operations = [
+                UpdateOne({"_id": feedback_id}, {"$set": {"teamNumber": team_number}}, upsert=True)
+                for feedback_id in feedback_ids[start:start + MARKER_BATCH_SIZE]
+            ]
+            try:
+                await self.applied_collection.bulk_write(operations, ordered=False)
+            except BulkWriteError as e:
+                # Two upserts of the same new id can race; the loser's marker exists anyway
+                if any(error.get("code") != DUPLICATE_KEY for error in e.details.get("writeErrors", [])):
+                    raise
+
+    async def store_team(self, team_number: int, feedback_ids: List, sentiment_counts: dict,
+                         survey_counts: Dict[str, Dict[str, int]], model_id: str,
+                         last_created_at=None, lease_owner: str = None) -> dict:
+        """Replace a team's rollup with one computed from all of its feedback.
+
+        With `lease_owner`, the rollup is only written while that rebuild still
+        holds the team's lease, and writing it releases the lease.
+        """
+        ratings = {}
+        for field in RATING_SCALES:
+            scored = [
+                (rating_score(field, answer), count)
+                for answer, count in survey_counts.get(field, {}).items()
+                if rating_score(field, answer) is not None
+            ]
+            ratings[field] = {
+                "answered": sum(count for _, count in scored),
+                "scoreSum": sum(score * count for score, count in scored),
+            }
+        rollup = {
+            "_id": team_number,
+            "teamNumber": team_number,
+            "model": model_id,
+            "totalCount": len(feedback_ids),
+            "lastCreatedAt": last_created_at,
+            "sentimentCounts": sentiment_counts,
+            "survey": {
+                field: {answer_key(answer): count for answer, count in survey_counts.get(field, {}).items()}
+                for field in SURVEY_FIELDS
+            },
+            "ratings": ratings,
+            "rebuiltBy": lease_owner,
+            "updatedAt": datetime.now(timezone.utc),
+        }
+
+        # Markers of feedback deleted since are left behind; they are never matched again
+        await self.mark_applied(team_number, feedback_ids)
+        if lease_owner is None:
+            await self.collection.replace_one({"_id": team_number}, rollup, upsert=True)
+        else:
+            await self.collection.replace_one({"_id": team_number, "leaseOwner": lease_owner}, rollup)
+        return rollup
+
+
+def rollup_summary(rollup: dict) -> dict:
+    """The dashboard view of a rollup: counts, sentiment counts and survey averages."""
+    sentiment_counts = empty_sentiment_counts()
+    for field, counts in rollup.get("sentimentCounts", {}).items():
+        for label in SENTIMENT_LABELS:
+            sentiment_counts.setdefault(field, {})[label] = counts.get(label, 0)
+
+    survey = {}
+    for field in SURVEY_FIELDS:
+        survey[field] = {"counts": dict(rollup.get("survey", {}).get(field, {}))}
+        if field in RATING_SCALES:
+            rating = rollup.get("ratings", {}).get(field, {})
+            answered = rating.get("answered", 0)
+            survey[field]["answered"] = answered
+            survey[field]["scale"] = len(RATING_SCALES[field])
+            survey[field]["average"] = rating.get("scoreSum", 0) / answered if answered else None
+
+    return {
+        "team_number": rollup["teamNumber"],
+        "total_count": rollup.get("totalCount", 0),
+        "sentiment_counts": sentiment_counts,
+        "survey": survey,
+        "updated_at": rollup.get("updatedAt"),
+    }
+
+
+async def rebuild_team_rollup(team_number: int, feedback: FeedbackRepository, rollups: TeamRollupStore,
+                              score: Callable[[list], Awaitable[dict]], model_id: str) -> dict:
+    """Recompute a team's rollup from its Feedback documents.
+
+    Only one rebuild of a team runs at a time; a concurrent call waits for it and
+    returns its rollup instead of scanning the team again.
+
+    Args:
+        team_number (int): The team to rebuild.
+        feedback (FeedbackRepository): Reads the team's feedback.
+        rollups (TeamRollupStore): Where the rollup is stored.
+        score: Coroutine function returning the label per (feedback id, field) of
+            (feedback id, field, text) responses.
+        model_id (str): Identifier of the model `score` uses.
+
+    Returns:
+        dict: The stored rollup document.
+    """
+    while True:
+        lease_owner = await rollups.acquire_rebuild_lease(team_number)
+        if lease_owner is not None:
+            break
+        rollup = await rollups.wait_for_rebuild(team_number)
+        if rollup is not None and rollup.get("model") == model_id:
+            return rollup
+        # The other rebuild failed or its lease ran out; take the team over
+
+    try:
+        return await _rebuild_team_rollup(team_number, feedback, rollups, score, model_id, lease_owner)
+    except BaseException:
+        await asyncio.shield(rollups.release_rebuild_lease(team_number, lease_owner))
+        raise
+
+
+async def _rebuild_team_rollup(team_number: int, feedback: FeedbackRepository, rollups: TeamRollupStore,
+                               score: Callable[[list], Awaitable[dict]], model_id: str, lease_owner: str) -> dict:
+    sentiment_counts = empty_sentiment_counts()
+    feedback_ids = []
+    last_created_at = None
+    survey_counts = {field: {} for field in SURVEY_FIELDS}
+    fields = FEEDBACK_TEXT_FIELDS + SURVEY_FIELDS + ["createdAt"]
+    async for feedback_batch in feedback.iter_team_feedback(team_number, fields):
+        responses = []
+        for item in feedback_batch:
+            feedback_ids.append(item["_id"])
+            if item.get("createdAt") is not None and (last_created_at is None or item["createdAt"] > last_created_at):
+                last_created_at = item["createdAt"]
+            responses.extend((item["_id"], field, item[field]) for field in FEEDBACK_TEXT_FIELDS if item.get(field))
+            for field in SURVEY_FIELDS:
+                if item.get(field):
+                    survey_counts[field][item[field]] = survey_counts[field].get(item[field], 0) + 1
+
+        labels = await score(responses)
+        for feedback_id, field, _ in responses:
+            sentiment_counts[field][labels[(feedback_id, field)]] += 1
+
+    return await rollups.store_team(team_number, feedback_ids, sentiment_counts, survey_counts, model_id,
+                                    last_created_at=last_created_at, lease_owner=lease_owner)
+
+
+async def rebuild(team_numbers: List[int] = None):
+    """Rebuild the rollups of the given teams (default: every team with feedback)."""
+    from .resources import Resources, Settings
+    from .inference_pool import InferencePool
+    from .sentiment_store import SENTIMENT_COLLECTION, SentimentStore, iter_response_sentiments
+
+    resources = Resources(Settings.from_env())
+    # Score in a background thread of this process; the store still serves known labels
+    pool = InferencePool(workers=0, batch_size=int(os.getenv("SENTIMENT_BATCH_SIZE", "32")),
+                         window_overlap=int(os.getenv("SENTIMENT_WINDOW_OVERLAP", "0")),
+                         backend=os.getenv("SENTIMENT_BACKEND", "fp32"),
+                         num_threads=int(os.getenv("SENTIMENT_THREADS", "0")) or None,
+                         max_queued_jobs=10**9)
+    try:
+        db = resources.db
+        feedback = FeedbackRepository(db[FEEDBACK_COLLECTION])
+        store = SentimentStore(db[SENTIMENT_COLLECTION])
+        rollups = TeamRollupStore(db[TEAM_ROLLUP_COLLECTION], db[TEAM_ROLLUP_APPLIED_COLLECTION])
+
+        async def score(responses):
+            labels = {}
+            async for batch in iter_response_sentiments(responses, store, pool):
+                labels.update(batch)
+            return labels
+
+        if not team_numbers:
+            team_numbers = [team for team in await db[FEEDBACK_COLLECTION].distinct("teamNumber") if team is not None]
+        for team_number in team_numbers:
+            rollup = await rebuild_team_rollup(team_number, feedback, rollups, score, pool.model_id)
+            print(f"Team {team_number}: {rollup['totalCount']} feedback")
+    finally:
+        pool.shutdown()
+        await resources.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Maintain the per-team feedback rollups")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    rebuild_parser = subparsers.add_parser("rebuild", help="Recompute rollups from the Feedback collection")
+    rebuild_parser.add_argument("--team", type=int, nargs="+", help="Teams to rebuild (default: all)")
+    args = parser.parse_args()
+
+    load_dotenv()
+    asyncio.run(rebuild(args.team))
+
+
+if __name__ == "__main__":
+    main()
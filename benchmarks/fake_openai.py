@@ -0,0 +1,256 @@
+# fake_openai.py
+"""A local stand-in for the OpenAI API, for offline load tests.
+
+Answers POST /v1/chat/completions (plain and streamed) after a configurable
+latency, rejects a share of requests with 429 and Retry-After, and counts the
+requests it has seen at GET /stats. It also serves the Assistants endpoints the
+mentor bot uses: creating threads and runs, retrieving and cancelling runs, and
+listing a thread's messages. A run completes `latency` seconds after it starts,
+with an assistant message holding three fake mentors. Point the backend or the
+bot at it with OPENAI_BASE_URL:
+
+    python -m benchmarks.fake_openai --port 8765 --latency 0.5 --rate-limit 0.1
+    OPENAI_BASE_URL=http://127.0.0.1:8765/v1 OPENAI_API_KEY=fake python -m benchmarks.fake_openai load --calls 200
+"""
+import json
+import time
+import random
+import asyncio
+import argparse
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+REPLY = '{"summary_of_report": "Fake report", "positive_points_employee_wellbeing": []}'
+MENTOR_REPLY = "```json\n" + json.dumps({"list_of_mentors": [
+    {
+        "name": f"Mentor {number}",
+        "field": "Data",
+        "role": "Data Scientist",
+        "specialized_field": "Machine Learning",
+        "experience_years": 5 + number,
+        "email": f"mentor{number}@example.com",
+        "reason_for_recommendation": "A fake match from the local server.",
+    }
+    for number in range(1, 4)
+]}) + "\n```"
+
+
+def create_app(latency: float = 0.2, rate_limit: float = 0.0, retry_after: float = 0.1) -> FastAPI:
+    app = FastAPI()
+    counters = {"requests": 0, "rate_limited": 0, "in_flight": 0, "peak_in_flight": 0, "runs": 0, "run_polls": 0}
+    threads = {}  # thread id -> messages, oldest first
+    runs = {}  # run id -> run
+
+    def rejected():
+        # Counts the request; a 429 response for the share of requests that are rate limited
+        counters["requests"] += 1
+        if random.random() < rate_limit:
+            counters["rate_limited"] += 1
+            return JSONResponse(
+                {"error": {"message": "Rate limit reached", "type": "requests", "code": "rate_limit_exceeded"}},
+                status_code=429, headers={"retry-after": str(retry_after)},
+            )
+        return None
+
+    def not_found(what: str):
+        return JSONResponse({"error": {"message": f"No {what} found", "type": "invalid_request_error"}}, status_code=404)
+
+    def add_message(thread_id: str, role: str, content: str, run_id: str = None):
+        messages = threads.setdefault(thread_id, [])
+        messages.append({
+            "id": f"msg_fake_{thread_id}_{len(messages)}",
+            "object": "thread.message",
+            "created_at": int(time.time()),
+            "thread_id": thread_id,
+            "role": role,
+            "content": [{"type": "text", "text": {"value": content, "annotations": []}}],
+            "run_id": run_id,
+            "assistant_id": None,
+            "attachments": [],
+            "metadata": {},
+        })
+
+    def start_run(thread_id: str, body: dict) -> dict:
+        counters["runs"] += 1
+        for message in body.get("additional_messages") or []:
+            add_message(thread_id, message["role"], message["content"])
+        run = {
+            "id": f"run_fake_{counters['runs']}",
+            "object": "thread.run",
+            "created_at": int(time.time()),
+            "thread_id": thread_id,
+            "assistant_id": body.get("assistant_id"),
+            "status": "queued",
+            "instructions": body.get("instructions") or "",
+            "model": "fake",
+            "tools": [],
+            "metadata": {},
+            "parallel_tool_calls": True,
+            "started": time.monotonic(),
+        }
+        runs[run["id"]] = run
+        return run
+
+    def run_view(run: dict) -> dict:
+        if run["status"] in ("queued", "in_progress"):
+            if time.monotonic() - run["started"] >= latency:
+                run["status"] = "completed"
+                add_message(run["thread_id"], "assistant", MENTOR_REPLY, run["id"])
+            else:
+                run["status"] = "in_progress"
+        return {key: value for key, value in run.items() if key != "started"}
+
+    @app.get("/stats")
+    def stats():
+        return counters
+
+    @app.post("/v1/threads/runs")
+    async def create_thread_and_run(request: Request):
+        body = await request.json()
+        response = rejected()
+        if response is not None:
+            return response
+        thread_id = f"thread_fake_{len(threads) + 1}"
+        threads[thread_id] = []
+        for message in (body.get("thread") or {}).get("messages") or []:
+            add_message(thread_id, message["role"], message["content"])
+        return run_view(start_run(thread_id, body))
+
+    @app.post("/v1/threads/{thread_id}/runs")
+    async def create_run(thread_id: str, request: Request):
+        body = await request.json()
+        response = rejected()
+        if response is not None:
+            return response
+        if thread_id not in threads:
+            return not_found(f"thread with id '{thread_id}'")
+        if any(run["thread_id"] == thread_id and run["status"] in ("queued", "in_progress") for run in runs.values()):
+            return JSONResponse({"error": {"message": f"Thread {thread_id} already has an active run",
+                                           "type": "invalid_request_error"}}, status_code=400)
+        return run_view(start_run(thread_id, body))
+
+    @app.get("/v1/threads/{thread_id}/runs/{run_id}")
+    async def retrieve_run(thread_id: str, run_id: str):
+        response = rejected()
+        if response is not None:
+            return response
+        counters["run_polls"] += 1
+        run = runs.get(run_id)
+        if run is None or run["thread_id"] != thread_id:
+            return not_found(f"run with id '{run_id}'")
+        return run_view(run)
+
+    @app.post("/v1/threads/{thread_id}/runs/{run_id}/cancel")
+    async def cancel_run(thread_id: str, run_id: str):
+        response = rejected()
+        if response is not None:
+            return response
+        run = runs.get(run_id)
+        if run is None or run["thread_id"] != thread_id:
+            return not_found(f"run with id '{run_id}'")
+        if run_view(run)["status"] in ("queued", "in_progress"):
+            run["status"] = "cancelled"
+        return run_view(run)
+
+    @app.get("/v1/threads/{thread_id}/messages")
+    async def list_messages(thread_id: str, run_id: str = None, order: str = "desc", limit: int = 20):
+        response = rejected()
+        if response is not None:
+            return response
+        if thread_id not in threads:
+            return not_found(f"thread with id '{thread_id}'")
+        messages = [message for message in threads[thread_id] if run_id is None or message["run_id"] == run_id]
+        if order == "desc":
+            messages = messages[::-1]
+        messages = messages[:limit]
+        return {
+            "object": "list",
+            "data": messages,
+            "first_id": messages[0]["id"] if messages else None,
+            "last_id": messages[-1]["id"] if messages else None,
+            "has_more": False,
+        }
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        response = rejected()
+        if response is not None:
+            return response
+
+        counters["in_flight"] += 1
+        counters["peak_in_flight"] = max(counters["peak_in_flight"], counters["in_flight"])
+        try:
+            await asyncio.sleep(latency)
+        finally:
+            counters["in_flight"] -= 1
+
+        prompt_tokens = sum(len(message.get("content") or "") for message in body.get("messages", [])) // 4
+        completion = {
+            "id": f"chatcmpl-fake-{counters['requests']}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "fake"),
+        }
+        usage = {"prompt_tokens": prompt_tokens, "completion_tokens": len(REPLY) // 4,
+                 "total_tokens": prompt_tokens + len(REPLY) // 4}
+        if not body.get("stream"):
+            return {
+                **completion,
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": REPLY}, "finish_reason": "stop"}],
+                "usage": usage,
+            }
+
+        async def chunks():
+            for start in range(0, len(REPLY), 16):
+                delta = {"content": REPLY[start:start + 16]}
+                chunk = {**completion, "object": "chat.completion.chunk",
+                         "choices": [{"index": 0, "delta": delta, "finish_reason": None}]}
+                yield f"data: {json.dumps(chunk)}\n\n"
+            if (body.get("stream_options") or {}).get("include_usage"):
+                yield f"data: {json.dumps({**completion, 'object': 'chat.completion.chunk', 'choices': [], 'usage': usage})}\n\n"
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(chunks(), media_type="text/event-stream")
+
+    return app
+
+
+async def load(calls: int):
+    """Send `calls` concurrent chat completions through the shared LLMClient and print its stats."""
+    from llm_client import LLMClient
+
+    client = LLMClient()
+    start = time.perf_counter()
+    results = await asyncio.gather(*(
+        client.chat(model="gpt-4o-mini", messages=[{"role": "user", "content": f"Call {number}"}])
+        for number in range(calls)
+    ), return_exceptions=True)
+    elapsed = time.perf_counter() - start
+    await client.close()
+    failed = sum(isinstance(result, Exception) for result in results)
+    print(f"{calls} calls in {elapsed:.2f}s, {failed} failed")
+    print(json.dumps(client.stats(), indent=2))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fake OpenAI chat completions server")
+    parser.add_argument("command", nargs="?", choices=["serve", "load"], default="serve")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.2, help="Seconds before each answer")
+    parser.add_argument("--rate-limit", type=float, default=0.0, help="Share of requests answered with 429")
+    parser.add_argument("--retry-after", type=float, default=0.1, help="Retry-After of 429 answers, in seconds")
+    parser.add_argument("--calls", type=int, default=100, help="Concurrent calls made by `load`")
+    args = parser.parse_args()
+
+    if args.command == "load":
+        asyncio.run(load(args.calls))
+        return
+
+    import uvicorn
+
+    uvicorn.run(create_app(args.latency, args.rate_limit, args.retry_after), host="127.0.0.1", port=args.port)
+
+
+if __name__ == "__main__":
+    main()
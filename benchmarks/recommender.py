@@ -0,0 +1,244 @@
+# recommender.py
+"""Offline benchmark suite for the course recommender.
+
+Generates synthetic Coursera-like catalogs and feeds them to CourseRecommender in
+place of kagglehub.dataset_download, so no network access is needed. For each
+catalog size it records build time and peak RSS, artifact load time, `recommend`
+latency percentiles and request throughput through the FastAPI app (api/app.py)
+with an in-process client. Results are written as JSON so runs can be compared
+between commits.
+
+Run from the repository root:
+
+    python -m benchmarks.recommender run --sizes 891 10000 100000 --output bench-new.json
+    python -m benchmarks.recommender compare bench-old.json bench-new.json --threshold 0.1
+"""
+import os
+import sys
+import json
+import time
+import platform
+import argparse
+import resource
+import subprocess
+import tempfile
+import multiprocessing
+from datetime import datetime, timezone
+from unittest import mock
+from urllib.parse import quote
+import numpy as np
+import pandas as pd
+
+RESULTS_SCHEMA_VERSION = 1
+API_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'api')
+
+# Metrics compared by `compare`; True when higher is better
+METRICS = {
+    'build_seconds': False,
+    'peak_rss_mb': False,
+    'artifact_load_ms': False,
+    'recommend_p50_ms': False,
+    'recommend_p95_ms': False,
+    'recommend_p99_ms': False,
+    'recommend_dataframe_p50_ms': False,
+    'endpoint_p50_ms': False,
+    'endpoint_p99_ms': False,
+    'endpoint_throughput_rps': True,
+}
+
+
+def percentiles(latencies) -> dict:
+    latencies = np.asarray(latencies) * 1000
+    return {p: float(np.percentile(latencies, q)) for p, q in (('p50', 50), ('p95', 95), ('p99', 99))}
+
+
+def seed_language_cache(dataset_dir: str, path: str):
+    """Label every synthetic title as English, as a warm LanguageCache would."""
+    from api.preprocessing import LanguageCache
+
+    cache = LanguageCache(path)
+    titles = pd.read_csv(os.path.join(dataset_dir, 'coursea_data.csv'), usecols=['course_title'])['course_title']
+    cache.labels.update({LanguageCache.key(title): 'en' for title in titles.astype(str)})
+    cache.save()
+
+
+def run_size(size: int, vocab_size: int, n_queries: int, n_requests: int, detect_language: bool, seed: int) -> dict:
+    """Benchmark one catalog size. Runs in a fresh process so peak RSS is per build."""
+    from api import course_recommender
+    from api.course_recommender import CourseRecommender
+    from benchmarks.synthetic import make_queries, write_coursera_csv
+
+    result = {'courses': size, 'vocab_size': vocab_size}
+    with tempfile.TemporaryDirectory() as workdir:
+        dataset_dir = write_coursera_csv(workdir, size, vocab_size=vocab_size, seed=seed)
+        language_cache = os.path.join(workdir, 'language_cache.json')
+        if not detect_language:
+            seed_language_cache(dataset_dir, language_cache)
+
+        rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        with mock.patch.object(course_recommender.kagglehub, 'dataset_download', return_value=dataset_dir):
+            start = time.perf_counter()
+            model = CourseRecommender.from_dataset(language_cache)
+            result['build_seconds'] = time.perf_counter() - start
+        # ru_maxrss is in kB on Linux
+        result['peak_rss_mb'] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        result['baseline_rss_mb'] = rss_before / 1024
+        result['indexed_courses'] = int(model.vectors.shape[0])
+        result['build_stages_ms'] = {stage: seconds * 1000 for stage, seconds in model.build_timings.items()}
+
+        artifact = os.path.join(workdir, 'model')
+        model.save_model(artifact)
+        start = time.perf_counter()
+        model = CourseRecommender.load_model(artifact)
+        result['artifact_load_ms'] = (time.perf_counter() - start) * 1000
+
+        catalog = pd.DataFrame({'course_title': np.asarray(model.catalog['course_title'])})
+        queries = make_queries(catalog, n_queries, seed=seed + 1)
+        for name, recommend in (('recommend', model.recommend_columns), ('recommend_dataframe', model.recommend)):
+            recommend(queries[0])
+            latencies = []
+            for query in queries:
+                start = time.perf_counter()
+                recommend(query)
+                latencies.append(time.perf_counter() - start)
+            for p, value in percentiles(latencies).items():
+                result[f'{name}_{p}_ms'] = value
+
+        result.update(benchmark_endpoint(artifact, queries, n_requests))
+    return result
+
+
+def benchmark_endpoint(artifact: str, queries: list, n_requests: int) -> dict:
+    """Drive POST /recommendations/{keywords} of api/app.py through an in-process client."""
+    from fastapi.testclient import TestClient
+
+    os.environ['COURSE_ARTIFACT_PATH'] = artifact
+    sys.path.insert(0, API_DIR)
+    import app as recommendations_app
+
+    client = TestClient(recommendations_app.app)
+    paths = [f"/recommendations/{quote(query, safe='')}" for query in queries]
+    client.post(paths[0]).raise_for_status()
+    latencies = []
+    start = time.perf_counter()
+    for i in range(n_requests):
+        request_start = time.perf_counter()
+        client.post(paths[i % len(paths)]).raise_for_status()
+        latencies.append(time.perf_counter() - request_start)
+    elapsed = time.perf_counter() - start
+    result = {f'endpoint_{p}_ms': value for p, value in percentiles(latencies).items()}
+    result['endpoint_throughput_rps'] = n_requests / elapsed
+    return result
+
+
+def _run_in_child(queue, kwargs):
+    try:
+        queue.put(('ok', run_size(**kwargs)))
+    except Exception as e:
+        queue.put(('error', repr(e)))
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.check_output(['git', 'rev-parse', 'HEAD'], text=True, stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def run(args):
+    context = multiprocessing.get_context('spawn')
+    report = {
+        'schema_version': RESULTS_SCHEMA_VERSION,
+        'commit': git_commit(),
+        'timestamp': datetime.now(timezone.utc).isoformat(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'config': {
+            'vocab_size': args.vocab_size,
+            'queries': args.queries,
+            'requests': args.requests,
+            'detect_language': args.detect_language,
+            'seed': args.seed,
+        },
+        'results': [],
+    }
+    for size in args.sizes:
+        queue = context.Queue()
+        kwargs = dict(size=size, vocab_size=args.vocab_size, n_queries=args.queries,
+                      n_requests=args.requests, detect_language=args.detect_language, seed=args.seed)
+        process = context.Process(target=_run_in_child, args=(queue, kwargs))
+        process.start()
+        status, result = queue.get()
+        process.join()
+        if status != 'ok':
+            raise RuntimeError(f"Benchmark for {size} courses failed: {result}")
+        report['results'].append(result)
+        print(
+            f"{size:>9} courses: build {result['build_seconds']:.2f}s, peak RSS {result['peak_rss_mb']:.0f} MB, "
+            f"load {result['artifact_load_ms']:.1f} ms, recommend p50/p95/p99 "
+            f"{result['recommend_p50_ms']:.2f}/{result['recommend_p95_ms']:.2f}/{result['recommend_p99_ms']:.2f} ms, "
+            f"endpoint {result['endpoint_throughput_rps']:.0f} req/s"
+        )
+
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(report, file, indent=2)
+        print(f"Wrote {args.output}")
+
+
+def compare(args):
+    with open(args.baseline) as file:
+        baseline = json.load(file)
+    with open(args.candidate) as file:
+        candidate = json.load(file)
+    baseline_by_size = {result['courses']: result for result in baseline['results']}
+
+    print(f"baseline {baseline['commit'][:10]} vs candidate {candidate['commit'][:10]}")
+    regressions = []
+    for result in candidate['results']:
+        before = baseline_by_size.get(result['courses'])
+        if before is None:
+            continue
+        print(f"\n{result['courses']} courses")
+        for metric, higher_is_better in METRICS.items():
+            if metric not in result or metric not in before or not before[metric]:
+                continue
+            change = (result[metric] - before[metric]) / before[metric]
+            worse = -change if higher_is_better else change
+            flag = 'REGRESSION' if worse > args.threshold else ''
+            print(f"  {metric:<28} {before[metric]:>12.3f} -> {result[metric]:>12.3f}  {change:>+8.1%} {flag}")
+            if flag:
+                regressions.append((result['courses'], metric))
+    if regressions:
+        print(f"\n{len(regressions)} metric(s) regressed by more than {args.threshold:.0%}")
+        sys.exit(1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Offline course recommender benchmarks')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = subparsers.add_parser('run', help='Run the benchmarks')
+    run_parser.add_argument('--sizes', type=int, nargs='+', default=[891, 10_000, 100_000])
+    run_parser.add_argument('--vocab-size', type=int, default=5000)
+    run_parser.add_argument('--queries', type=int, default=500, help='Queries timed against recommend')
+    run_parser.add_argument('--requests', type=int, default=500, help='Requests sent through the FastAPI app')
+    run_parser.add_argument('--detect-language', action='store_true',
+                            help='Run language detection on every title instead of pre-seeding the cache')
+    run_parser.add_argument('--seed', type=int, default=0)
+    run_parser.add_argument('--output', help='Write results as JSON to this file')
+
+    compare_parser = subparsers.add_parser('compare', help='Compare two result files')
+    compare_parser.add_argument('baseline')
+    compare_parser.add_argument('candidate')
+    compare_parser.add_argument('--threshold', type=float, default=0.1, help='Relative change counted as a regression')
+
+    args = parser.parse_args()
+    if args.command == 'run':
+        run(args)
+    else:
+        compare(args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+# retrieval_scaling.py
+"""Compare exhaustive cosine scoring with the inverted index as the catalog grows.
+
+Run from the repository root:
+
+    python -m benchmarks.retrieval_scaling --sizes 891 10000 100000 1000000
+"""
+import argparse
+import time
+import numpy as np
+from sklearn.metrics.pairwise import cosine_similarity
+
+from api.course_recommender import CourseRecommender
+from benchmarks.synthetic import make_catalog, make_queries
+
+# Number of courses in the Kaggle Coursera dataset
+COURSERA_SIZE = 891
+
+
+def time_queries(fn, queries):
+    latencies = []
+    for query in queries:
+        start = time.perf_counter()
+        fn(query)
+        latencies.append(time.perf_counter() - start)
+    return np.array(latencies) * 1000
+
+
+def exhaustive_rows(model, query, k):
+    scores = cosine_similarity(model.vectors, model.vectorizer.transform([query])).ravel()
+    return scores, np.argsort(scores)[-k:]
+
+
+def check_parity(model, queries, k):
+    """Count queries where the index disagrees with the exhaustive ranking.
+
+    Only courses with a positive score are compared: which zero-score courses pad
+    out the exhaustive ranking depends on argsort's tie order.
+    """
+    mismatches = 0
+    for query in queries:
+        scores, expected = exhaustive_rows(model, query, k)
+        rows, _ = model.index.top_k(model.vectorizer.transform([query]), k)
+        expected_scores = np.sort(scores[expected])[::-1]
+        got_scores = scores[rows]
+        positive = expected_scores > 0
+        if not np.allclose(np.sort(got_scores)[::-1][positive], expected_scores[positive]):
+            mismatches += 1
+    return mismatches
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[COURSERA_SIZE, 10_000, 100_000, 1_000_000])
+    parser.add_argument('--vocab-size', type=int, default=20_000)
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--k', type=int, default=10)
+    args = parser.parse_args()
+
+    print(f"{'courses':>10} {'build s':>8} {'exhaustive p50 ms':>18} {'index p50 ms':>13} {'index p99 ms':>13} {'speedup':>8} {'mismatches':>10}")
+    for size in args.sizes:
+        catalog = make_catalog(size, vocab_size=min(args.vocab_size, max(size, 500)))
+        start = time.perf_counter()
+        model = CourseRecommender.from_catalog(catalog)
+        build = time.perf_counter() - start
+        queries = make_queries(catalog, args.queries)
+
+        exhaustive = time_queries(lambda q: exhaustive_rows(model, q, args.k), queries)
+        indexed = time_queries(lambda q: model.index.top_k(model.vectorizer.transform([q]), args.k), queries)
+        mismatches = check_parity(model, queries[:50], args.k)
+
+        print(
+            f"{size:>10} {build:>8.1f} {np.median(exhaustive):>18.2f} {np.median(indexed):>13.2f} "
+            f"{np.percentile(indexed, 99):>13.2f} {np.median(exhaustive) / np.median(indexed):>7.1f}x {mismatches:>10}"
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,160 @@
+# sentiment_quantization.py
+"""Accuracy-versus-latency comparison of the sentiment Analyzer backends.
+
+Scores a labelled sample feedback corpus (benchmarks/data/sample_feedback.jsonl)
+with each backend of api.analyzer.Analyzer (fp32 and dynamically quantized int8)
+and reports, per backend:
+
+* accuracy against the corpus labels and agreement with the fp32 labels;
+* single-window latency percentiles and batched throughput;
+* model load time, serialized model size and peak RSS.
+
+Each backend runs in a fresh process so load time and peak RSS are its own. The
+model is downloaded from the Hugging Face hub on first use. Run from the
+repository root:
+
+    python -m benchmarks.sentiment_quantization --threads 4 --output benchmarks/results/sentiment-cpu.json
+"""
+import io
+import os
+import json
+import time
+import platform
+import argparse
+import resource
+import multiprocessing
+from datetime import datetime, timezone
+import numpy as np
+
+RESULTS_SCHEMA_VERSION = 1
+DEFAULT_CORPUS = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'sample_feedback.jsonl')
+
+
+def load_corpus(path: str) -> list:
+    with open(path, encoding='utf-8') as file:
+        return [json.loads(line) for line in file if line.strip()]
+
+
+def percentiles(latencies) -> dict:
+    latencies = np.asarray(latencies) * 1000
+    return {p: float(np.percentile(latencies, q)) for p, q in (('p50', 50), ('p95', 95), ('p99', 99))}
+
+
+def model_size_mb(model) -> float:
+    """Size of the serialized state dict; packed int8 weights are counted as stored."""
+    import torch
+
+    buffer = io.BytesIO()
+    torch.save(model.state_dict(), buffer)
+    return buffer.tell() / 1024 / 1024
+
+
+def run_backend(backend: str, corpus_path: str, threads: int, batch_size: int, repeats: int) -> dict:
+    """Benchmark one backend. Runs in a fresh process."""
+    from api.analyzer import Analyzer
+
+    corpus = load_corpus(corpus_path)
+    result = {'backend': backend}
+
+    start = time.perf_counter()
+    analyzer = Analyzer(batch_size=batch_size, backend=backend, num_threads=threads or None)
+    result['load_seconds'] = time.perf_counter() - start
+    result['model_size_mb'] = model_size_mb(analyzer.sentiment_model.model)
+
+    window_labels = analyzer.get_response_window_sentiments([example['text'] for example in corpus])
+    windows = [window for example in corpus for window in analyzer.iter_windows(example['text'])]
+    result['windows'] = len(windows)
+    # Majority vote over windows, ties broken as find_highest_sentiment does
+    result['labels'] = [max(('positive', 'negative', 'neutral'), key=labels.count) for labels in window_labels]
+
+    # One window per forward pass: the latency a single short response sees
+    analyzer.get_window_sentiments(windows[:1], batch_size=1)
+    latencies = []
+    for _ in range(repeats):
+        for window in windows:
+            start = time.perf_counter()
+            analyzer.get_window_sentiments([window], batch_size=1)
+            latencies.append(time.perf_counter() - start)
+    for p, value in percentiles(latencies).items():
+        result[f'window_{p}_ms'] = value
+
+    # Batched passes, as the inference pool runs them
+    start = time.perf_counter()
+    for _ in range(repeats):
+        analyzer.get_window_sentiments(windows)
+    result['batched_windows_per_second'] = repeats * len(windows) / (time.perf_counter() - start)
+
+    # ru_maxrss is in kB on Linux
+    result['peak_rss_mb'] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    return result
+
+
+def _run_in_child(queue, kwargs):
+    try:
+        queue.put(('ok', run_backend(**kwargs)))
+    except Exception as e:
+        queue.put(('error', repr(e)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare accuracy and latency of the sentiment backends')
+    parser.add_argument('--backends', nargs='+', default=['fp32', 'int8'])
+    parser.add_argument('--corpus', default=DEFAULT_CORPUS, help='JSON lines with text and label fields')
+    parser.add_argument('--threads', type=int, default=0, help="torch threads per run (0 keeps torch's default)")
+    parser.add_argument('--batch-size', type=int, default=32)
+    parser.add_argument('--repeats', type=int, default=3, help='Passes over the corpus when timing')
+    parser.add_argument('--output', help='Write results as JSON to this file')
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.corpus)
+    expected = [example['label'] for example in corpus]
+    context = multiprocessing.get_context('spawn')
+    results = []
+    for backend in args.backends:
+        queue = context.Queue()
+        kwargs = dict(backend=backend, corpus_path=args.corpus, threads=args.threads,
+                      batch_size=args.batch_size, repeats=args.repeats)
+        process = context.Process(target=_run_in_child, args=(queue, kwargs))
+        process.start()
+        status, result = queue.get()
+        process.join()
+        if status != 'ok':
+            raise RuntimeError(f"Benchmark for the {backend} backend failed: {result}")
+        result['accuracy'] = float(np.mean([label == gold for label, gold in zip(result['labels'], expected)]))
+        results.append(result)
+
+    reference = next((result for result in results if result['backend'] == 'fp32'), None)
+    print(f"{len(corpus)} responses from {args.corpus}")
+    for result in results:
+        if reference is not None:
+            result['agreement_with_fp32'] = float(np.mean(
+                [label == fp32 for label, fp32 in zip(result['labels'], reference['labels'])]
+            ))
+        print(
+            f"{result['backend']:>5}: accuracy {result['accuracy']:.1%}, "
+            f"agreement with fp32 {result.get('agreement_with_fp32', float('nan')):.1%}, "
+            f"window p50/p95 {result['window_p50_ms']:.1f}/{result['window_p95_ms']:.1f} ms, "
+            f"batched {result['batched_windows_per_second']:.1f} windows/s, "
+            f"model {result['model_size_mb']:.0f} MB, peak RSS {result['peak_rss_mb']:.0f} MB, "
+            f"load {result['load_seconds']:.1f}s"
+        )
+
+    if args.output:
+        report = {
+            'schema_version': RESULTS_SCHEMA_VERSION,
+            'timestamp': datetime.now(timezone.utc).isoformat(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'config': {'corpus': args.corpus, 'threads': args.threads,
+                       'batch_size': args.batch_size, 'repeats': args.repeats},
+            'results': results,
+        }
+        os.makedirs(os.path.dirname(args.output) or '.', exist_ok=True)
+        with open(args.output, 'w') as file:
+            json.dump(report, file, indent=2)
+        print(f"Wrote {args.output}")
+
+
+if __name__ == '__main__':
+    main()
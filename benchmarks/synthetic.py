@@ -0,0 +1,94 @@
+# synthetic.py
+import numpy as np
+import pandas as pd
+
+SYLLABLES = ['ba', 'co', 'da', 'fe', 'gi', 'ho', 'ju', 'ka', 'le', 'mi', 'no', 'pa', 'qui', 'ra', 'si', 'tu', 'va', 'we', 'xo', 'zy']
+
+
+def make_vocabulary(size: int, seed: int = 0) -> np.ndarray:
+    """Generate `size` distinct pronounceable pseudo-words."""
+    rng = np.random.default_rng(seed)
+    words = set()
+    while len(words) < size:
+        n = rng.integers(2, 5)
+        words.add(''.join(rng.choice(SYLLABLES, n)))
+    return np.array(sorted(words))
+
+
+def make_catalog(n_courses: int, vocab_size: int = 5000, min_words: int = 2, max_words: int = 7, seed: int = 0) -> pd.DataFrame:
+    """Generate a Coursera-like catalog that is already preprocessed.
+
+    Title words follow a Zipf distribution over the vocabulary, so a few terms have
+    very long posting lists while most are rare, like real course titles. The result
+    has the columns expected by CourseRecommender.from_catalog.
+
+    Args:
+        n_courses (int): Number of courses to generate.
+        vocab_size (int): Number of distinct title words.
+        min_words (int): Minimum title length in words.
+        max_words (int): Maximum title length in words.
+        seed (int): Random seed.
+
+    Returns:
+        pd.DataFrame: The synthetic catalog.
+    """
+    rng = np.random.default_rng(seed)
+    vocabulary = make_vocabulary(vocab_size, seed)
+    lengths = rng.integers(min_words, max_words + 1, n_courses)
+    ranks = np.arange(1, vocab_size + 1)
+    probabilities = 1.0 / ranks
+    probabilities /= probabilities.sum()
+    word_ids = rng.choice(vocab_size, size=int(lengths.sum()), p=probabilities)
+    words = vocabulary[word_ids]
+    bounds = np.concatenate([[0], np.cumsum(lengths)])
+    titles = [' '.join(words[bounds[i]:bounds[i + 1]]) for i in range(n_courses)]
+
+    rating = rng.uniform(0, 1, n_courses)
+    enrolled = rng.uniform(0, 1, n_courses)
+    overall = np.where(rating + enrolled > 0, 2 * rating * enrolled / np.maximum(rating + enrolled, 1e-12), 0.0)
+    return pd.DataFrame({
+        'course_title': titles,
+        'course_Certificate_type': rng.choice(['COURSE', 'SPECIALIZATION', 'PROFESSIONAL CERTIFICATE'], n_courses),
+        'course_rating': rating,
+        'course_difficulty': rng.choice(['Beginner', 'Intermediate', 'Advanced', 'Mixed'], n_courses),
+        'course_students_enrolled': enrolled,
+        'overall_rating': overall,
+    })
+
+
+def make_queries(catalog: pd.DataFrame, n_queries: int, seed: int = 1) -> list:
+    """Build keyword queries by mixing words from random course titles."""
+    rng = np.random.default_rng(seed)
+    titles = catalog['course_title'].to_numpy()
+    queries = []
+    for _ in range(n_queries):
+        picked = rng.choice(titles, 2)
+        words = ' '.join(picked).split()
+        queries.append(', '.join(rng.choice(words, min(len(words), 3), replace=False)))
+    return queries
+
+
+def write_coursera_csv(directory: str, n_courses: int, vocab_size: int = 5000, seed: int = 0) -> str:
+    """Write a raw catalog shaped like the Kaggle `coursea_data.csv` into `directory`.
+
+    Most enrolment figures are in thousands ("12.5k") and a few in millions ("1.2m"),
+    which the preprocessing drops, as in the real dataset.
+
+    Returns:
+        str: `directory`, suitable as a stand-in for kagglehub.dataset_download.
+    """
+    rng = np.random.default_rng(seed)
+    catalog = make_catalog(n_courses, vocab_size=vocab_size, seed=seed)
+    thousands = np.char.add(np.round(rng.uniform(1, 999, n_courses), 1).astype(str), 'k')
+    millions = np.char.add(np.round(rng.uniform(1, 3, n_courses), 1).astype(str), 'm')
+    raw = pd.DataFrame({
+        'Unnamed: 0': np.arange(n_courses),
+        'course_title': catalog['course_title'],
+        'course_organization': rng.choice(['University A', 'University B', 'Company C'], n_courses),
+        'course_Certificate_type': catalog['course_Certificate_type'],
+        'course_rating': np.round(rng.uniform(3.3, 5.0, n_courses), 1),
+        'course_difficulty': catalog['course_difficulty'],
+        'course_students_enrolled': np.where(rng.uniform(0, 1, n_courses) < 0.97, thousands, millions),
+    })
+    raw.to_csv(f"{directory}/coursea_data.csv", index=False)
+    return directory
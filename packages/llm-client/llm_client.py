@@ -0,0 +1,286 @@
+# llm_client.py
+"""Asyncio OpenAI client shared by the backend and the Telegram bot.
+
+One LLMClient per process holds one pooled HTTP client. Every call goes through
+`LLMClient.call`, which:
+
+* waits for a slot of a process-wide semaphore, so at most `max_concurrency`
+  calls are in flight;
+* retries rate limits, timeouts, connection errors and 5xx responses with
+  full-jitter exponential backoff, honouring Retry-After;
+* gives up with LLMDeadlineExceeded once `deadline` seconds have passed,
+  counting the queueing, every attempt and the backoff between them;
+* for streamed completions (`stream_chat`), keeps the slot and the deadline
+  until the stream has been read to the end;
+* records queue depth, latency percentiles and error counts, see `stats()`.
+
+Set OPENAI_BASE_URL to point it at another server, such as the local fake in
+benchmarks/fake_openai.py. This module is packaged on its own (packages/llm-client)
+and only depends on openai and httpx, so the backend and the bot both install it
+from their requirements without depending on each other.
+"""
+import os
+import time
+import random
+import asyncio
+from collections import deque
+from dataclasses import dataclass
+from typing import AsyncIterator
+import httpx
+import openai
+from openai import AsyncOpenAI, DefaultAsyncHttpxClient
+
+# Errors worth another attempt; other API errors (bad request, auth) fail at once
+RETRYABLE_ERRORS = (
+    openai.RateLimitError,
+    openai.APITimeoutError,
+    openai.APIConnectionError,
+    openai.InternalServerError,
+)
+
+
+class LLMDeadlineExceeded(Exception):
+    """Raised when a call does not succeed within its deadline."""
+
+
+@dataclass
+class LLMSettings:
+    api_key: str = None
+    base_url: str = None
+    max_connections: int = 20
+    max_keepalive_connections: int = 10
+    timeout: float = 60.0
+    max_concurrency: int = 8
+    max_retries: int = 4
+    backoff_base: float = 0.5
+    backoff_max: float = 20.0
+    deadline: float = 120.0
+
+    @classmethod
+    def from_env(cls) -> "LLMSettings":
+        return cls(
+            api_key=os.getenv("OPENAI_API_KEY"),
+            base_url=os.getenv("OPENAI_BASE_URL") or None,
+            max_connections=int(os.getenv("OPENAI_MAX_CONNECTIONS", "20")),
+            max_keepalive_connections=int(os.getenv("OPENAI_MAX_KEEPALIVE_CONNECTIONS", "10")),
+            timeout=float(os.getenv("OPENAI_TIMEOUT", "60")),
+            max_concurrency=int(os.getenv("LLM_MAX_CONCURRENCY", "8")),
+            max_retries=int(os.getenv("OPENAI_MAX_RETRIES", "4")),
+            backoff_base=float(os.getenv("LLM_BACKOFF_BASE", "0.5")),
+            backoff_max=float(os.getenv("LLM_BACKOFF_MAX", "20")),
+            deadline=float(os.getenv("LLM_CALL_DEADLINE", "120")),
+        )
+
+
+class LLMMetrics:
+    """Counters and recent latencies of an LLMClient."""
+
+    def __init__(self, window: int = 1024):
+        self.queued = 0
+        self.in_flight = 0
+        self.peak_queued = 0
+        self.calls = 0
+        self.failures = 0
+        self.retries = 0
+        self.rate_limited = 0
+        self.deadlines_exceeded = 0
+        # Seconds per call, from entering the queue to the result, and spent queued
+        self.latencies = deque(maxlen=window)
+        self.queue_waits = deque(maxlen=window)
+
+    @staticmethod
+    def _percentiles(samples) -> dict:
+        if not samples:
+            return {"p50": None, "p95": None, "p99": None}
+        # Nearest-rank percentiles, in milliseconds
+        values = sorted(samples)
+        return {
+            p: values[min(len(values) - 1, int(q / 100 * len(values)))] * 1000
+            for p, q in (("p50", 50), ("p95", 95), ("p99", 99))
+        }
+
+    def stats(self) -> dict:
+        return {
+            "queued": self.queued,
+            "in_flight": self.in_flight,
+            "peak_queued": self.peak_queued,
+            "calls": self.calls,
+            "failures": self.failures,
+            "retries": self.retries,
+            "rate_limited": self.rate_limited,
+            "deadlines_exceeded": self.deadlines_exceeded,
+            "latency_ms": self._percentiles(self.latencies),
+            "queue_wait_ms": self._percentiles(self.queue_waits),
+        }
+
+
+class LLMClient:
+    """A pooled AsyncOpenAI client with a concurrency limit, retries and deadlines.
+
+    `openai` is the underlying AsyncOpenAI client; its own retries are turned off
+    so that `call` is the one place that retries.
+    """
+
+    def __init__(self, settings: LLMSettings = None):
+        self.settings = settings or LLMSettings.from_env()
+        self.openai = AsyncOpenAI(
+            api_key=self.settings.api_key,
+            base_url=self.settings.base_url,
+            max_retries=0,
+            http_client=DefaultAsyncHttpxClient(
+                limits=httpx.Limits(
+                    max_connections=self.settings.max_connections,
+                    max_keepalive_connections=self.settings.max_keepalive_connections,
+                ),
+                timeout=self.settings.timeout,
+            ),
+        )
+        self.semaphore = asyncio.Semaphore(self.settings.max_concurrency)
+        self.metrics = LLMMetrics()
+
+    def backoff(self, attempt: int, error: Exception) -> float:
+        # Full jitter, unless the server said how long to wait
+        response = getattr(error, "response", None)
+        retry_after = response.headers.get("retry-after") if response is not None else None
+        if retry_after:
+            try:
+                return min(float(retry_after), self.settings.backoff_max)
+            except ValueError:
+                pass
+        return random.uniform(0, min(self.settings.backoff_max, self.settings.backoff_base * 2 ** attempt))
+
+    async def call(self, method, *args, deadline: float = None, **kwargs):
+        """
+        Call an AsyncOpenAI method under the concurrency limit, retrying transient errors.
+
+        Args:
+            method: A coroutine method of `self.openai`, e.g. `self.openai.chat.completions.create`.
+            *args, **kwargs: Its arguments.
+            deadline (float, optional): Seconds the call may take in total. Defaults to settings.deadline.
+
+        Returns:
+            The method's result.
+
+        Raises:
+            LLMDeadlineExceeded: The call did not succeed in time.
+            openai.APIError: A non-retryable error, or the last error once retries are used up.
+        """
+        deadline = self.settings.deadline if deadline is None else deadline
+        start = time.perf_counter()
+        try:
+            return await asyncio.wait_for(self._call(method, args, kwargs, start), timeout=deadline)
+        except asyncio.TimeoutError:
+            self.metrics.deadlines_exceeded += 1
+            self.metrics.failures += 1
+            raise LLMDeadlineExceeded(f"LLM call did not finish within {deadline}s") from None
+        except Exception:
+            self.metrics.failures += 1
+            raise
+        finally:
+            self.metrics.calls += 1
+            self.metrics.latencies.append(time.perf_counter() - start)
+
+    async def _call(self, method, args, kwargs, start: float, hold_slot: bool = False):
+        # With hold_slot, a successful call returns still holding its slot (and counted in
+        # flight); the caller releases it with _release_slot
+        attempt = 0
+        while True:
+            self.metrics.queued += 1
+            self.metrics.peak_queued = max(self.metrics.peak_queued, self.metrics.queued)
+            try:
+                await self.semaphore.acquire()
+            finally:
+                self.metrics.queued -= 1
+            if attempt == 0:
+                self.metrics.queue_waits.append(time.perf_counter() - start)
+            self.metrics.in_flight += 1
+            succeeded = False
+            try:
+                result = await method(*args, **kwargs)
+                succeeded = True
+                return result
+            except RETRYABLE_ERRORS as e:
+                if isinstance(e, openai.RateLimitError):
+                    self.metrics.rate_limited += 1
+                if attempt >= self.settings.max_retries:
+                    raise
+                error = e
+            finally:
+                if not (succeeded and hold_slot):
+                    self._release_slot()
+
+            # Back off without holding a slot
+            await asyncio.sleep(self.backoff(attempt, error))
+            attempt += 1
+            self.metrics.retries += 1
+
+    def _release_slot(self):
+        self.metrics.in_flight -= 1
+        self.semaphore.release()
+
+    async def chat(self, deadline: float = None, **kwargs):
+        """`chat.completions.create` through `call`. For streamed completions use `stream_chat`."""
+        return await self.call(self.openai.chat.completions.create, deadline=deadline, **kwargs)
+
+    async def stream_chat(self, deadline: float = None, **kwargs) -> AsyncIterator:
+        """
+        Stream a chat completion, yielding its chunks.
+
+        Opening the stream is queued and retried like `call`. The concurrency slot is
+        then held until the stream ends, and the deadline covers the whole stream, so
+        a slow stream neither escapes the limit nor runs forever. Errors once chunks
+        have started arriving are not retried.
+
+        Raises:
+            LLMDeadlineExceeded: The stream did not finish in time.
+        """
+        deadline = self.settings.deadline if deadline is None else deadline
+        start = time.perf_counter()
+        stream = None
+        try:
+            try:
+                stream = await asyncio.wait_for(
+                    self._call(self.openai.chat.completions.create, (), {**kwargs, "stream": True}, start, hold_slot=True),
+                    timeout=deadline,
+                )
+                chunks = stream.__aiter__()
+                while True:
+                    remaining = deadline - (time.perf_counter() - start)
+                    if remaining <= 0:
+                        raise asyncio.TimeoutError
+                    try:
+                        chunk = await asyncio.wait_for(chunks.__anext__(), timeout=remaining)
+                    except StopAsyncIteration:
+                        return
+                    yield chunk
+            finally:
+                if stream is not None:
+                    self._release_slot()
+                    await stream.close()
+        except asyncio.TimeoutError:
+            self.metrics.deadlines_exceeded += 1
+            self.metrics.failures += 1
+            raise LLMDeadlineExceeded(f"LLM stream did not finish within {deadline}s") from None
+        except Exception:
+            self.metrics.failures += 1
+            raise
+        finally:
+            self.metrics.calls += 1
+            self.metrics.latencies.append(time.perf_counter() - start)
+
+    def stats(self) -> dict:
+        return {"max_concurrency": self.settings.max_concurrency, **self.metrics.stats()}
+
+    async def close(self):
+        await self.openai.close()
+
+
+_shared_client = None
+
+
+def get_llm_client() -> LLMClient:
+    """The process-wide LLMClient, created from the environment on first use."""
+    global _shared_client
+    if _shared_client is None:
+        _shared_client = LLMClient()
+    return _shared_client
@@ -1,5 +1,6 @@
 import { NextResponse } from 'next/server'
 import { PrismaClient } from '@prisma/client'
+import axios from 'axios'
 
 const prisma = new PrismaClient()
 
@@ -12,6 +13,15 @@ export async function POST(req: Request) {
       data: feedbackData
     })
 
+    // Score the new feedback's sentiment in the background so team summaries can reuse it
+    axios
+      .post('http://127.0.0.1:8000/api/scoreFeedbackSentiment', {
+        feedbackId: feedback.id
+      })
+      .catch((error: any) => {
+        console.error('Error scoring feedback sentiment:', error.message)
+      })
+
     return NextResponse.json({ success: true, feedback })
   } catch (error) {
     return NextResponse.json({ error: 'Error saving feedback' }, { status: 500 })
@@ -1,4 +1,5 @@
 import { NextResponse, NextRequest } from 'next/server';
+import axios from 'axios';
 import { PrismaClient } from '@prisma/client';
 import OpenAI from 'openai';
 
@@ -10,49 +11,60 @@ const client = new OpenAI({
   apiKey: process.env.OPENAI_API_KEY, // Make sure this is set in your .env file
 });
 
-// Function to safely convert string fields to numbers or use default values
-function parseRating(value: string | null, defaultValue = 0): number {
-  const parsedValue = parseFloat(value || '');
-  return isNaN(parsedValue) ? defaultValue : parsedValue;
-}
-
-// Function to generate feedback summary
-function generateFeedbackSummary(feedbackData: any[]) {
-  return feedbackData
+// Free-text suggestions the KPI report quotes directly; the rollup only holds counts
+const SUGGESTION_FIELDS = {
+  supportWellBeing: 'Support for Well-Being',
+  improveExperience: 'Improve Experience',
+};
+
+// Function to generate the team summary from its rollup (counts and averages per question)
+// and the employees' free-text suggestions
+function generateFeedbackSummary(rollup: any, suggestions: any[]) {
+  const survey = Object.entries(rollup.survey)
+    .map(([question, stats]: [string, any]) => {
+      const counts = Object.entries(stats.counts)
+        .map(([answer, count]) => `${answer}: ${count}`)
+        .join(', ');
+      const average =
+        stats.average === undefined
+          ? ''
+          : ` (average ${stats.average === null ? 'N/A' : stats.average.toFixed(2)} out of ${stats.scale})`;
+      return `    - ${question}: ${counts || 'N/A'}${average}`;
+    })
+    .join('\n');
+  const sentiment = Object.entries(rollup.sentiment_counts)
     .map(
-      (feedback, index) => `
-    Feedback #${index + 1}:
-    - Work Satisfaction: ${feedback.workSatisfaction || 'N/A'}
-    - Work-Life Balance: ${feedback.workLifeBalance || 'N/A'}
-    - Work Support: ${feedback.workSupport || 'N/A'}
-    - Inter-Department Communication: ${
-      feedback.interDepartmentCommunication || 'N/A'
-    }
-    - Work Recognition: ${feedback.workRecognition || 'N/A'}
-    - Tools Satisfaction: ${feedback.toolsSatisfaction || 'N/A'}
-    - Culture Alignment: ${feedback.cultureAlignment || 'N/A'}
-    - Career Growth Satisfaction: ${feedback.careerGrowthSatisfaction || 'N/A'}
-    - Training Preference: ${feedback.trainingPreference || 'N/A'}
-    - Development Opportunities: ${feedback.developmentOpportunities || 'N/A'}
-    - Learning Preference: ${feedback.learningPreference || 'N/A'}
-    - Weakest Skill: ${feedback.weakestSkill || 'N/A'}
-    - Recognition Satisfaction: ${feedback.recognitionSatisfaction || 'N/A'}
-    - Feedback Frequency: ${feedback.feedbackFrequency || 'N/A'}
-    - Recommend Company: ${feedback.recommendCompany || 'N/A'} (out of 10)
-    - Overall Work-Life Balance: ${feedback.overallWorkLifeBalance || 'N/A'}
-    - Team Working Relationship: ${feedback.teamWorkingRelationship || 'N/A'}
-    - Enjoyment of Work: ${feedback.enjoymentOfWork || 'N/A'}
-    - Collaboration Challenges: ${feedback.collaborationChallenges || 'N/A'}
-    - Work-Related Stressors: ${feedback.workRelatedStressors || 'N/A'}
-    - Support for Well-Being: ${feedback.supportWellBeing || 'N/A'}
-    - Improve Experience: ${feedback.improveExperience || 'N/A'}
-    `
+      ([question, counts]: [string, any]) =>
+        `    - ${question}: ${counts.positive} positive, ${counts.negative} negative, ${counts.neutral} neutral`
     )
-    .join('\n\n');
+    .join('\n');
+  const suggestionList = Object.entries(SUGGESTION_FIELDS)
+    .map(([field, label]) => {
+      const answers = suggestions
+        .map((feedback) => feedback[field])
+        .filter((answer) => answer)
+        .map((answer) => `      - ${answer}`)
+        .join('\n');
+      return `    - ${label}:\n${answers || '      - N/A'}`;
+    })
+    .join('\n');
+
+  return `
+    Number of responses: ${rollup.total_count}
+
+    Answers to the survey questions (answer: number of employees; averages score the best answer highest):
+${survey}
+
+    Sentiment of the open-ended answers (number of employees):
+${sentiment}
+
+    Suggestions from employees:
+${suggestionList}
+    `;
 }
 
-async function generateKPIReport(feedbackData: any[]) {
-  const feedbackSummary = generateFeedbackSummary(feedbackData);
+async function generateKPIReport(rollup: any, suggestions: any[]) {
+  const feedbackSummary = generateFeedbackSummary(rollup, suggestions);
 
   const prompt = `
   Based on the following team feedback, generate a detailed report with metrics for key performance indicators (KPIs):
@@ -90,37 +102,28 @@ async function generateKPIReport(feedbackData: any[]) {
   }
 }
 
-// Handle GET requests
+// Handle POST requests
 export async function POST(req: NextRequest) {
   try {
-    const { teamNumber } = await req.json();    // Fetch all feedback data from the database
-
-    const feedbackData = await prisma.feedback.findMany({
-      where: {
-        teamNumber: teamNumber,
-      },
-    });
-
-    // Prepare data by converting necessary fields to numerical values for KPI generation
-    const preparedFeedbackData = feedbackData.map(feedback => ({
-      ...feedback,
-      workSatisfaction: parseRating(feedback.workSatisfaction),
-      workLifeBalance: parseRating(feedback.workLifeBalance),
-      workSupport: parseRating(feedback.workSupport),
-      interDepartmentCommunication: parseRating(feedback.interDepartmentCommunication),
-      workRecognition: parseRating(feedback.workRecognition),
-      toolsSatisfaction: parseRating(feedback.toolsSatisfaction),
-      cultureAlignment: parseRating(feedback.cultureAlignment),
-      careerGrowthSatisfaction: parseRating(feedback.careerGrowthSatisfaction),
-      overallWorkLifeBalance: parseRating(feedback.overallWorkLifeBalance),
-      teamWorkingRelationship: parseRating(feedback.teamWorkingRelationship),
-      enjoymentOfWork: parseRating(feedback.enjoymentOfWork),
-      supportWellBeing: parseRating(feedback.supportWellBeing),
-      recommendCompany: parseRating(feedback.recommendCompany),
-    }));
-
-    // Generate the KPI report from the fetched data
-    const kpiReport = await generateKPIReport(preparedFeedbackData);
+    const { teamNumber } = await req.json();
+
+    // Read the team's rollup (one small document) instead of every feedback document,
+    // and only the two free-text suggestion fields of each feedback
+    const [rollup, suggestions] = await Promise.all([
+      axios.get(`http://127.0.0.1:8000/api/teamRollup/${teamNumber}`),
+      prisma.feedback.findMany({
+        where: {
+          teamNumber: teamNumber,
+        },
+        select: {
+          supportWellBeing: true,
+          improveExperience: true,
+        },
+      }),
+    ]);
+
+    // Generate the KPI report from the team's aggregates and suggestions
+    const kpiReport = await generateKPIReport(rollup.data, suggestions);
 
     return NextResponse.json(kpiReport, { status: 200 });
   } catch (error) {
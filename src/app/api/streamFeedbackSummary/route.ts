@@ -0,0 +1,32 @@
+import { NextRequest, NextResponse } from 'next/server';
+
+// Handle POST requests: pass the server-sent events from FastAPI through as they arrive
+export async function POST(req: NextRequest) {
+  const apiUrl = 'http://127.0.0.1:8000/api/streamFeedbackSummary';
+
+  try {
+    const { teamNumber } = await req.json();
+
+    const response = await fetch(apiUrl, {
+      method: 'POST',
+      headers: { 'Content-Type': 'application/json' },
+      body: JSON.stringify({ teamNumber: teamNumber }),
+    });
+
+    if (!response.ok || !response.body) {
+      return NextResponse.json({ error: "Error processing request" }, { status: response.status });
+    }
+
+    return new Response(response.body, {
+      status: 200,
+      headers: {
+        'Content-Type': 'text/event-stream',
+        'Cache-Control': 'no-cache',
+        'Connection': 'keep-alive',
+      },
+    });
+  } catch (error: any) {
+    console.error("Error fetching from FastAPI:", error.message);
+    return NextResponse.json({ error: "Error processing request" }, { status: 500 });
+  }
+}
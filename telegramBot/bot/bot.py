@@ -5,13 +5,23 @@
 from dotenv import load_dotenv
 import os
 from conversations.handler import conv_handler
+from conversations.cachestats import cachestats
+from mentor_index import keep_mentor_index_fresh
+from recommendation_cache import report_cache_stats
 from telegram import Update
 from telegram.ext import (
     Application,
+    CommandHandler,
     MessageHandler,
     filters,
 )
 
+async def post_init(application: Application):
+    # Load the mentor index at startup and keep it fresh in the background
+    application.create_task(keep_mentor_index_fresh())
+    application.create_task(report_cache_stats())
+
+
 class MentorMatchingBot:
     def run(self):
         load_dotenv()
@@ -23,10 +33,12 @@ class MentorMatchingBot:
             .token(telegram_token)
             .read_timeout(30)
             .write_timeout(30)
+            .post_init(post_init)
             .build()
         )
 
         application.add_handler(conv_handler)
+        application.add_handler(CommandHandler("cachestats", cachestats))
         # application.add_handler(MessageHandler(filters.TEXT & filters.Regex(r'^/\d+$'), handle_numeric_command))
         application.run_polling(allowed_updates=Update.ALL_TYPES)
         application.run_polling()
@@ -0,0 +1,18 @@
+import os
+import json
+from telegram.ext import ContextTypes
+from telegram import Update
+from recommendation_cache import recommendation_cache
+
+# Telegram user ids allowed to see the cache statistics; anyone when unset
+ADMIN_USER_IDS = {int(user_id) for user_id in os.getenv("BOT_ADMIN_USER_IDS", "").split(",") if user_id.strip()}
+
+async def cachestats(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    # Reply with the recommendation cache's hit, miss and coalescing counts
+    if ADMIN_USER_IDS and update.effective_user.id not in ADMIN_USER_IDS:
+        return
+
+    await context.bot.send_message(
+        chat_id=update.effective_chat.id,
+        text=f"Recommendation cache: {json.dumps(recommendation_cache.stats(), indent=2)}",
+    )
@@ -1,9 +1,12 @@
 from telegram.ext import ContextTypes, ConversationHandler, CallbackQueryHandler, CommandHandler
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
+from repository.assistant import cancel_user_run
 
 START_ROUTES, RECOMMEND_STATE, JUDGE_STATE = range(3)
 
 async def cancel(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    # Stop the user's mentor search if one is still running
+    await cancel_user_run(update.effective_user.id)
 
     await context.bot.send_message(
         chat_id=update.effective_chat.id,
@@ -1,13 +1,14 @@
-import os
 import asyncio
 import re
 import json
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import CallbackContext
-from openai import OpenAI
 from repository import (
     user as db_user,
 )
+from repository.assistant import AssistantRunError, ask_mentor_assistant
+from mentor_index import format_mentor_list, mentor_index, recommend_from_index
+from recommendation_cache import recommendation_cache
 
 # Define states
 START_ROUTES, RECOMMEND_STATE = range(2)
@@ -42,8 +43,16 @@ async def process_recommendation(
     update: Update, context: CallbackContext, user_input: str, wait_message
 ):
     try:
-        # Call the asynchronous recommendation function
-        chatgpt_response = await get_chatgpt_recommendation(update, user_input)
+        if recommendation_cache.enabled:
+            # Cached replies are shared between users, so the Assistant answers on a fresh thread
+            # without the user's earlier queries; identical queries in flight share one request
+            chatgpt_response = await recommendation_cache.get_or_compute(
+                "interest", user_input,
+                lambda: get_chatgpt_recommendation(update, user_input, fresh_thread=True),
+                version=mentor_index.version,
+            )
+        else:
+            chatgpt_response, _ = await get_chatgpt_recommendation(update, user_input)
 
         # Delete the "Please wait" message once the recommendation is ready
         await context.bot.delete_message(
@@ -77,6 +86,13 @@ async def process_recommendation(
             reply_markup=reply_markup,
         )
 
+    except asyncio.CancelledError:
+        # Replaced by a newer query, or stopped with /cancel
+        await context.bot.delete_message(
+            chat_id=update.effective_chat.id, message_id=wait_message.message_id
+        )
+        raise
+
     except Exception as e:
         await update.message.reply_text(f"An error occurred: {e}")
 
@@ -112,65 +128,24 @@ def format_mentor_recommendation(mentor_recommendation: dict) -> str:
     return formatted_response
 
 
-async def get_chatgpt_recommendation(update: Update, user_input: str) -> str:
-    try:
-        client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-        assistant_id = "asst_0V2Dzw7IbQAhHTMpFQ2OBnyY"
-
-        thread = await asyncio.to_thread(client.beta.threads.create)
-
-        await asyncio.to_thread(
-            client.beta.threads.messages.create,
-            thread_id=thread.id,
-            role="user",
-            content=user_input,
-        )
-
-        run = await asyncio.to_thread(
-            client.beta.threads.runs.create,
-            thread_id=thread.id,
-            assistant_id=assistant_id,
-            instructions="""
-                You are a sharp and intuitive mentor matcher with a knack for finding the perfect mentor for PSA employees. Your job is to listen carefully 
-                to the user's job description and match them with a mentor who can guide them. You prioritize relevance, experience, and compatibility when suggesting 
-                mentors, all while maintaining a friendly, encouraging tone. Your goal is to match the user with the most suitable mentor based on their job description and 
-                specialized skills, ensuring that the mentor's experience aligns with the user's aspirations.
-
-                Output the results in this format:
-
-                JSON Format:
-                list_of_mentors: An array containing exactly 3 mentor objects, each with the following fields:
-                name: Name of the mentor.
-                field: The broad area of expertise.
-                role: The mentor's job role.
-                specialized_field: The specific skill or subtopic the mentor excels in.
-                experience_years: Number of years of experience the mentor has.
-                email: The mentor's contact email.
-                reason_for_recommendation: A brief paragraph explaining what the user can expect to learn from these mentors, their job scopes, and why they were recommended.
-            """,
-        )
-
-        while True:
-            run_status = await asyncio.to_thread(
-                client.beta.threads.runs.retrieve, thread_id=thread.id, run_id=run.id
-            )
-
-            if run_status.status == "completed":
-                break
-            elif run_status.status == "failed":
-                return "Failed to retrieve recommendations. Please try again."
-
-            await asyncio.sleep(1)
+async def get_chatgpt_recommendation(update: Update, user_input: str, fresh_thread: bool = False) -> tuple:
+    """
+    Mentors for `user_input` from the local mentor index, or from the Assistant when it has no good match.
 
-        messages = await asyncio.to_thread(
-            client.beta.threads.messages.list, thread_id=thread.id
-        )
+    Returns:
+        tuple: (reply, cacheable). Errors and replies with template reasons are not cacheable.
+    """
+    try:
+        # Served from the local mentor index when it has a good match; the Assistant is the fallback
+        from_index = await recommend_from_index(user_input)
+        if from_index:
+            return from_index
 
-        assistant_response = None
-        for message in messages.data:
-            if message.role == "assistant":
-                assistant_response = message.content[0].text.value
-                break
+        try:
+            assistant_response = await ask_mentor_assistant(update.effective_user.id, user_input, fresh_thread)
+        except AssistantRunError as e:
+            print(f"Mentor assistant run failed: {e}")
+            return "Failed to retrieve recommendations. Please try again.", False
 
         if assistant_response:
             try:
@@ -183,34 +158,19 @@ async def get_chatgpt_recommendation(update: Update, user_input: str) -> str:
 
                     mentor_recommendation = json.loads(json_content)
 
-                    # Initialize formatted_output as an empty string
-                    formatted_output = ""
-
                     # Assuming the structure matches the given format
                     list_of_mentors = mentor_recommendation.get("list_of_mentors", [])
 
-                    for i, mentor in enumerate(list_of_mentors, start=1):
-                        formatted_output += (
-                            f"Mentor {i}:\n"
-                            f"Name: {mentor['name']}\n"
-                            f"Role: {mentor['role']}\n"
-                            f"Field: {mentor['field']}\n"
-                            f"Specialized Field: {mentor['specialized_field']}\n"
-                            f"Experience: {mentor['experience_years']} years\n"
-                            f"Contact: {mentor['email']}\n\n"
-                            f"Reason for Recommendation: {mentor['reason_for_recommendation']}\n\n"
-                        )
-
-                    return formatted_output
+                    return format_mentor_list(list_of_mentors), True
                 else:
                     print("No JSON block found, returning raw response.")
-                    return assistant_response
+                    return assistant_response, True
 
             except (json.JSONDecodeError, AttributeError) as e:
                 print(f"Error parsing JSON: {e}, returning raw response.")
-                return assistant_response
+                return assistant_response, True
         else:
-            return "No recommendation received from the assistant."
+            return "No recommendation received from the assistant.", False
 
     except Exception as e:
-        return f"An error occurred while retrieving the recommendation: {e}"
+        return f"An error occurred while retrieving the recommendation: {e}", False
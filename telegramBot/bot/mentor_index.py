@@ -0,0 +1,215 @@
+import os
+import json
+import time
+import hashlib
+import asyncio
+import numpy as np
+from sklearn.feature_extraction.text import TfidfVectorizer
+from llm_client import get_llm_client
+from repository.mentor import fetch_mentors
+
+# Seconds between incremental refreshes, and refreshes between full reloads (which drop deleted mentors)
+REFRESH_INTERVAL = float(os.getenv("MENTOR_INDEX_REFRESH_INTERVAL", "300"))
+FULL_RELOAD_EVERY = int(os.getenv("MENTOR_INDEX_FULL_RELOAD_EVERY", "12"))
+# Queries whose best match scores below this go to the Assistant instead
+MIN_SCORE = float(os.getenv("MENTOR_INDEX_MIN_SCORE", "0.1"))
+# "1" lets the LLM write reason_for_recommendation; skipped anyway while this many LLM calls are queued
+LLM_REASONS = os.getenv("MENTOR_LLM_REASONS", "1") == "1"
+LLM_REASONS_MAX_QUEUED = int(os.getenv("MENTOR_LLM_REASONS_MAX_QUEUED", "4"))
+LLM_REASONS_DEADLINE = float(os.getenv("MENTOR_LLM_REASONS_DEADLINE", "15"))
+
+MENTOR_FIELDS = ["name", "field", "role", "specialized_field", "experience_years", "email"]
+
+
+def mentor_document(mentor: dict) -> str:
+    # The specialization is the most telling field, so it counts twice
+    specialized_field = mentor.get("specialized_field") or ""
+    return " ".join([
+        mentor.get("role") or "",
+        mentor.get("field") or "",
+        specialized_field,
+        specialized_field,
+        f"{mentor.get('experience_years') or 0} years experience",
+    ])
+
+
+def roster_version(mentors: dict) -> str:
+    # Content hash of the roster: the same mentors give the same version, across restarts too
+    digest = hashlib.sha256()
+    for mentor_id in sorted(mentors, key=str):
+        digest.update(json.dumps(mentors[mentor_id], sort_keys=True, default=str).encode())
+    return digest.hexdigest()[:16]
+
+
+class MentorIndex:
+    """TF-IDF index over the mentor roster, built like the course recommender.
+
+    Each mentor is a document of its role, field, specialized field and
+    experience. Queries are scored against every mentor with one sparse
+    matrix product. `apply` merges changed mentors into the roster and refits
+    the (small) index off the event loop; a search always sees a complete
+    index, old or new. `version` changes whenever the roster does.
+    """
+
+    def __init__(self):
+        self.mentors = {}  # mentor id -> mentor
+        self.updated_at = None  # latest updated_at seen, for incremental refreshes
+        self.version = None
+        self._state = None  # (mentor ids, vectorizer, vectors, years of experience)
+
+    def __len__(self):
+        return len(self.mentors)
+
+    @classmethod
+    def _build(cls, mentors: dict):
+        return cls._fit(mentors), roster_version(mentors)
+
+    @staticmethod
+    def _fit(mentors: dict):
+        ids = list(mentors)
+        if not ids:
+            return None
+        vectorizer = TfidfVectorizer(stop_words="english", ngram_range=(1, 2), sublinear_tf=True)
+        try:
+            vectors = vectorizer.fit_transform([mentor_document(mentors[mentor_id]) for mentor_id in ids])
+        except ValueError:
+            # Nothing but stop words in the roster
+            return None
+        experience = np.array([float(mentors[mentor_id].get("experience_years") or 0) for mentor_id in ids])
+        return ids, vectorizer, vectors, experience
+
+    async def apply(self, changed: list, full: bool = False):
+        """Merge changed mentors (all of them when `full`) into the index. Mentors with active = false are removed."""
+        mentors = {} if full else dict(self.mentors)
+        for mentor in changed:
+            mentor_id = mentor.get("id", mentor.get("email"))
+            if mentor.get("active", True) is False:
+                mentors.pop(mentor_id, None)
+            else:
+                mentors[mentor_id] = mentor
+            if mentor.get("updated_at") and (self.updated_at is None or mentor["updated_at"] > self.updated_at):
+                self.updated_at = mentor["updated_at"]
+        state, version = await asyncio.to_thread(self._build, mentors)
+        self.mentors, self._state, self.version = mentors, state, version
+
+    def search(self, query: str, k: int = 3) -> list:
+        """
+        Top mentors for a job description or interest.
+
+        Args:
+            query (str): The user's input.
+            k (int, optional): Number of mentors to return. Defaults to 3.
+
+        Returns:
+            list: (mentor, score) pairs, best first; empty if nothing scores above MIN_SCORE.
+        """
+        state = self._state
+        if state is None:
+            return []
+        ids, vectorizer, vectors, experience = state
+        scores = (vectors @ vectorizer.transform([query]).T).toarray().ravel()
+        # Best score first; more experienced mentors first among equals
+        top = np.lexsort((-experience, -scores))[:k]
+        return [(self.mentors[ids[i]], float(scores[i])) for i in top if scores[i] >= MIN_SCORE]
+
+
+mentor_index = MentorIndex()
+
+
+async def refresh_mentor_index(full: bool = False):
+    mentors = await fetch_mentors(None if full else mentor_index.updated_at)
+    if mentors is None:
+        return
+    if full or mentors:
+        start = time.perf_counter()
+        await mentor_index.apply(mentors, full=full)
+        print(f"Mentor index: {len(mentor_index)} mentors, {len(mentors)} changed, refitted in {time.perf_counter() - start:.3f}s")
+
+
+async def keep_mentor_index_fresh():
+    """Load the index, then refresh it every REFRESH_INTERVAL seconds. Runs for the life of the bot."""
+    refreshes = 0
+    while True:
+        try:
+            await refresh_mentor_index(full=refreshes % FULL_RELOAD_EVERY == 0)
+        except Exception as e:
+            print(f"Failed to refresh the mentor index: {e}")
+        refreshes += 1
+        await asyncio.sleep(REFRESH_INTERVAL)
+
+
+def template_reason(mentor: dict) -> str:
+    return (
+        f"{mentor.get('name', 'This mentor')} works as {mentor.get('role', 'a mentor')} in {mentor.get('field', 'your area')}, "
+        f"specializing in {mentor.get('specialized_field', 'related topics')}, "
+        f"with {mentor.get('experience_years', 'several')} years of experience to share."
+    )
+
+
+async def write_reasons(user_input: str, mentors: list) -> tuple:
+    """
+    One reason_for_recommendation per mentor: written by the LLM, or from a template when it is off, busy or fails.
+
+    Returns:
+        tuple: (reasons, whether the LLM wrote them).
+    """
+    if not LLM_REASONS or get_llm_client().metrics.queued >= LLM_REASONS_MAX_QUEUED:
+        return [template_reason(mentor) for mentor in mentors], False
+
+    roster = json.dumps([{field: mentor.get(field) for field in MENTOR_FIELDS if field != "email"} for mentor in mentors])
+    try:
+        response = await get_llm_client().chat(
+            model="gpt-4o-mini",
+            messages=[
+                {"role": "system", "content": "You are a friendly, encouraging mentor matcher for PSA employees. You only speak JSON."},
+                {"role": "user", "content": (
+                    f"A PSA employee wrote: {user_input}\n\nThese mentors were matched for them: {roster}\n\n"
+                    "For each mentor, in order, write a brief paragraph explaining what the employee can expect to learn "
+                    'from them, their job scope, and why they were recommended. Return {"reasons": ["...", ...]}.'
+                )},
+            ],
+            response_format={"type": "json_object"},
+            temperature=0.3,
+            max_tokens=600,
+            deadline=LLM_REASONS_DEADLINE,
+        )
+        reasons = json.loads(response.choices[0].message.content)["reasons"]
+        if len(reasons) == len(mentors):
+            return reasons, True
+    except Exception as e:
+        print(f"Failed to write mentor reasons: {e}")
+    return [template_reason(mentor) for mentor in mentors], False
+
+
+def format_mentor_list(list_of_mentors: list) -> str:
+    formatted_output = ""
+    for i, mentor in enumerate(list_of_mentors, start=1):
+        formatted_output += (
+            f"Mentor {i}:\n"
+            f"Name: {mentor['name']}\n"
+            f"Role: {mentor['role']}\n"
+            f"Field: {mentor['field']}\n"
+            f"Specialized Field: {mentor['specialized_field']}\n"
+            f"Experience: {mentor['experience_years']} years\n"
+            f"Contact: {mentor['email']}\n\n"
+            f"Reason for Recommendation: {mentor['reason_for_recommendation']}\n\n"
+        )
+    return formatted_output
+
+
+async def recommend_from_index(user_input: str) -> tuple:
+    """
+    Mentors for `user_input` from the local index, formatted for Telegram.
+
+    Returns:
+        tuple: (reply, whether the LLM wrote the reasons), or None if the index has no good match.
+    """
+    matches = mentor_index.search(user_input)
+    if not matches:
+        return None
+    mentors = [mentor for mentor, _ in matches]
+    reasons, llm_reasons = await write_reasons(user_input, mentors)
+    return format_mentor_list([
+        {**{field: mentor.get(field, "") for field in MENTOR_FIELDS}, "reason_for_recommendation": reason}
+        for mentor, reason in zip(mentors, reasons)
+    ]), llm_reasons
@@ -0,0 +1,202 @@
+import os
+import re
+import json
+import time
+import asyncio
+from collections import OrderedDict
+
+STATS_INTERVAL = float(os.getenv("RECOMMENDATION_CACHE_STATS_INTERVAL", "600"))
+
+
+def normalize_query(text: str) -> str:
+    # "Data Science ", "data  science" and "data science!" are the same query
+    return re.sub(r"\s+", " ", text).strip(" .,!?;:").casefold()
+
+
+class RecommendationCache:
+    """LRU cache of recommendation replies, keyed on conversation type, normalized query and roster version.
+
+    Replies are shared between users, so they must be computed from the query
+    alone. A new roster version (a mentor index refresh that changed the roster)
+    drops every entry of other versions; nothing is stored before the index has
+    loaded. Entries expire after `ttl` seconds. Concurrent lookups of the same
+    query share one in-flight request. With `path`, entries are kept in a JSON file and
+    survive restarts. `stats()` reports hits, misses and coalesced lookups, and
+    `ghost_hits`: misses on queries evicted for lack of room, which a cache of
+    twice the size would have served.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 3600.0, path: str = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.path = path
+        self._entries = OrderedDict()  # key -> (expires_at, reply), least recently used first
+        self._ghosts = OrderedDict()  # keys recently evicted by size
+        self._inflight = {}  # key -> future of the reply being computed
+        self.version = None  # roster version of the latest lookup
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.ghost_hits = 0
+        self.evictions = 0
+        self.expirations = 0
+        if path:
+            self.load()
+
+    @property
+    def enabled(self) -> bool:
+        return self.maxsize > 0
+
+    @staticmethod
+    def key(conversation_type: str, query: str, version: str = None) -> str:
+        return f"{version or ''}:{conversation_type}:{normalize_query(query)}"
+
+    def _set_version(self, version):
+        if version is None or version == self.version:
+            return
+        # Entries of other versions can never be hit again; loaded ones of this version are kept
+        prefix = f"{version or ''}:"
+        for key in [key for key in self._entries if not key.startswith(prefix)]:
+            del self._entries[key]
+        self._ghosts.clear()
+        self.version = version
+
+    def _get(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, reply = entry
+        if expires_at < time.time():
+            del self._entries[key]
+            self.expirations += 1
+            return None
+        self._entries.move_to_end(key)
+        return reply
+
+    def _set(self, key, reply):
+        self._entries[key] = (time.time() + self.ttl, reply)
+        self._entries.move_to_end(key)
+        self._ghosts.pop(key, None)
+        while len(self._entries) > self.maxsize:
+            evicted, _ = self._entries.popitem(last=False)
+            self.evictions += 1
+            self._ghosts[evicted] = None
+            if len(self._ghosts) > self.maxsize:
+                self._ghosts.popitem(last=False)
+
+    async def get_or_compute(self, conversation_type: str, query: str, compute, version: str = None) -> str:
+        """
+        Return the cached reply for the query, or compute it once for every concurrent caller.
+
+        Args:
+            conversation_type (str): "interest" or "jobdescription".
+            query (str): The user's input.
+            compute: Coroutine function producing (reply, cacheable) from the query alone.
+                Only cacheable replies are stored; the others (errors, template reasons
+                written while the LLM was busy) are still shared with concurrent callers.
+            version (str, optional): Version of the mentor roster the reply is computed from.
+
+        Returns:
+            str: The reply.
+        """
+        self._set_version(version)
+        key = self.key(conversation_type, query, version)
+        reply = self._get(key)
+        if reply is not None:
+            self.hits += 1
+            return reply
+
+        shared = self._inflight.get(key)
+        if shared is not None:
+            self.coalesced += 1
+            try:
+                # Shielded: a waiter going away does not cancel the reply the others wait for
+                return await asyncio.shield(shared)
+            except asyncio.CancelledError:
+                if asyncio.current_task().cancelling() or not shared.cancelled():
+                    raise
+                # The request we joined was cancelled (its user moved on); make our own
+                return await self.get_or_compute(conversation_type, query, compute, version)
+
+        self.misses += 1
+        if key in self._ghosts:
+            self.ghost_hits += 1
+        # Computed in the caller's task, so cancelling the caller (a new query, /cancel) cancels the request
+        shared = asyncio.get_running_loop().create_future()
+        self._inflight[key] = shared
+        try:
+            reply, cacheable = await compute()
+        except asyncio.CancelledError:
+            shared.cancel()
+            raise
+        except Exception as e:
+            shared.set_exception(e)
+            # Waiters re-raise it; don't warn when there are none
+            shared.exception()
+            raise
+        finally:
+            self._inflight.pop(key, None)
+
+        shared.set_result(reply)
+        # Not stored if the roster changed while it was computed, or was not loaded yet
+        if cacheable and reply and version is not None and version == self.version:
+            self._set(key, reply)
+            if self.path:
+                entries = list(self._entries.items())
+                await asyncio.to_thread(self._write, entries)
+        return reply
+
+    def load(self):
+        try:
+            with open(self.path, encoding="utf-8") as file:
+                entries = json.load(file)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            print(f"Ignoring unreadable recommendation cache {self.path}: {e}")
+            return
+        now = time.time()
+        for key, expires_at, reply in entries[-self.maxsize:]:
+            if expires_at > now:
+                self._entries[key] = (expires_at, reply)
+
+    def _write(self, entries):
+        # Written to a temporary file and swapped in, so a crash never leaves a truncated cache
+        temporary = f"{self.path}.tmp"
+        try:
+            with open(temporary, "w", encoding="utf-8") as file:
+                json.dump([[key, expires_at, reply] for key, (expires_at, reply) in entries], file)
+            os.replace(temporary, self.path)
+        except OSError as e:
+            print(f"Failed to save the recommendation cache: {e}")
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses + self.coalesced
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "hit_rate": (self.hits + self.coalesced) / lookups if lookups else 0.0,
+            "ghost_hits": self.ghost_hits,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "in_flight": len(self._inflight),
+            "version": self.version,
+        }
+
+
+recommendation_cache = RecommendationCache(
+    maxsize=int(os.getenv("RECOMMENDATION_CACHE_SIZE", "1024")),
+    ttl=float(os.getenv("RECOMMENDATION_CACHE_TTL", "3600")),
+    path=os.getenv("RECOMMENDATION_CACHE_PATH") or None,
+)
+
+
+async def report_cache_stats():
+    """Print the cache statistics every STATS_INTERVAL seconds. Runs for the life of the bot."""
+    while True:
+        await asyncio.sleep(STATS_INTERVAL)
+        print(f"Recommendation cache: {json.dumps(recommendation_cache.stats())}")
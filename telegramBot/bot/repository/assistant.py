@@ -0,0 +1,171 @@
+import os
+import asyncio
+import time
+import openai
+from llm_client import get_llm_client
+
+ASSISTANT_ID = "asst_0V2Dzw7IbQAhHTMpFQ2OBnyY"
+
+MENTOR_INSTRUCTIONS = """
+                You are a sharp and intuitive mentor matcher with a knack for finding the perfect mentor for PSA employees. Your job is to listen carefully 
+                to the user's job description and match them with a mentor who can guide them. You prioritize relevance, experience, and compatibility when suggesting 
+                mentors, all while maintaining a friendly, encouraging tone. Your goal is to match the user with the most suitable mentor based on their job description and 
+                specialized skills, ensuring that the mentor's experience aligns with the user's aspirations.
+
+                Output the results in this format:
+
+                JSON Format:
+                list_of_mentors: An array containing exactly 3 mentor objects, each with the following fields:
+                name: Name of the mentor.
+                field: The broad area of expertise.
+                role: The mentor's job role.
+                specialized_field: The specific skill or subtopic the mentor excels in.
+                experience_years: Number of years of experience the mentor has.
+                email: The mentor's contact email.
+                reason_for_recommendation: A brief paragraph explaining what the user can expect to learn from these mentors, their job scopes, and why they were recommended.
+            """
+
+# Seconds a run may take before it is cancelled
+RUN_DEADLINE = float(os.getenv("ASSISTANT_RUN_DEADLINE", "60"))
+# Polling starts fast and backs off, since most runs finish within a few seconds
+POLL_INITIAL_INTERVAL = 0.25
+POLL_MAX_INTERVAL = 2.0
+POLL_BACKOFF = 1.5
+
+ACTIVE_STATUSES = ("queued", "in_progress", "cancelling")
+
+# Telegram user id -> the user's Assistants thread, reused across queries
+user_threads = {}
+# Telegram user id -> (asyncio task, thread id, run id) of the user's run in progress
+active_runs = {}
+
+
+class AssistantRunError(Exception):
+    """The run ended without an answer (failed, expired, cancelled or past its deadline)."""
+
+
+async def start_run(user_id: int, user_input: str, fresh_thread: bool = False):
+    """
+    Post the user's message and start a run in one request: on the user's thread
+    if they have one, else on a new thread created along with the run. With
+    `fresh_thread`, always on a new thread, which is not kept as the user's.
+    """
+    llm = get_llm_client()
+    client = llm.openai
+    thread_id = None if fresh_thread else user_threads.get(user_id)
+    if thread_id is not None:
+        try:
+            return await llm.call(
+                client.beta.threads.runs.create,
+                thread_id=thread_id,
+                assistant_id=ASSISTANT_ID,
+                instructions=MENTOR_INSTRUCTIONS,
+                additional_messages=[{"role": "user", "content": user_input}],
+            )
+        except (openai.NotFoundError, openai.BadRequestError) as e:
+            # The thread is gone, or still busy with a run being cancelled; start afresh
+            print(f"Starting a new thread for user {user_id}: {e}")
+
+    run = await llm.call(
+        client.beta.threads.create_and_run,
+        assistant_id=ASSISTANT_ID,
+        instructions=MENTOR_INSTRUCTIONS,
+        thread={"messages": [{"role": "user", "content": user_input}]},
+    )
+    if not fresh_thread:
+        user_threads[user_id] = run.thread_id
+    return run
+
+
+async def wait_for_run(run, deadline: float):
+    """Poll a run with adaptive backoff until it leaves the queued/in-progress states or the deadline passes."""
+    llm = get_llm_client()
+    interval = POLL_INITIAL_INTERVAL
+    while run.status in ACTIVE_STATUSES:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise AssistantRunError(f"The run did not finish within {RUN_DEADLINE:g} seconds")
+        await asyncio.sleep(min(interval, remaining))
+        interval = min(interval * POLL_BACKOFF, POLL_MAX_INTERVAL)
+        run = await llm.call(
+            llm.openai.beta.threads.runs.retrieve,
+            thread_id=run.thread_id,
+            run_id=run.id,
+            deadline=max(deadline - time.monotonic(), 1.0),
+        )
+    return run
+
+
+async def cancel_run(thread_id: str, run_id: str):
+    llm = get_llm_client()
+    try:
+        await llm.call(llm.openai.beta.threads.runs.cancel, thread_id=thread_id, run_id=run_id, deadline=10)
+    except Exception as e:
+        # The run may have finished in the meantime
+        print(f"Could not cancel run {run_id}: {e}")
+
+
+async def cancel_user_run(user_id: int) -> bool:
+    """Cancel the user's run in progress, if any. Returns whether there was one."""
+    entry = active_runs.pop(user_id, None)
+    if entry is None:
+        return False
+    task, _, _ = entry
+    task.cancel()
+    if task is not asyncio.current_task():
+        # Let it cancel its run before the thread is used again
+        await asyncio.wait([task])
+    return True
+
+
+async def ask_mentor_assistant(user_id: int, user_input: str, fresh_thread: bool = False) -> str:
+    """
+    Ask the mentor matching assistant about `user_input` on the user's thread.
+
+    A new query from the same user cancels their previous run. The run is cancelled
+    as well if it takes longer than RUN_DEADLINE or the calling task is cancelled.
+
+    Args:
+        user_id (int): Telegram user id; each user keeps one thread.
+        user_input (str): The job description or interest to match mentors for.
+        fresh_thread (bool, optional): Ask on a new thread, without the user's earlier
+            queries, so the answer depends on `user_input` alone. Defaults to False.
+
+    Returns:
+        str: The assistant's answer, or None if the run completed without one.
+
+    Raises:
+        AssistantRunError: The run failed, expired, was cancelled or ran past its deadline.
+    """
+    await cancel_user_run(user_id)
+    deadline = time.monotonic() + RUN_DEADLINE
+    task = asyncio.current_task()
+
+    run = await start_run(user_id, user_input, fresh_thread)
+    active_runs[user_id] = (task, run.thread_id, run.id)
+    try:
+        run = await wait_for_run(run, deadline)
+    except (asyncio.CancelledError, AssistantRunError):
+        await asyncio.shield(cancel_run(run.thread_id, run.id))
+        raise
+    finally:
+        if active_runs.get(user_id, (None,))[0] is task:
+            del active_runs[user_id]
+
+    if run.status != "completed":
+        error = getattr(run, "last_error", None)
+        raise AssistantRunError(f"The run ended as {run.status}" + (f": {error.message}" if error else ""))
+
+    llm = get_llm_client()
+    # Only the answer of this run, newest first
+    messages = await llm.call(
+        llm.openai.beta.threads.messages.list,
+        thread_id=run.thread_id,
+        run_id=run.id,
+        order="desc",
+        limit=1,
+    )
+    for message in messages.data:
+        if message.role == "assistant" and message.content:
+            return message.content[0].text.value
+    return None
@@ -0,0 +1,47 @@
+import os
+import json
+from dotenv import load_dotenv
+from repository.user import supabase_request
+
+load_dotenv()
+
+supabase_url = os.getenv("SUPABASE_URL")
+mentor_table = os.getenv("MENTOR_TABLE", "Mentor")
+# Optional local roster (a JSON list of mentors), used instead of Supabase when set
+mentor_data_path = os.getenv("MENTOR_DATA_PATH")
+
+PAGE_SIZE = 1000
+
+
+async def fetch_mentors(updated_after: str = None):
+    """
+    Read the mentor roster, or only the mentors changed since `updated_after`.
+
+    Args:
+        updated_after (str, optional): ISO timestamp; only mentors whose updated_at is later are returned.
+
+    Returns:
+        list: Mentor rows (id, name, field, role, specialized_field, experience_years, email,
+        updated_at), oldest change first, or None if the roster could not be read.
+    """
+    if mentor_data_path:
+        with open(mentor_data_path, encoding="utf-8") as file:
+            mentors = json.load(file)
+        if updated_after:
+            mentors = [mentor for mentor in mentors if (mentor.get("updated_at") or "") > updated_after]
+        return sorted(mentors, key=lambda mentor: mentor.get("updated_at") or "")
+
+    mentors = []
+    offset = 0
+    while True:
+        url = f"{supabase_url}/rest/v1/{mentor_table}?select=*&order=updated_at.asc&limit={PAGE_SIZE}&offset={offset}"
+        if updated_after:
+            url += f"&updated_at=gt.{updated_after}"
+        page = await supabase_request(url)
+        if page is None or not isinstance(page, list):
+            print("Failed to fetch mentors.")
+            return None
+        mentors.extend(page)
+        if len(page) < PAGE_SIZE:
+            return mentors
+        offset += PAGE_SIZE
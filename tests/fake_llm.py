@@ -0,0 +1,22 @@
+"""LLMClient wired to the fake OpenAI server of benchmarks/fake_openai.py, in-process."""
+import httpx
+from openai import AsyncOpenAI
+
+from llm_client import LLMClient, LLMSettings
+
+
+def make_client(app, **settings) -> LLMClient:
+    client = LLMClient(LLMSettings(api_key="fake", backoff_base=0.01, backoff_max=0.05, **settings))
+    # Talk to the fake server in-process instead of over a socket
+    client.openai = AsyncOpenAI(
+        api_key="fake",
+        base_url="http://fake-openai/v1",
+        max_retries=0,
+        http_client=httpx.AsyncClient(transport=httpx.ASGITransport(app=app)),
+    )
+    return client
+
+
+async def server_stats(app) -> dict:
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app)) as http:
+        return (await http.get("http://fake-openai/stats")).json()
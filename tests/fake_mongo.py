@@ -0,0 +1,226 @@
+"""An in-memory stand-in for the few motor collection methods the API uses."""
+import copy
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+
+
+def _get(document: dict, path: str):
+    for key in path.split("."):
+        if not isinstance(document, dict) or key not in document:
+            return None
+        document = document[key]
+    return document
+
+
+def _matches(document: dict, query: dict) -> bool:
+    for key, condition in query.items():
+        if key == "$or":
+            if not any(_matches(document, branch) for branch in condition):
+                return False
+            continue
+        value = _get(document, key)
+        if isinstance(condition, dict) and any(operator.startswith("$") for operator in condition):
+            for operator, operand in condition.items():
+                if operator == "$lt" and not (value is not None and value < operand):
+                    return False
+                if operator == "$in" and value not in operand:
+                    return False
+                if operator == "$nin" and value in operand:
+                    return False
+        elif value != condition:
+            return False
+    return True
+
+
+def _evaluate(document: dict, expression):
+    """Evaluate the aggregation expressions the API's pipelines use."""
+    if isinstance(expression, str) and expression.startswith("$"):
+        return _get(document, expression[1:])
+    if isinstance(expression, list):
+        return [_evaluate(document, item) for item in expression]
+    if not isinstance(expression, dict):
+        return expression
+    if len(expression) == 1 and next(iter(expression)).startswith("$"):
+        operator, operand = next(iter(expression.items()))
+        value = _evaluate(document, operand)
+        if operator == "$ifNull":
+            return value[1] if value[0] is None else value[0]
+        if operator == "$strLenCP":
+            return len(value)
+        if operator == "$gt":
+            return value[0] > value[1]
+        if operator == "$cond":
+            return value[1] if value[0] else value[2]
+        if operator == "$objectToArray":
+            return [{"k": key, "v": item} for key, item in value.items()]
+        raise NotImplementedError(operator)
+    # Fields that evaluate to a missing value are left out, as in MongoDB
+    evaluated = {key: _evaluate(document, value) for key, value in expression.items()}
+    return {key: value for key, value in evaluated.items() if value is not None}
+
+
+def _group(documents: list, spec: dict) -> list:
+    groups = {}
+    for document in documents:
+        key = _evaluate(document, spec["_id"])
+        group = groups.setdefault(repr(key), {"_id": key, **{field: 0 for field in spec if field != "_id"}})
+        for field, accumulator in spec.items():
+            if field != "_id":
+                group[field] += _evaluate(document, accumulator["$sum"])
+    return list(groups.values())
+
+
+def _aggregate(documents: list, pipeline: list) -> list:
+    for stage in pipeline:
+        (name, spec), = stage.items()
+        if name == "$match":
+            documents = [document for document in documents if _matches(document, spec)]
+        elif name == "$facet":
+            documents = [{facet: _aggregate(documents, stages) for facet, stages in spec.items()}]
+        elif name == "$group":
+            documents = _group(documents, spec)
+        elif name == "$project":
+            documents = [
+                {**({} if spec.get("_id") == 0 else {"_id": document["_id"]}),
+                 **_evaluate(document, {key: value for key, value in spec.items() if key != "_id"})}
+                for document in documents
+            ]
+        elif name == "$unwind":
+            path = spec[1:]
+            documents = [{**document, path: item} for document in documents for item in document.get(path) or []]
+        else:
+            raise NotImplementedError(name)
+    return documents
+
+
+def _set_path(document: dict, path: str, update):
+    keys = path.split(".")
+    for key in keys[:-1]:
+        document = document.setdefault(key, {})
+    document[keys[-1]] = update(document.get(keys[-1]))
+
+
+def _unset_path(document: dict, path: str):
+    keys = path.split(".")
+    for key in keys[:-1]:
+        document = document.get(key, {})
+    document.pop(keys[-1], None)
+
+
+def _apply_update(document: dict, update: dict, inserting: bool):
+    for path, value in update.get("$set", {}).items():
+        _set_path(document, path, lambda _: value)
+    for path, amount in update.get("$inc", {}).items():
+        _set_path(document, path, lambda current: (current or 0) + amount)
+    for path, value in update.get("$max", {}).items():
+        _set_path(document, path, lambda current: value if current is None or value > current else current)
+    for path in update.get("$unset", {}):
+        _unset_path(document, path)
+    if inserting:
+        for path, value in update.get("$setOnInsert", {}).items():
+            _set_path(document, path, lambda _: value)
+
+
+class _Cursor:
+    def __init__(self, documents, project=copy.deepcopy):
+        self.documents = documents
+        # Projected as documents are read, so sort sees every field as the server would
+        self.project = project
+
+    def sort(self, key, direction):
+        self.documents.sort(key=lambda document: _get(document, key), reverse=direction < 0)
+        return self
+
+    def limit(self, count):
+        self.documents = self.documents[:count]
+        return self
+
+    async def to_list(self, length=None):
+        documents = self.documents[:length] if length is not None else self.documents
+        return [self.project(document) for document in documents]
+
+    def __aiter__(self):
+        async def iterate():
+            for document in self.documents:
+                yield self.project(document)
+        return iterate()
+
+
+class FakeCollection:
+    def __init__(self, documents=()):
+        self.documents = {document["_id"]: copy.deepcopy(document) for document in documents}
+
+    @staticmethod
+    def _project(document, projection):
+        if projection is None:
+            return copy.deepcopy(document)
+        return {key: copy.deepcopy(value) for key, value in document.items() if key == "_id" or key in projection}
+
+    def _find(self, query):
+        return [document for document in self.documents.values() if _matches(document, query)]
+
+    async def count_documents(self, query):
+        return len(self._find(query))
+
+    async def estimated_document_count(self):
+        return len(self.documents)
+
+    async def find_one(self, query, projection=None, sort=None):
+        documents = self._find(query)
+        for key, direction in reversed(sort or []):
+            documents.sort(key=lambda document: _get(document, key), reverse=direction < 0)
+        return self._project(documents[0], projection) if documents else None
+
+    def find(self, query, projection=None, batch_size=None):
+        return _Cursor(self._find(query), lambda document: self._project(document, projection))
+
+    def aggregate(self, pipeline):
+        return _Cursor(_aggregate([copy.deepcopy(document) for document in self.documents.values()], pipeline))
+
+    async def insert_one(self, document):
+        if document["_id"] in self.documents:
+            raise DuplicateKeyError("E11000 duplicate key")
+        self.documents[document["_id"]] = copy.deepcopy(document)
+
+    async def update_one(self, query, update, upsert=False):
+        for document in self._find(query):
+            _apply_update(document, update, inserting=False)
+            return
+        if not upsert:
+            return
+        document = {key: value for key, value in query.items() if not key.startswith("$") and not isinstance(value, dict)}
+        if document.get("_id") in self.documents:
+            raise DuplicateKeyError("E11000 duplicate key")
+        _apply_update(document, update, inserting=True)
+        self.documents[document["_id"]] = document
+
+    async def replace_one(self, query, replacement, upsert=False):
+        for document in self._find(query):
+            self.documents[document["_id"]] = copy.deepcopy(replacement)
+            return
+        if upsert:
+            if query["_id"] in self.documents:
+                raise DuplicateKeyError("E11000 duplicate key")
+            self.documents[query["_id"]] = copy.deepcopy(replacement)
+
+    async def bulk_write(self, operations, ordered=True):
+        errors = []
+        for index, operation in enumerate(operations):
+            document = operation._doc
+            try:
+                if type(operation).__name__ == "UpdateOne":
+                    await self.update_one(operation._filter, document, upsert=operation._upsert)
+                else:
+                    await self.replace_one(operation._filter, document, upsert=operation._upsert)
+            except DuplicateKeyError:
+                errors.append({"index": index, "code": 11000})
+        if errors:
+            raise BulkWriteError({"writeErrors": errors})
+
+    async def delete_many(self, query):
+        for document in self._find(query):
+            del self.documents[document["_id"]]
+
+    async def delete_one(self, query):
+        for document in self._find(query):
+            del self.documents[document["_id"]]
+            return
@@ -0,0 +1,83 @@
+import asyncio
+
+import pytest
+
+from benchmarks.fake_openai import MENTOR_REPLY, create_app
+from repository import assistant
+from tests.fake_llm import make_client, server_stats
+
+# The bot still uses the Assistants API
+pytestmark = pytest.mark.filterwarnings("ignore:The Assistants API is deprecated")
+
+
+@pytest.fixture
+def fake_assistant(monkeypatch):
+    """Point the bot's Assistants calls at a fake server answering each run after `latency` seconds."""
+    def connect(latency):
+        app = create_app(latency=latency)
+        client = make_client(app)
+        monkeypatch.setattr(assistant, "get_llm_client", lambda: client)
+        return app
+
+    monkeypatch.setattr(assistant, "user_threads", {})
+    monkeypatch.setattr(assistant, "active_runs", {})
+    return connect
+
+
+def test_answer_is_polled_with_backoff_on_the_users_thread(fake_assistant):
+    async def run():
+        app = fake_assistant(latency=1.0)
+        assert await assistant.ask_mentor_assistant(1, "data engineer") == MENTOR_REPLY
+        # 0.25 + 0.375 + 0.5625 seconds of backoff cover the second the run takes
+        assert (await server_stats(app))["run_polls"] == 3
+        thread = assistant.user_threads[1]
+
+        assert await assistant.ask_mentor_assistant(1, "data scientist") == MENTOR_REPLY
+        assert assistant.user_threads[1] == thread
+        assert assistant.active_runs == {}
+
+    asyncio.run(run())
+
+
+def test_fresh_thread_is_not_kept_for_the_user(fake_assistant):
+    async def run():
+        app = fake_assistant(latency=0)
+        await assistant.ask_mentor_assistant(1, "data engineer")
+        thread = assistant.user_threads[1]
+
+        assert await assistant.ask_mentor_assistant(1, "data engineer", fresh_thread=True) == MENTOR_REPLY
+        assert assistant.user_threads == {1: thread}
+        assert (await server_stats(app))["runs"] == 2
+
+    asyncio.run(run())
+
+
+def test_run_past_its_deadline_is_cancelled(fake_assistant, monkeypatch):
+    monkeypatch.setattr(assistant, "RUN_DEADLINE", 0.4)
+
+    async def run():
+        app = fake_assistant(latency=30)
+        with pytest.raises(assistant.AssistantRunError):
+            await assistant.ask_mentor_assistant(1, "data engineer")
+        assert assistant.active_runs == {}
+        # The cancelled run no longer blocks the thread
+        client = assistant.get_llm_client()
+        cancelled = await client.openai.beta.threads.runs.retrieve(thread_id=assistant.user_threads[1], run_id="run_fake_1")
+        assert cancelled.status == "cancelled"
+        assert (await server_stats(app))["run_polls"] <= 3
+
+    asyncio.run(run())
+
+
+def test_new_query_cancels_the_users_run_in_progress(fake_assistant):
+    async def run():
+        fake_assistant(latency=0.5)
+        first = asyncio.ensure_future(assistant.ask_mentor_assistant(1, "data engineer"))
+        await asyncio.sleep(0.1)
+        second = await assistant.ask_mentor_assistant(1, "data scientist")
+
+        assert second == MENTOR_REPLY
+        with pytest.raises(asyncio.CancelledError):
+            await first
+
+    asyncio.run(run())
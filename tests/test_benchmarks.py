@@ -0,0 +1,89 @@
+import json
+import sys
+from argparse import Namespace
+
+import pandas as pd
+import pytest
+
+from api.course_recommender import CATALOG_COLUMNS, CourseRecommender
+from benchmarks import recommender as recommender_benchmark
+from benchmarks.retrieval_scaling import check_parity
+from benchmarks.synthetic import make_catalog, make_queries, make_vocabulary, write_coursera_csv
+
+
+def test_synthetic_catalog_is_reproducible():
+    catalog = make_catalog(500, vocab_size=300, seed=2)
+
+    assert list(catalog.columns) == CATALOG_COLUMNS and len(catalog) == 500
+    pd.testing.assert_frame_equal(catalog, make_catalog(500, vocab_size=300, seed=2))
+    assert not catalog.equals(make_catalog(500, vocab_size=300, seed=3))
+    lengths = catalog["course_title"].str.split().str.len()
+    assert lengths.between(2, 7).all()
+    assert len(set(make_vocabulary(300, seed=2))) == 300
+    assert catalog["overall_rating"].between(0, 1).all()
+
+
+def test_synthetic_queries_use_catalog_words():
+    catalog = make_catalog(200, vocab_size=100, seed=4)
+    words = set(" ".join(catalog["course_title"]).split())
+    queries = make_queries(catalog, 30, seed=5)
+
+    assert queries == make_queries(catalog, 30, seed=5)
+    for query in queries:
+        assert 1 <= len(query.split(", ")) <= 3
+        assert set(query.split(", ")) <= words
+
+
+def test_synthetic_csv_builds_like_the_kaggle_dataset(tmp_path, monkeypatch):
+    from api import course_recommender
+
+    dataset_dir = write_coursera_csv(str(tmp_path), 300, vocab_size=200, seed=6)
+    language_cache = str(tmp_path / "language_cache.json")
+    recommender_benchmark.seed_language_cache(dataset_dir, language_cache)
+    monkeypatch.setattr(course_recommender.kagglehub, "dataset_download", lambda handle: dataset_dir)
+
+    model = CourseRecommender.from_dataset(language_cache)
+    # Enrolment given in millions is dropped by the preprocessing, as in the real dataset
+    millions = pd.read_csv(f"{dataset_dir}/coursea_data.csv")["course_students_enrolled"].str.endswith("m").sum()
+    assert model.vectors.shape[0] == 300 - millions
+
+
+def test_run_size_reports_every_compared_metric(monkeypatch):
+    # benchmark_endpoint points the app at the artifact and imports it from api/
+    monkeypatch.setenv("COURSE_ARTIFACT_PATH", "")
+    monkeypatch.setattr(sys, "path", list(sys.path))
+
+    result = recommender_benchmark.run_size(150, vocab_size=200, n_queries=5, n_requests=5,
+                                            detect_language=False, seed=0)
+
+    assert result["courses"] == 150 and 0 < result["indexed_courses"] <= 150
+    for metric in recommender_benchmark.METRICS:
+        assert result[metric] > 0
+
+
+def write_report(path, **metrics):
+    with open(path, "w") as file:
+        json.dump({"commit": "0" * 40, "results": [{"courses": 891, **metrics}]}, file)
+    return str(path)
+
+
+def test_compare_flags_regressions_beyond_the_threshold(tmp_path, capsys):
+    baseline = write_report(tmp_path / "baseline.json", recommend_p50_ms=1.0, endpoint_throughput_rps=1000.0)
+    slower = write_report(tmp_path / "slower.json", recommend_p50_ms=1.5, endpoint_throughput_rps=1000.0)
+    fewer = write_report(tmp_path / "fewer.json", recommend_p50_ms=1.0, endpoint_throughput_rps=800.0)
+    better = write_report(tmp_path / "better.json", recommend_p50_ms=0.5, endpoint_throughput_rps=1050.0)
+
+    for candidate in (slower, fewer):
+        with pytest.raises(SystemExit) as exit_info:
+            recommender_benchmark.compare(Namespace(baseline=baseline, candidate=candidate, threshold=0.1))
+        assert exit_info.value.code == 1
+        assert "REGRESSION" in capsys.readouterr().out
+    recommender_benchmark.compare(Namespace(baseline=baseline, candidate=better, threshold=0.1))
+    assert "REGRESSION" not in capsys.readouterr().out
+
+
+def test_index_has_parity_with_exhaustive_scoring():
+    catalog = make_catalog(1000, vocab_size=500, seed=8)
+    model = CourseRecommender.from_catalog(catalog)
+
+    assert check_parity(model, make_queries(catalog, 50, seed=9), 10) == 0
@@ -0,0 +1,43 @@
+from types import SimpleNamespace
+
+from api import cache
+from api.cache import TTLCache
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+def test_entries_expire_after_ttl(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(cache, "time", SimpleNamespace(monotonic=clock.monotonic))
+    entries = TTLCache(maxsize=4, ttl=10)
+    entries.set("a", 1)
+
+    clock.now += 9
+    assert entries.get("a") == 1
+    clock.now += 2
+    assert entries.get("a", "expired") == "expired"
+    # A write restarts the entry's lifetime
+    entries.set("a", 2)
+    clock.now += 9
+    assert entries.get("a") == 2
+
+    stats = entries.stats()
+    assert (stats["hits"], stats["misses"], stats["expirations"]) == (2, 1, 1)
+
+
+def test_least_recently_used_entry_is_evicted():
+    entries = TTLCache(maxsize=2, ttl=60)
+    entries.set("a", 1)
+    entries.set("b", 2)
+    entries.get("a")
+    entries.set("c", 3)
+
+    assert entries.get("b") is None
+    assert (entries.get("a"), entries.get("c")) == (1, 3)
+    assert entries.stats()["evictions"] == 1
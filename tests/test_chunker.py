@@ -0,0 +1,61 @@
+import pytest
+
+from api.chunker import token_windows
+
+BOS, EOS = 0, 2
+
+
+class WordTokenizer:
+    """One token per word, with the two special tokens XLM-RoBERTa adds around a sequence."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def num_special_tokens_to_add(self, pair=False):
+        return 2
+
+    def __call__(self, text, add_special_tokens=True, truncation=True, verbose=True):
+        assert not add_special_tokens and not truncation
+        self.calls += 1
+        return {"input_ids": [int(word) for word in text.split()]}
+
+    def build_inputs_with_special_tokens(self, ids):
+        return [BOS, *ids, EOS]
+
+
+def text_of(count):
+    return " ".join(str(token) for token in range(10, 10 + count))
+
+
+@pytest.mark.parametrize("count", [0, 1, 8, 9, 25])
+def test_windows_cover_the_text_once(count):
+    tokenizer = WordTokenizer()
+    windows = list(token_windows(tokenizer, text_of(count), max_length=10))
+
+    assert tokenizer.calls == 1
+    assert all(len(window) <= 10 and window[0] == BOS and window[-1] == EOS for window in windows)
+    assert [token for window in windows for token in window[1:-1]] == list(range(10, 10 + count))
+    assert len(windows) == max(1, -(-count // 8))
+
+
+def test_consecutive_windows_share_the_overlap():
+    windows = [window[1:-1] for window in token_windows(WordTokenizer(), text_of(20), max_length=10, overlap=3)]
+
+    assert [len(window) for window in windows] == [8, 8, 8, 5]
+    for previous, window in zip(windows, windows[1:]):
+        assert previous[-3:] == window[:3]
+    assert windows[-1][-1] == 29
+
+
+def test_windows_are_produced_lazily():
+    tokenizer = WordTokenizer()
+    windows = token_windows(tokenizer, text_of(100), max_length=10)
+    assert tokenizer.calls == 0
+    next(windows)
+    assert tokenizer.calls == 1
+
+
+@pytest.mark.parametrize("max_length, overlap", [(2, 0), (10, 8), (10, -1)])
+def test_invalid_window_sizes_are_rejected(max_length, overlap):
+    with pytest.raises(ValueError):
+        next(token_windows(WordTokenizer(), text_of(5), max_length=max_length, overlap=overlap))
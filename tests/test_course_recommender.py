@@ -0,0 +1,82 @@
+import mmap
+
+import numpy as np
+import pytest
+
+from api.course_recommender import CATALOG_COLUMNS, CourseRecommender
+from benchmarks.synthetic import make_catalog, make_queries
+
+CATALOG = make_catalog(400, vocab_size=300, seed=3)
+QUERIES = make_queries(CATALOG, 20, seed=4) + ["no such words", ""]
+
+
+@pytest.fixture(scope="module")
+def recommender():
+    return CourseRecommender.from_catalog(CATALOG)
+
+
+def is_memory_mapped(array):
+    # scipy may wrap the loaded arrays in views; follow them back to the mapped file
+    while isinstance(array, np.ndarray):
+        if isinstance(array, np.memmap):
+            return True
+        array = array.base
+    return isinstance(array, mmap.mmap)
+
+
+def exhaustive_scores(recommender, query):
+    return (recommender.vectors @ recommender.vectorizer.transform([query]).T).toarray().ravel()
+
+
+@pytest.mark.parametrize("k", [1, 10, 50])
+def test_index_top_k_matches_exhaustive_scores(recommender, k):
+    for query in QUERIES:
+        rows, scores = recommender.index.top_k(recommender.vectorizer.transform([query]), k)
+        expected = exhaustive_scores(recommender, query)
+        assert len(rows) == k
+        assert len(set(rows.tolist())) == k
+        np.testing.assert_allclose(scores, expected[rows])
+        # The same scores as the k best of a full ranking, best first
+        np.testing.assert_allclose(scores, np.sort(expected)[::-1][:k])
+
+
+@pytest.mark.parametrize("k", [0, -1])
+def test_index_top_k_of_nothing_is_empty(recommender, k):
+    rows, scores = recommender.index.top_k(recommender.vectorizer.transform([QUERIES[0]]), k)
+    assert len(rows) == 0 and len(scores) == 0
+    assert recommender.recommend_columns(QUERIES[0], k)["course_id"] == []
+    assert recommender.recommend_batch_columns([QUERIES[0]], k)[0]["course_id"] == []
+
+
+def test_index_top_k_beyond_catalog_returns_every_course(recommender):
+    rows, _ = recommender.index.top_k(recommender.vectorizer.transform([QUERIES[0]]), len(CATALOG) + 10)
+    assert sorted(rows.tolist()) == list(range(len(CATALOG)))
+
+
+def test_batch_matches_single_queries(recommender):
+    for k in (0, 5, len(CATALOG) + 1):
+        batch = recommender.recommend_batch_columns(QUERIES, k)
+        assert batch == [recommender.recommend_columns(query, k) for query in QUERIES]
+
+
+def test_equivalent_queries_share_a_cache_key(recommender):
+    for query in QUERIES[:5]:
+        shuffled = ", ".join(reversed(query.upper().split())) + "!"
+        assert recommender.normalize_query(shuffled) == recommender.normalize_query(query)
+        assert recommender.recommend_columns(shuffled, 10) == recommender.recommend_columns(query, 10)
+
+
+def test_artifact_round_trip_is_memory_mapped(recommender, tmp_path):
+    path = tmp_path / "model"
+    recommender.save_model(str(path))
+    # Saving again swaps the new artifact in over the old one
+    recommender.save_model(str(path))
+    loaded = CourseRecommender.load_model(str(path))
+
+    assert loaded.version == recommender.version
+    for array in (loaded.vectors.data, loaded.vectors.indices, loaded.vectors.indptr, loaded.index.doc_ids,
+                  loaded.index.weights, loaded.course_ids, *(loaded.catalog[col] for col in CATALOG_COLUMNS)):
+        assert is_memory_mapped(array)
+    for query in QUERIES:
+        assert loaded.recommend_columns(query, 10) == recommender.recommend_columns(query, 10)
+        assert loaded.normalize_query(query) == recommender.normalize_query(query)
@@ -0,0 +1,73 @@
+import asyncio
+from datetime import datetime, timedelta
+
+from api.feedback_repository import CHOICE_FIELDS, FEEDBACK_TEXT_FIELDS, RATING_SCALES, FeedbackRepository
+from tests.fake_mongo import FakeCollection
+
+START = datetime(2024, 10, 1)
+SATISFACTION = RATING_SCALES["workSatisfaction"]
+
+
+def feedback_document(number: int, team: int = 1) -> dict:
+    document = {
+        "_id": f"f{number}",
+        "teamNumber": team,
+        "createdAt": START + timedelta(minutes=(number * 7) % 11),
+        "enjoymentOfWork": "good team" if number % 3 else "",
+        "workStressors": "ignored, not a feedback field",
+        "workSatisfaction": SATISFACTION[number % len(SATISFACTION)],
+        "trainingPreference": "Online" if number % 2 else "In person",
+    }
+    if number % 4 == 0:
+        # Unanswered and unknown answers are not scored
+        document["workLifeBalance"] = "Something else"
+        document["collaborationChallenges"] = None
+        del document["trainingPreference"]
+    return document
+
+
+def test_team_stats_match_a_scan_of_the_team():
+    documents = [feedback_document(number) for number in range(12)] + [feedback_document(99, team=2)]
+    team = [document for document in documents if document["teamNumber"] == 1]
+
+    stats = asyncio.run(FeedbackRepository(FakeCollection(documents)).team_feedback_stats(1))
+
+    assert stats["total_count"] == len(team)
+    assert stats["response_counts"] == {
+        field: sum(1 for document in team if document.get(field)) for field in FEEDBACK_TEXT_FIELDS
+    }
+    assert set(stats["survey"]) == set(RATING_SCALES) | set(CHOICE_FIELDS)
+    satisfaction = stats["survey"]["workSatisfaction"]
+    assert satisfaction["counts"] == {answer: sum(1 for document in team if document["workSatisfaction"] == answer)
+                                      for answer in SATISFACTION}
+    scores = [len(SATISFACTION) - SATISFACTION.index(document["workSatisfaction"]) for document in team]
+    assert (satisfaction["answered"], satisfaction["scale"]) == (len(team), 5)
+    assert satisfaction["average"] == sum(scores) / len(scores)
+    balance = stats["survey"]["workLifeBalance"]
+    assert balance["counts"] == {"Something else": 3} and balance["answered"] == 0 and balance["average"] is None
+    assert stats["survey"]["trainingPreference"]["counts"] == {"Online": 6, "In person": 3}
+
+
+def test_team_without_feedback_has_empty_stats():
+    stats = asyncio.run(FeedbackRepository(FakeCollection()).team_feedback_stats(1))
+
+    assert stats["total_count"] == 0
+    assert set(stats["response_counts"].values()) == {0}
+    assert stats["survey"]["workSatisfaction"] == {"counts": {}, "answered": 0, "scale": 5, "average": None}
+
+
+def test_team_feedback_is_streamed_oldest_first_in_projected_batches():
+    documents = [feedback_document(number) for number in range(11)] + [feedback_document(99, team=2)]
+    repository = FeedbackRepository(FakeCollection(documents), batch_size=4)
+
+    async def run():
+        return [batch async for batch in repository.iter_team_feedback(1, ["enjoymentOfWork"])]
+
+    batches = asyncio.run(run())
+    assert [len(batch) for batch in batches] == [4, 4, 3]
+    streamed = [document for batch in batches for document in batch]
+    expected = sorted(documents[:11], key=lambda document: document["createdAt"])
+    assert [document["_id"] for document in streamed] == [document["_id"] for document in expected]
+    assert all(set(document) == {"_id", "enjoymentOfWork"} for document in streamed)
+    assert asyncio.run(repository.latest_team_feedback_at(1)) == expected[-1]["createdAt"]
+    assert asyncio.run(repository.latest_team_feedback_at(3)) is None
@@ -0,0 +1,81 @@
+import asyncio
+
+from api.gpt import GPT, count_tokens, pack_batches
+from benchmarks.fake_openai import REPLY, create_app
+from tests.fake_llm import make_client, server_stats
+
+FIELDS = ["enjoymentOfWork", "workRelatedStressors"]
+
+
+def make_feedback(count: int) -> dict:
+    return {field: [f"{field} response number {i}, " + "with some detail " * 5 for i in range(count)]
+            for field in FIELDS}
+
+
+def recording_gpt(app, **options):
+    """GPT over the fake server, recording the user prompt of every chat call."""
+    llm = make_client(app)
+    prompts = []
+    chat = llm.chat
+
+    async def record(**kwargs):
+        prompts.append(kwargs["messages"][-1]["content"])
+        return await chat(**kwargs)
+
+    llm.chat = record
+    return GPT(llm=llm, **options), prompts
+
+
+def test_pack_batches_keeps_order_and_budget():
+    items = [(tokens, index) for index, tokens in enumerate([3, 4, 2, 9, 1, 1, 5])]
+
+    batches = pack_batches(items, max_tokens=7)
+    assert [item for batch in batches for item in batch] == list(range(7))
+    assert batches == [[0, 1], [2], [3], [4, 5, 6]]
+    # An item over budget gets a batch of its own; min_items may go over budget
+    assert pack_batches(items, max_tokens=7, min_items=2) == [[0, 1], [2, 3], [4, 5, 6]]
+
+
+def test_small_feedback_is_reported_in_one_call():
+    async def run():
+        app = create_app(latency=0)
+        gpt, prompts = recording_gpt(app)
+        feedback = make_feedback(3)
+        report = await gpt.generate_manager_report(feedback)
+
+        assert report["manager_report"] == REPLY
+        assert report["summarization"]["mode"] == "single"
+        assert len(prompts) == 1
+        assert all(response in prompts[0] for field in FIELDS for response in feedback[field])
+
+    asyncio.run(run())
+
+
+def test_large_feedback_is_mapped_and_reduced_before_the_report():
+    async def run():
+        app = create_app(latency=0.01)
+        gpt, prompts = recording_gpt(app, single_prompt_tokens=500, batch_tokens=120, max_concurrency=3)
+        feedback = make_feedback(40)
+        report = await gpt.generate_manager_report(feedback)
+
+        stats = report["summarization"]
+        assert stats["mode"] == "hierarchical"
+        map_stage, reduce_stage, report_stage = stats["stages"]
+        assert map_stage["calls"] == map_stage["batches"] > 1
+        assert reduce_stage["calls"] > 0 and reduce_stage["rounds"] > 0
+        assert report_stage["calls"] == 1
+        assert len(prompts) == map_stage["calls"] + reduce_stage["calls"] + 1
+        assert stats["prompt_tokens"] == sum(stage["prompt_tokens"] for stage in stats["stages"])
+
+        # Every response is summarized by exactly one map call
+        map_prompts = prompts[:map_stage["calls"]]
+        for field in FIELDS:
+            for response in feedback[field]:
+                assert sum(f"{response}\n" in prompt for prompt in map_prompts) == 1
+        # The report sees only merged summaries, which fit in one batch
+        final = prompts[-1]
+        assert not any(response in final for response in feedback[FIELDS[0]])
+        assert count_tokens("\n\n".join([REPLY] * final.count("Feedback Summary "))) <= 120
+        assert (await server_stats(app))["peak_in_flight"] <= 3
+
+    asyncio.run(run())
@@ -0,0 +1,136 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+from api.course_recommender import CATALOG_COLUMNS, CourseRecommender
+from api.course_store import CourseStore
+from api.incremental_recommender import IncrementalCourseRecommender
+from benchmarks.synthetic import make_catalog, make_queries
+from tests.fake_mongo import FakeCollection
+
+CATALOG = make_catalog(300, vocab_size=400, seed=5)
+QUERIES = make_queries(CATALOG, 20, seed=6) + ["no such words"]
+BASE_ROWS = 200
+
+
+def course(row):
+    return {col: CATALOG[col].iloc[row] for col in CATALOG_COLUMNS}
+
+
+def incremental_recommender():
+    base = CourseRecommender.from_catalog(CATALOG.iloc[:BASE_ROWS])
+    # Compaction only when the test asks for it
+    return IncrementalCourseRecommender(base, compact_threshold=1.0, min_compact_changes=10 ** 6)
+
+
+def test_compacted_catalog_matches_full_refit():
+    recommender = incremental_recommender()
+    for row in range(BASE_ROWS, len(CATALOG)):
+        recommender.add_course(int(CATALOG.index[row]), course(row))
+    deleted = [3, 50, BASE_ROWS + 7, len(CATALOG) - 1]
+    for course_id in deleted:
+        assert recommender.delete_course(course_id)
+    assert not recommender.delete_course(deleted[0])
+    assert len(recommender) == len(CATALOG) - len(deleted)
+
+    recommender.compact()
+    refit = CourseRecommender.from_catalog(CATALOG.drop(index=deleted))
+    for query in QUERIES:
+        for k in (1, 10, len(CATALOG)):
+            assert recommender.recommend_columns(query, k) == refit.recommend_columns(query, k)
+
+
+def test_updated_course_is_scored_by_its_new_title():
+    recommender = incremental_recommender()
+    updated = course(0)
+    updated["course_title"] = CATALOG["course_title"].iloc[BASE_ROWS]
+    recommender.update_course(int(CATALOG.index[0]), updated)
+
+    columns = recommender.recommend_columns(updated["course_title"], 1)
+    assert columns["course_id"] == [int(CATALOG.index[0])]
+    assert len(recommender) == BASE_ROWS
+
+
+def test_every_change_and_compaction_changes_the_version():
+    recommender = incremental_recommender()
+    versions = [recommender.version]
+    recommender.add_course(int(CATALOG.index[BASE_ROWS]), course(BASE_ROWS))
+    versions.append(recommender.version)
+    recommender.delete_course(int(CATALOG.index[0]))
+    versions.append(recommender.version)
+    # Compaction re-weights every course, so results cached before it must not be served after
+    recommender.compact()
+    versions.append(recommender.version)
+
+    assert len(set(versions)) == len(versions)
+    assert all(version.startswith(recommender.base_version + "+") for version in versions)
+
+
+def test_changes_during_a_background_compaction_are_kept():
+    recommender = incremental_recommender()
+    with recommender._lock:
+        # The compaction thread cannot swap its segment in until the lock is released
+        compacting = recommender.compact(background=True)
+        recommender.add_course(int(CATALOG.index[BASE_ROWS]), course(BASE_ROWS))
+        recommender.delete_course(int(CATALOG.index[1]))
+    compacting.join()
+
+    assert len(recommender) == BASE_ROWS
+    assert recommender.recommend_columns(CATALOG["course_title"].iloc[BASE_ROWS], 1)["course_id"] == [int(CATALOG.index[BASE_ROWS])]
+    assert int(CATALOG.index[1]) not in recommender.recommend_columns(CATALOG["course_title"].iloc[1], BASE_ROWS)["course_id"]
+
+
+def course_ids(recommender, query):
+    return set(recommender.recommend_columns(query, len(CATALOG))["course_id"])
+
+
+def test_persisted_changes_are_replayed_on_reload():
+    live = incremental_recommender()
+    courses, tombstones = FakeCollection(), FakeCollection()
+    store = CourseStore(courses, tombstones)
+    updated = course(0)
+    updated["course_title"] = CATALOG["course_title"].iloc[BASE_ROWS + 10]
+
+    async def change(course_id, row=None):
+        if row is None:
+            await store.delete(course_id)
+            live.delete_course(int(course_id))
+        else:
+            await store.save(course_id, row)
+            live.add_course(int(course_id), row)
+
+    async def make_changes():
+        for row in range(BASE_ROWS, BASE_ROWS + 5):
+            await change(str(CATALOG.index[row]), course(row))
+        await change(str(CATALOG.index[0]), updated)
+        await change(str(CATALOG.index[1]))
+        await change(str(CATALOG.index[BASE_ROWS]))
+    asyncio.run(make_changes())
+
+    # Stored under the Prisma Course field names
+    assert courses.documents[str(CATALOG.index[0])]["title"] == updated["course_title"]
+    reloaded = incremental_recommender()
+    assert asyncio.run(store.replay(reloaded)) == {"added": 5, "deleted": 1}
+    assert len(reloaded) == len(live) == BASE_ROWS + 3
+    for query in QUERIES + [updated["course_title"]]:
+        assert course_ids(reloaded, query) == course_ids(live, query)
+    assert reloaded.recommend_columns(updated["course_title"], 1)["course_id"] == [int(CATALOG.index[0])]
+
+
+def test_course_written_after_its_delete_is_kept():
+    deleted_at = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    row = course(BASE_ROWS)
+    document = {"title": row["course_title"], "certificateType": row["course_Certificate_type"],
+                "rating": row["course_rating"], "difficulty": row["course_difficulty"],
+                "studentsEnrolled": row["course_students_enrolled"], "overallRating": row["overall_rating"]}
+    # Courses created through Prisma have cuid ids
+    courses = FakeCollection([
+        {"_id": "ckrecreated", **document, "updatedAt": deleted_at + timedelta(seconds=1)},
+        {"_id": "ckstale", **document, "updatedAt": deleted_at - timedelta(seconds=1)},
+    ])
+    tombstones = FakeCollection([{"_id": course_id, "deletedAt": deleted_at}
+                                 for course_id in ("ckrecreated", "ckstale", str(CATALOG.index[2]))])
+    recommender = incremental_recommender()
+
+    assert asyncio.run(CourseStore(courses, tombstones).replay(recommender)) == {"added": 1, "deleted": 1}
+    assert "ckrecreated" in recommender and "ckstale" not in recommender
+    assert int(CATALOG.index[2]) not in recommender
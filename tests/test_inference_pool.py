@@ -0,0 +1,73 @@
+import asyncio
+import threading
+
+import pytest
+
+# The pool imports the Analyzer, which needs the sentiment model's dependencies
+pytest.importorskip("torch")
+pytest.importorskip("tweetnlp")
+
+from api import inference_pool
+from api.inference_pool import InferencePool, InferenceQueueFull
+
+
+class BlockingAnalyzer:
+    """Labels every text "neutral" once `release` is set, recording the job sizes."""
+
+    def __init__(self):
+        self.release = threading.Event()
+        self.jobs = []
+
+    def get_response_window_sentiments(self, texts):
+        self.release.wait(timeout=10)
+        self.jobs.append(len(texts))
+        return [["neutral"] for _ in texts]
+
+
+@pytest.fixture
+def analyzer(monkeypatch):
+    analyzer = BlockingAnalyzer()
+    # workers=0 scores on a background thread with the module's preloaded Analyzer
+    monkeypatch.setattr(inference_pool, "_analyzer", analyzer)
+    return analyzer
+
+
+def test_full_queue_rejects_new_requests_without_waiting(analyzer):
+    pool = InferencePool(workers=0, max_queued_jobs=2, job_size=2)
+
+    async def run():
+        first = asyncio.ensure_future(pool.get_window_sentiments(["a", "b", "c", "d"]))
+        await asyncio.sleep(0)
+        assert pool.pending_jobs == 2
+        with pytest.raises(InferenceQueueFull):
+            await pool.get_window_sentiments(["e"])
+        analyzer.release.set()
+        labels = await first
+        assert pool.pending_jobs == 0
+        # Room again once the jobs have finished
+        assert await pool.get_window_sentiments(["e"]) == [["neutral"]]
+        return labels
+
+    try:
+        assert asyncio.run(run()) == [["neutral"]] * 4
+    finally:
+        analyzer.release.set()
+        pool.shutdown()
+
+
+def test_large_request_is_split_into_at_most_max_queued_jobs(analyzer):
+    analyzer.release.set()
+    pool = InferencePool(workers=0, max_queued_jobs=4, job_size=2)
+
+    async def run():
+        offsets = []
+        async for offset, labels in pool.iter_window_sentiments([str(i) for i in range(20)]):
+            offsets.append((offset, len(labels)))
+        return offsets
+
+    try:
+        assert sorted(asyncio.run(run())) == [(0, 5), (5, 5), (10, 5), (15, 5)]
+        assert analyzer.jobs == [5, 5, 5, 5]
+        assert pool.pending_jobs == 0
+    finally:
+        pool.shutdown()
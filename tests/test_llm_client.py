@@ -0,0 +1,78 @@
+import asyncio
+
+import openai
+import pytest
+
+from llm_client import LLMDeadlineExceeded
+from benchmarks.fake_openai import REPLY, create_app
+from tests.fake_llm import make_client, server_stats
+
+MESSAGES = [{"role": "user", "content": "How is the team doing?"}]
+
+
+def test_chat_returns_the_reply():
+    async def run():
+        client = make_client(create_app(latency=0))
+        completion = await client.chat(model="gpt-4o-mini", messages=MESSAGES)
+        assert completion.choices[0].message.content == REPLY
+        assert client.stats()["calls"] == 1 and client.stats()["failures"] == 0
+
+    asyncio.run(run())
+
+
+def test_rate_limited_calls_are_retried_until_they_succeed():
+    async def run():
+        app = create_app(latency=0, rate_limit=0.5, retry_after=0.01)
+        client = make_client(app, max_retries=50)
+        results = await asyncio.gather(*(client.chat(model="gpt-4o-mini", messages=MESSAGES) for _ in range(10)))
+        assert all(result.choices[0].message.content == REPLY for result in results)
+
+        server = await server_stats(app)
+        stats = client.stats()
+        assert server["requests"] == 10 + stats["retries"]
+        assert stats["rate_limited"] == stats["retries"] == server["rate_limited"]
+        assert stats["failures"] == 0
+
+    asyncio.run(run())
+
+
+def test_retries_give_up_with_the_last_error():
+    async def run():
+        app = create_app(latency=0, rate_limit=1.0, retry_after=0.01)
+        client = make_client(app, max_retries=2)
+        with pytest.raises(openai.RateLimitError):
+            await client.chat(model="gpt-4o-mini", messages=MESSAGES)
+        assert (await server_stats(app))["requests"] == 3
+        assert client.stats()["retries"] == 2 and client.stats()["failures"] == 1
+
+    asyncio.run(run())
+
+
+def test_deadline_covers_queueing_and_retries():
+    async def run():
+        client = make_client(create_app(latency=0, rate_limit=1.0, retry_after=0.05), max_retries=100)
+        with pytest.raises(LLMDeadlineExceeded):
+            await client.chat(model="gpt-4o-mini", messages=MESSAGES, deadline=0.3)
+        assert client.stats()["deadlines_exceeded"] == 1
+
+        slow = make_client(create_app(latency=1.0), max_concurrency=1)
+        with pytest.raises(LLMDeadlineExceeded):
+            await slow.chat(model="gpt-4o-mini", messages=MESSAGES, deadline=0.2)
+        # The cancelled call gave its slot back
+        assert slow.semaphore.locked() is False and slow.stats()["in_flight"] == 0
+
+    asyncio.run(run())
+
+
+def test_stream_holds_its_slot_until_it_ends():
+    async def run():
+        client = make_client(create_app(latency=0), max_concurrency=1)
+        content = ""
+        async for chunk in client.stream_chat(model="gpt-4o-mini", messages=MESSAGES):
+            assert client.semaphore.locked()
+            if chunk.choices:
+                content += chunk.choices[0].delta.content or ""
+        assert content == REPLY
+        assert not client.semaphore.locked() and client.stats()["in_flight"] == 0
+
+    asyncio.run(run())
@@ -0,0 +1,110 @@
+import asyncio
+import json
+from types import SimpleNamespace
+
+import pytest
+
+import mentor_index as mentor_index_module
+from benchmarks.fake_openai import create_app
+from mentor_index import MentorIndex, recommend_from_index, refresh_mentor_index, template_reason
+from tests.fake_llm import make_client
+
+
+def mentor(number, specialized_field, years=5, **fields):
+    return {"id": number, "name": f"Mentor {number}", "field": "Technology", "role": "Engineer",
+            "specialized_field": specialized_field, "experience_years": years,
+            "email": f"mentor{number}@example.com", "updated_at": f"2024-01-{number:02d}T00:00:00", **fields}
+
+
+ROSTER = [
+    mentor(1, "machine learning", years=12),
+    mentor(2, "machine learning", years=30),
+    mentor(3, "port logistics"),
+    mentor(4, "cloud security"),
+]
+
+
+def build(mentors, full=True):
+    index = MentorIndex()
+    asyncio.run(index.apply(mentors, full=full))
+    return index
+
+
+def test_best_match_first_and_experience_breaks_ties():
+    index = build(ROSTER)
+
+    matches = index.search("I want to learn machine learning")
+    assert [match["id"] for match, _ in matches[:2]] == [2, 1]
+    assert index.search("port logistics planning", k=1)[0][0]["id"] == 3
+    assert index.search("underwater basket weaving") == []
+    assert MentorIndex().search("machine learning") == []
+
+
+def test_changes_are_merged_and_full_reloads_drop_missing_mentors():
+    index = build(ROSTER)
+    version = index.version
+
+    asyncio.run(index.apply([mentor(3, "quantum computing", updated_at="2024-02-01T00:00:00"),
+                             mentor(4, "cloud security", active=False)]))
+    assert len(index) == 3 and index.version != version
+    assert index.updated_at == "2024-02-01T00:00:00"
+    assert index.search("quantum computing", k=1)[0][0]["id"] == 3
+    assert index.search("cloud security") == []
+
+    asyncio.run(index.apply(ROSTER[:2], full=True))
+    assert sorted(index.mentors) == [1, 2]
+
+
+def test_version_is_a_content_hash_of_the_roster():
+    assert build(ROSTER).version == build(list(reversed(ROSTER))).version
+    assert build(ROSTER).version != build([*ROSTER[:3], mentor(4, "cloud security", years=6)]).version
+
+
+def test_refresh_asks_only_for_mentors_changed_since_the_last_one(monkeypatch):
+    requests = []
+
+    async def fetch_mentors(updated_after=None):
+        requests.append(updated_after)
+        return ROSTER if updated_after is None else [mentor(5, "data engineering")]
+
+    monkeypatch.setattr(mentor_index_module, "fetch_mentors", fetch_mentors)
+    monkeypatch.setattr(mentor_index_module, "mentor_index", MentorIndex())
+
+    async def run():
+        await refresh_mentor_index(full=True)
+        await refresh_mentor_index()
+
+    asyncio.run(run())
+    assert requests == [None, "2024-01-04T00:00:00"]
+    assert len(mentor_index_module.mentor_index) == 5
+
+
+@pytest.fixture
+def indexed(monkeypatch):
+    monkeypatch.setattr(mentor_index_module, "mentor_index", build(ROSTER))
+    client = make_client(create_app(latency=0))
+    monkeypatch.setattr(mentor_index_module, "get_llm_client", lambda: client)
+    return client
+
+
+def test_reasons_fall_back_to_the_template(indexed, monkeypatch):
+    # The fake server's reply has no "reasons"
+    reply, llm_reasons = asyncio.run(recommend_from_index("machine learning"))
+    assert llm_reasons is False
+    assert template_reason(ROSTER[1]) in reply and "mentor2@example.com" in reply
+
+    monkeypatch.setattr(mentor_index_module, "LLM_REASONS", False)
+    assert asyncio.run(recommend_from_index("machine learning"))[1] is False
+    assert asyncio.run(recommend_from_index("underwater basket weaving")) is None
+
+
+def test_reasons_written_by_the_llm(indexed, monkeypatch):
+    async def chat(**kwargs):
+        count = kwargs["messages"][-1]["content"].count('"name"')
+        content = json.dumps({"reasons": [f"Reason {i}" for i in range(count)]})
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+    monkeypatch.setattr(indexed, "chat", chat)
+    reply, llm_reasons = asyncio.run(recommend_from_index("machine learning"))
+    assert llm_reasons is True
+    assert "Reason for Recommendation: Reason 0" in reply
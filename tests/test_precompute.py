@@ -0,0 +1,83 @@
+from api.course_recommender import CourseRecommender
+from api.precompute import (
+    RECOMMENDATIONS_COLLECTION,
+    build_user_keywords,
+    is_fresh,
+    precompute_recommendations,
+)
+from benchmarks.synthetic import make_catalog
+
+CATALOG = make_catalog(300, vocab_size=200, seed=9)
+
+
+class Users:
+    """The pymongo User collection, as far as precompute reads it."""
+
+    def __init__(self, users):
+        self.users = users
+        self.batch_sizes = []
+        self.projection = None
+
+    def find(self, query, projection):
+        self.projection = projection
+        return self
+
+    def batch_size(self, size):
+        self.batch_sizes.append(size)
+        return iter([{key: value for key, value in user.items() if key == "_id" or key in self.projection}
+                     for user in self.users])
+
+
+class Recommendations:
+    def __init__(self):
+        self.documents = {}
+        self.bulk_writes = []
+
+    def bulk_write(self, operations, ordered=True):
+        self.bulk_writes.append(len(operations))
+        for operation in operations:
+            self.documents[operation._filter["_id"]] = operation._doc
+
+
+def make_users(count):
+    titles = CATALOG["course_title"].tolist()
+    users = [
+        {"_id": f"user{i}", "department": "Engineering", "existingSkills": titles[i].split()[:2], "name": "ignored"}
+        for i in range(count)
+    ]
+    # Profiles with missing fields are scored too
+    users.append({"_id": "empty"})
+    return users
+
+
+def test_every_user_is_stored_with_their_live_recommendations():
+    recommender = CourseRecommender.from_catalog(CATALOG)
+    users = make_users(53)
+    db = {"User": Users(users), RECOMMENDATIONS_COLLECTION: Recommendations()}
+
+    summary = precompute_recommendations(db, recommender, count=5, chunk_size=10, workers=3)
+
+    stored = db[RECOMMENDATIONS_COLLECTION]
+    assert summary["users"] == len(users) and summary["model_version"] == recommender.version
+    assert db["User"].batch_sizes == [10]
+    assert set(db["User"].projection) == {"department", "existingSkills"}
+    assert sorted(stored.bulk_writes) == [4] + [10] * 5
+    for user in users:
+        keywords = build_user_keywords(user)
+        document = stored.documents[user["_id"]]
+        assert document["recommendations"] == recommender.recommend_columns(keywords, 5)
+        assert is_fresh(document, keywords, recommender.version, 5)
+
+
+def test_changed_profile_count_or_model_is_stale():
+    recommender = CourseRecommender.from_catalog(CATALOG)
+    user = make_users(1)[0]
+    db = {"User": Users([user]), RECOMMENDATIONS_COLLECTION: Recommendations()}
+    precompute_recommendations(db, recommender, count=5, chunk_size=10, workers=1)
+    document = db[RECOMMENDATIONS_COLLECTION].documents[user["_id"]]
+    keywords = build_user_keywords(user)
+
+    assert not is_fresh(document, build_user_keywords({**user, "department": "Sales"}), recommender.version, 5)
+    assert not is_fresh(document, keywords, recommender.version, 10)
+    assert not is_fresh(document, keywords, recommender.version + "+1", 5)
+    assert not is_fresh(None, keywords, recommender.version, 5)
@@ -0,0 +1,166 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+import recommendation_cache as cache_module
+from recommendation_cache import RecommendationCache
+
+
+class Computation:
+    """Counts calls; each one waits for `release` and answers `reply`."""
+
+    def __init__(self, reply="mentors", cacheable=True, error=None):
+        self.reply = reply
+        self.cacheable = cacheable
+        self.error = error
+        self.calls = 0
+        self.release = None
+
+    async def __call__(self):
+        self.calls += 1
+        if self.release is not None:
+            await self.release.wait()
+        if self.error is not None:
+            raise self.error
+        return self.reply, self.cacheable
+
+
+def lookup(cache, query, compute, version="v1", conversation_type="interest"):
+    return cache.get_or_compute(conversation_type, query, compute, version=version)
+
+
+def test_equivalent_queries_share_an_entry():
+    async def run():
+        cache = RecommendationCache(maxsize=8)
+        compute = Computation()
+        assert await lookup(cache, "Data Science", compute) == "mentors"
+        assert await lookup(cache, "  data   science! ", compute) == "mentors"
+        await lookup(cache, "data science", compute, conversation_type="jobdescription")
+        return cache, compute
+
+    cache, compute = asyncio.run(run())
+    assert compute.calls == 2
+    assert (cache.stats()["hits"], cache.stats()["misses"]) == (1, 2)
+
+
+def test_concurrent_lookups_share_one_computation():
+    async def run():
+        cache = RecommendationCache(maxsize=8)
+        compute = Computation()
+        compute.release = asyncio.Event()
+        lookups = [asyncio.ensure_future(lookup(cache, "data science", compute)) for _ in range(5)]
+        await asyncio.sleep(0)
+        assert cache.stats()["in_flight"] == 1
+        compute.release.set()
+        return cache, compute, await asyncio.gather(*lookups)
+
+    cache, compute, replies = asyncio.run(run())
+    assert replies == ["mentors"] * 5 and compute.calls == 1
+    assert cache.stats()["coalesced"] == 4 and cache.stats()["in_flight"] == 0
+
+
+def test_failures_are_shared_but_not_stored():
+    async def run():
+        cache = RecommendationCache(maxsize=8)
+        failing = Computation(error=RuntimeError("assistant down"))
+        failing.release = asyncio.Event()
+        lookups = [asyncio.ensure_future(lookup(cache, "data science", failing)) for _ in range(2)]
+        await asyncio.sleep(0)
+        failing.release.set()
+        results = await asyncio.gather(*lookups, return_exceptions=True)
+        assert all(isinstance(result, RuntimeError) for result in results) and failing.calls == 1
+
+        # Template reasons written while the LLM was busy are not kept either
+        template = Computation(reply="template mentors", cacheable=False)
+        await lookup(cache, "data science", template)
+        await lookup(cache, "data science", template)
+        assert template.calls == 2 and cache.stats()["size"] == 0
+
+    asyncio.run(run())
+
+
+def test_cancelled_computation_is_redone_by_the_waiters():
+    async def run():
+        cache = RecommendationCache(maxsize=8)
+        compute = Computation()
+        compute.release = asyncio.Event()
+        leader = asyncio.ensure_future(lookup(cache, "data science", compute))
+        await asyncio.sleep(0)
+        waiter = asyncio.ensure_future(lookup(cache, "data science", compute))
+        await asyncio.sleep(0)
+        leader.cancel()
+        await asyncio.sleep(0)
+        compute.release.set()
+        assert await waiter == "mentors"
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return compute
+
+    assert asyncio.run(run()).calls == 2
+
+
+def test_new_roster_version_drops_older_replies():
+    async def run():
+        cache = RecommendationCache(maxsize=8)
+        compute = Computation()
+        # Nothing is stored before the mentor index has loaded
+        await lookup(cache, "data science", compute, version=None)
+        await lookup(cache, "data science", compute, version=None)
+        assert compute.calls == 2 and cache.stats()["size"] == 0
+
+        await lookup(cache, "data science", compute, version="v1")
+        await lookup(cache, "data science", compute, version="v1")
+        assert compute.calls == 3
+        await lookup(cache, "cloud security", compute, version="v2")
+        assert cache.stats()["size"] == 1 and cache.version == "v2"
+
+        # A reply computed while the roster changed is not stored under either version
+        compute.release = asyncio.Event()
+        stale = asyncio.ensure_future(lookup(cache, "port logistics", compute, version="v2"))
+        await asyncio.sleep(0)
+        await lookup(cache, "data science", Computation(), version="v3")
+        compute.release.set()
+        await stale
+        assert list(cache._entries) == [RecommendationCache.key("interest", "data science", "v3")]
+
+    asyncio.run(run())
+
+
+def test_least_recently_used_and_expired_replies_are_dropped(monkeypatch):
+    clock = SimpleNamespace(now=1000.0)
+    monkeypatch.setattr(cache_module, "time", SimpleNamespace(time=lambda: clock.now))
+
+    async def run():
+        cache = RecommendationCache(maxsize=2, ttl=60)
+        compute = Computation()
+        for query in ("a", "b", "a", "c", "b"):
+            await lookup(cache, query, compute)
+        # "b" was evicted for lack of room, so its miss counts as a ghost hit
+        assert cache.stats()["evictions"] == 2 and cache.stats()["ghost_hits"] == 1
+
+        clock.now += 61
+        calls = compute.calls
+        await lookup(cache, "b", compute)
+        assert compute.calls == calls + 1 and cache.stats()["expirations"] == 1
+
+    asyncio.run(run())
+
+
+def test_entries_survive_a_restart(tmp_path):
+    path = str(tmp_path / "cache.json")
+
+    async def fill():
+        cache = RecommendationCache(maxsize=8, path=path)
+        await lookup(cache, "data science", Computation())
+
+    asyncio.run(fill())
+    restarted = RecommendationCache(maxsize=8, path=path)
+    compute = Computation(reply="recomputed")
+    assert asyncio.run(lookup(restarted, "data science", compute)) == "mentors"
+    assert compute.calls == 0
+    # Entries of another roster are dropped once the new version is seen
+    assert asyncio.run(lookup(restarted, "data science", compute, version="v2")) == "recomputed"
+
+    (tmp_path / "broken.json").write_text("{not json")
+    assert RecommendationCache(path=str(tmp_path / "broken.json")).stats()["size"] == 0
@@ -0,0 +1,76 @@
+import asyncio
+
+import pytest
+
+from api.gpt import GPT
+from api.report_cache import MemoryReportCacheBackend, MongoReportCacheBackend, ReportCache, report_cache_key
+from benchmarks.fake_openai import create_app
+from tests.fake_llm import make_client, server_stats
+from tests.fake_mongo import FakeCollection
+
+BACKENDS = {
+    "memory": MemoryReportCacheBackend,
+    "mongo": lambda: MongoReportCacheBackend(FakeCollection()),
+}
+
+
+def test_key_changes_with_every_input():
+    key = report_cache_key("feedback", "gpt-4o-mini", 1, "single")
+
+    assert key == report_cache_key("feedback", "gpt-4o-mini", 1, "single")
+    assert len({key, report_cache_key("feedback!", "gpt-4o-mini", 1, "single"),
+                report_cache_key("feedback", "gpt-4o", 1, "single"),
+                report_cache_key("feedback", "gpt-4o-mini", 2, "single"),
+                report_cache_key("feedback", "gpt-4o-mini", 1, "hierarchical,batch_tokens=4000")}) == 5
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_expired_reports_are_dropped(backend):
+    async def run():
+        cache = ReportCache(BACKENDS[backend](), ttl=60)
+        await cache.set("a", "report a", {"mode": "single"})
+        entry = await cache.get("a")
+        assert (entry["report"], entry["summarization"]) == ("report a", {"mode": "single"})
+        assert 0 <= cache.age_seconds(entry) < 60
+
+        expired = ReportCache(cache.backend, ttl=0)
+        await expired.set("b", "report b", {})
+        assert await expired.get("b") is None
+        assert await cache.backend.count() == 1
+
+    asyncio.run(run())
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_least_recently_used_report_is_evicted(backend):
+    async def run():
+        cache = ReportCache(BACKENDS[backend](), max_entries=2)
+        await cache.set("a", "report a", {})
+        await cache.set("b", "report b", {})
+        # Keep the lastUsedAt timestamps apart
+        await asyncio.sleep(0.01)
+        await cache.get("a")
+        await cache.set("c", "report c", {})
+        return [await cache.get(key) is not None for key in "abc"]
+
+    assert asyncio.run(run()) == [True, False, True]
+
+
+def test_unchanged_feedback_is_reported_without_calling_openai():
+    async def run():
+        app = create_app(latency=0)
+        gpt = GPT(llm=make_client(app), cache=ReportCache(MemoryReportCacheBackend()))
+        feedback = {"enjoymentOfWork": ["good team", "long hours"]}
+
+        first = await gpt.generate_manager_report(feedback)
+        second = await gpt.generate_manager_report(dict(feedback))
+        assert (first["cached"], second["cached"]) == (False, True)
+        assert second["manager_report"] == first["manager_report"]
+        assert second["summarization"] == first["summarization"]
+        assert (await server_stats(app))["requests"] == 1
+
+        changed = await gpt.generate_manager_report({"enjoymentOfWork": ["good team"]})
+        assert changed["cached"] is False
+        assert (await server_stats(app))["requests"] == 2
+
+    asyncio.run(run())
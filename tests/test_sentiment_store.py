@@ -0,0 +1,60 @@
+import asyncio
+
+from api.sentiment_store import SentimentStore, iter_response_sentiments
+from tests.fake_mongo import FakeCollection
+
+
+class Pool:
+    """Scores every window by a keyword, two responses per job, like InferencePool."""
+
+    def __init__(self, model_id="model-a"):
+        self.model_id = model_id
+        self.scored = []
+
+    async def iter_window_sentiments(self, texts):
+        self.scored.extend(texts)
+        for offset in range(0, len(texts), 2):
+            yield offset, [[word for word in text.split() if word in ("positive", "negative")] or ["neutral"]
+                           for text in texts[offset:offset + 2]]
+
+
+def collect(responses, store, pool):
+    async def run():
+        labels = {}
+        async for batch in iter_response_sentiments(responses, store, pool):
+            labels.update(batch)
+        return labels
+    return asyncio.run(run())
+
+
+RESPONSES = [
+    ("f1", "likes", "positive positive negative"),
+    ("f1", "dislikes", "negative"),
+    ("f2", "likes", "nothing to say"),
+]
+
+
+def test_labels_are_computed_once_and_then_served_from_the_store():
+    store = SentimentStore(FakeCollection())
+    pool = Pool()
+
+    first = collect(RESPONSES, store, pool)
+    second = collect(RESPONSES, store, pool)
+
+    assert first == second == {("f1", "likes"): "positive", ("f1", "dislikes"): "negative", ("f2", "likes"): "neutral"}
+    assert pool.scored == [text for _, _, text in RESPONSES]
+
+
+def test_edited_text_or_new_model_is_rescored():
+    store = SentimentStore(FakeCollection())
+    collect(RESPONSES, store, Pool())
+
+    edited = [("f1", "likes", "negative now"), *RESPONSES[1:]]
+    pool = Pool()
+    assert collect(edited, store, pool)[("f1", "likes")] == "negative"
+    assert pool.scored == ["negative now"]
+
+    pool = Pool(model_id="model-b")
+    collect(edited, store, pool)
+    assert pool.scored == [text for _, _, text in edited]
+    assert asyncio.run(store.lookup(edited, "model-a")) == {}
@@ -0,0 +1,47 @@
+import json
+
+import pytest
+
+from api import serialization
+from api.course_recommender import CATALOG_COLUMNS, CourseRecommender
+from api.serialization import FastJSONResponse, RecommendationsResponse, columns_to_records
+from benchmarks.synthetic import make_catalog, make_queries
+
+CATALOG = make_catalog(200, vocab_size=150, seed=7)
+QUERIES = make_queries(CATALOG, 10, seed=8)
+
+
+@pytest.fixture(scope="module")
+def recommender():
+    return CourseRecommender.from_catalog(CATALOG)
+
+
+def dataframe_records(recommendations):
+    # What get_recommendations built from the recommend() DataFrame before the columnar path
+    return [
+        {"course_id": course_id, **{col: recommendations[col][course_id] for col in CATALOG_COLUMNS}}
+        for course_id in recommendations["course_title"].index
+    ]
+
+
+def test_columns_match_the_dataframe_path(recommender):
+    for query in QUERIES:
+        records = columns_to_records(recommender.recommend_columns(query, 10))
+        assert records == dataframe_records(recommender.recommend(query, 10))
+
+
+def test_columns_to_records_of_no_rows():
+    assert columns_to_records({"course_id": [], "course_title": []}) == []
+
+
+@pytest.mark.parametrize("use_orjson", [True, False])
+def test_fast_json_response_renders_a_valid_body(recommender, monkeypatch, use_orjson):
+    if not use_orjson:
+        monkeypatch.setattr(serialization, "orjson", None)
+    elif serialization.orjson is None:
+        pytest.skip("orjson is not installed")
+    content = {"recommendations": columns_to_records(recommender.recommend_columns(QUERIES[0], 10))}
+
+    body = json.loads(FastJSONResponse(content).body)
+    assert body == json.loads(json.dumps(content))
+    assert RecommendationsResponse.model_validate(body).recommendations[0].course_id == content["recommendations"][0]["course_id"]
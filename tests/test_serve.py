@@ -0,0 +1,30 @@
+import os
+import tempfile
+
+import pytest
+
+from api import serve
+from api.course_recommender import CourseRecommender
+from benchmarks.synthetic import make_catalog
+
+
+def test_existing_artifact_is_used_as_is(tmp_path, monkeypatch):
+    CourseRecommender.from_catalog(make_catalog(50, vocab_size=40, seed=1)).save_model(str(tmp_path / "model"))
+    monkeypatch.setattr(CourseRecommender, "from_dataset", pytest.fail)
+
+    assert serve.prepare_artifact(str(tmp_path / "model")) == (str(tmp_path / "model"), None)
+
+
+def test_failed_compile_removes_its_temporary_directory(tmp_path, monkeypatch):
+    def fail():
+        raise RuntimeError("dataset unavailable")
+
+    monkeypatch.delenv("COURSE_ARTIFACT_PATH", raising=False)
+    monkeypatch.setattr(CourseRecommender, "from_dataset", fail)
+    mkdtemp = tempfile.mkdtemp
+    # Compile under tmp_path rather than /dev/shm
+    monkeypatch.setattr(tempfile, "mkdtemp", lambda prefix, dir: mkdtemp(prefix=prefix, dir=tmp_path))
+
+    with pytest.raises(RuntimeError):
+        serve.prepare_artifact()
+    assert os.listdir(tmp_path) == []
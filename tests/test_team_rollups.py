@@ -0,0 +1,117 @@
+import asyncio
+from datetime import datetime, timedelta
+
+from api.feedback_repository import FeedbackRepository
+from api.team_rollups import TeamRollupStore, rebuild_team_rollup, rollup_summary
+from tests.fake_mongo import FakeCollection
+
+MODEL = "model-1"
+START = datetime(2024, 10, 1)
+
+
+def feedback_document(number: int, team: int = 1) -> dict:
+    return {
+        "_id": f"f{number}",
+        "teamNumber": team,
+        "createdAt": START + timedelta(minutes=number),
+        "enjoymentOfWork": "bad day" if number % 2 else "good team",
+        "workSatisfaction": "Satisfied",
+    }
+
+
+async def label(responses):
+    return {(feedback_id, field): "negative" if "bad" in text else "positive" for feedback_id, field, text in responses}
+
+
+def make_stores(documents):
+    feedback_collection = FakeCollection(documents)
+    rollups = TeamRollupStore(FakeCollection(), FakeCollection())
+    return feedback_collection, FeedbackRepository(feedback_collection, batch_size=2), rollups
+
+
+async def get_fresh(feedback: FeedbackRepository, rollups: TeamRollupStore, team: int = 1):
+    return await rollups.get_fresh(
+        team, MODEL, await feedback.count_team_feedback(team), await feedback.latest_team_feedback_at(team)
+    )
+
+
+def test_rebuild_then_apply_counts_each_feedback_once():
+    async def run():
+        collection, feedback, rollups = make_stores([feedback_document(number) for number in range(5)])
+        rollup = await rebuild_team_rollup(1, feedback, rollups, label, MODEL)
+        assert rollup["totalCount"] == 5
+        assert await get_fresh(feedback, rollups) is not None
+
+        new = feedback_document(5)
+        await collection.insert_one(new)
+        assert await get_fresh(feedback, rollups) is None
+        assert await rollups.apply_feedback(new, {"enjoymentOfWork": "negative"}, MODEL)
+        # A retried call is not counted again
+        assert not await rollups.apply_feedback(new, {"enjoymentOfWork": "negative"}, MODEL)
+
+        summary = rollup_summary(await get_fresh(feedback, rollups))
+        assert summary["total_count"] == 6
+        assert summary["sentiment_counts"]["enjoymentOfWork"] == {"positive": 3, "negative": 3, "neutral": 0}
+        assert summary["survey"]["workSatisfaction"]["average"] == 4
+
+    asyncio.run(run())
+
+
+def test_delete_plus_insert_is_stale():
+    async def run():
+        collection, feedback, rollups = make_stores([feedback_document(number) for number in range(3)])
+        await rebuild_team_rollup(1, feedback, rollups, label, MODEL)
+        await collection.delete_many({"_id": "f0"})
+        await collection.insert_one(feedback_document(3))
+        assert await get_fresh(feedback, rollups) is None
+
+    asyncio.run(run())
+
+
+def test_concurrent_rebuilds_run_once():
+    async def run():
+        _, feedback, rollups = make_stores([feedback_document(number) for number in range(6)])
+        scored = []
+
+        async def slow_label(responses):
+            scored.extend(responses)
+            await asyncio.sleep(0.05)
+            return await label(responses)
+
+        first, second = await asyncio.gather(
+            rebuild_team_rollup(1, feedback, rollups, slow_label, MODEL),
+            rebuild_team_rollup(1, feedback, rollups, slow_label, MODEL),
+        )
+        assert first["totalCount"] == second["totalCount"] == 6
+        assert len(scored) == 6
+        assert await get_fresh(feedback, rollups) is not None
+
+    asyncio.run(run())
+
+
+def test_rebuild_over_existing_markers():
+    async def run():
+        _, feedback, rollups = make_stores([feedback_document(number) for number in range(4)])
+        await rollups.apply_feedback(feedback_document(2), {"enjoymentOfWork": "positive"}, MODEL)
+        rollup = await rebuild_team_rollup(1, feedback, rollups, label, MODEL)
+        assert rollup["totalCount"] == 4
+        assert not await rollups.apply_feedback(feedback_document(3), {"enjoymentOfWork": "negative"}, MODEL)
+
+    asyncio.run(run())
+
+
+def test_failed_rebuild_releases_its_lease():
+    async def run():
+        _, feedback, rollups = make_stores([feedback_document(number) for number in range(2)])
+
+        async def failing(responses):
+            raise RuntimeError("model unavailable")
+
+        try:
+            await rebuild_team_rollup(1, feedback, rollups, failing, MODEL)
+        except RuntimeError:
+            pass
+        rollup = await rebuild_team_rollup(1, feedback, rollups, label, MODEL)
+        assert rollup["totalCount"] == 2
+
+    asyncio.run(run())